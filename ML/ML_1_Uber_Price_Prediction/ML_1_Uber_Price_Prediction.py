@@ -1,16 +1,42 @@
 # Import necessary libraries
+import os
+import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import r2_score, mean_squared_error
-from geopy.distance import geodesic
+from uber_distance import trip_distance_km
+from uber_loader import load_uber, replace_invalid_coordinates
+
+# Shared helpers live in ML/ml_common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ml_common.compaction import MemoryReport, to_float32
+from ml_common.datasets import dataset_path
+from ml_common.figures import FigureRenderer
+from ml_common.lazy import lazy_import
+from ml_common.model_cache import ModelCache
+from ml_common.scoring import BlockScorer
+from ml_common.tracing import StageTrace
+
+# The plotting libraries load when the first figure is drawn, and scikit-learn in the stages
+# that use it, so the dataset diagnostics print without waiting for them
+plt = lazy_import('matplotlib.pyplot')
+sns = lazy_import('seaborn')
+
+# Wall time, CPU time, peak memory and row counts of every stage go to a JSON trace
+trace = StageTrace('ML_1_Uber_Price_Prediction')
+# Figures are shown, saved in the background or skipped depending on $ML_FIGURES (see ml_common/figures.py)
+figures = FigureRenderer('ML_1_Uber_Price_Prediction')
+# Memory saved by compact dtypes is printed when the script ends
+memory = MemoryReport('ML_1_Uber_Price_Prediction')
 
 # Load dataset
-df = pd.read_csv("./uber.csv")
+trace.stage("Load")
+# The file is streamed in chunks with explicit dtypes; each chunk is pre-processed on arrival
+# (datetime parsing, missing values, fare and passenger-count filters) so rejected rows never pile up.
+# uber.csv is found through the dataset registry; with cache=True later runs read the parsed
+# columns from the columnar cache instead of the CSV.
+chunk_size = 100_000
+df = load_uber(dataset_path('uber'), chunksize=chunk_size, cache=True)
+trace.rows(len(df))
 
 # Display dataset information
 print("Dataset Information:\n")
@@ -19,15 +45,8 @@ print("\nDataset Head:\n")
 print(df.head())
 
 # 1. Pre-processing the dataset
-# Convert 'pickup_datetime' to datetime
-df['pickup_datetime'] = pd.to_datetime(df['pickup_datetime'], errors='coerce')
-
-# Drop rows with missing values in 'pickup_datetime' and 'fare_amount'
-df.dropna(subset=['pickup_datetime', 'fare_amount'], inplace=True)
-
-# Remove negative and extremely high values in 'fare_amount' and 'passenger_count'
-df = df[(df['fare_amount'] > 0) & (df['fare_amount'] < 100)]
-df = df[(df['passenger_count'] > 0) & (df['passenger_count'] <= 6)]
+trace.stage("Pre-processing")
+# 'pickup_datetime' parsing and the fare / passenger-count filters already ran inside the loader
 
 print(df[['pickup_latitude', 'pickup_longitude', 'dropoff_latitude', 'dropoff_longitude']].isnull().sum())
 
@@ -42,27 +61,18 @@ print(invalid_rows)
 lat_min, lat_max = -90.0, 90.0
 lon_min, lon_max = -90.0, 90.0
 
-df['pickup_longitude'] = df['pickup_longitude'].apply(lambda x: x if lon_min <= x <= lon_max else df['pickup_longitude'].median())
-df['pickup_latitude'] = df['pickup_latitude'].apply(lambda x: x if lat_min <= x <= lat_max else df['pickup_latitude'].median())
-df['dropoff_longitude'] = df['dropoff_longitude'].apply(lambda x: x if lon_min <= x <= lon_max else df['dropoff_longitude'].median())
-df['dropoff_latitude'] = df['dropoff_latitude'].apply(lambda x: x if lat_min <= x <= lat_max else df['dropoff_latitude'].median())
+df = replace_invalid_coordinates(df, lat_range=(lat_min, lat_max), lon_range=(lon_min, lon_max))
 
-
-
-# Calculate distance between pickup and dropoff points using geopy
-def calculate_distance(row):
-    try:
-        return geodesic(
-            (row['pickup_latitude'], row['pickup_longitude']),
-            (row['dropoff_latitude'], row['dropoff_longitude'])
-        ).km
-    except ValueError as e:
-        print(f"Error calculating distance for row {row.name}: {e}")
-        return None  # or 0, depending on how you want to handle errors
-
-df['distance_km'] = df.apply(calculate_distance, axis=1)
+# Calculate distance between pickup and dropoff points on whole coordinate arrays
+trace.stage("Distance computation")
+# 'geodesic' matches geopy's ellipsoidal distance, 'haversine' is the faster spherical mode
+# Invalid coordinates come back as NaN and are dropped by the filters below
+distance_method = 'geodesic'
+df['distance_km'] = trip_distance_km(df, method=distance_method)
+trace.rows(len(df))
 
 # Drop rows with zero or very high distances
+trace.stage("Distance filters and date features")
 df = df[df['distance_km'] > 0]
 df = df[df['distance_km'] < 100]
 
@@ -74,49 +84,78 @@ df['pickup_year'] = df['pickup_datetime'].dt.year
 
 # Drop unnecessary columns
 df.drop(['key', 'pickup_datetime', 'pickup_longitude', 'pickup_latitude', 'dropoff_longitude', 'dropoff_latitude'], axis=1, inplace=True)
+# Row ids and date parts to their smallest integer widths (values unchanged)
+df = memory.compact(df, "Trip features")
+trace.rows(len(df))
 
 # 2. Identify outliers
+trace.stage("Outliers")
 # Visualize 'fare_amount' and 'distance_km' distributions
-plt.figure(figsize=(12, 5))
-plt.subplot(1, 2, 1)
-sns.boxplot(df['fare_amount'])
-plt.title('Boxplot of Fare Amount')
-plt.subplot(1, 2, 2)
-sns.boxplot(df['distance_km'])
-plt.title('Boxplot of Distance (km)')
-plt.show()
+def plot_boxplots(df):
+    plt.figure(figsize=(12, 5))
+    plt.subplot(1, 2, 1)
+    sns.boxplot(df['fare_amount'])
+    plt.title('Boxplot of Fare Amount')
+    plt.subplot(1, 2, 2)
+    sns.boxplot(df['distance_km'])
+    plt.title('Boxplot of Distance (km)')
+
+
+figures.render('boxplots', plot_boxplots, df)
 
 # Remove outliers based on z-scores for 'fare_amount' and 'distance_km'
 from scipy import stats
 df = df[(np.abs(stats.zscore(df[['fare_amount', 'distance_km']])) < 3).all(axis=1)]
+trace.rows(len(df))
 
 # 3. Check correlation
+trace.stage("Correlation")
 # Plot correlation heatmap
-plt.figure(figsize=(10, 6))
-sns.heatmap(df.corr(), annot=True, cmap='coolwarm', fmt=".2f")
-plt.title("Correlation Matrix")
-plt.show()
+# (the correlations are computed by the figure worker, and not at all when figures are off)
+def plot_correlation(df):
+    plt.figure(figsize=(10, 6))
+    sns.heatmap(df.corr(), annot=True, cmap='coolwarm', fmt=".2f")
+    plt.title("Correlation Matrix")
+
+
+figures.render('correlation', plot_correlation, df)
 
 # 4. Implement Linear Regression and Random Forest Regression models
+trace.stage("Train")
+# (For fare histories larger than memory, run uber_out_of_core.py: it streams the file and trains
+#  an incremental linear regressor and a forest built from per-chunk sub-forests)
+from sklearn.model_selection import train_test_split
+from sklearn.linear_model import LinearRegression
+from sklearn.ensemble import RandomForestRegressor
+
 # Define features and target variable
 X = df.drop('fare_amount', axis=1)
 y = df['fare_amount']
 
 # Split data into training and testing sets
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+trace.rows(len(X_train))
 
 # Initialize and train the Linear Regression model
 linear_model = LinearRegression()
 linear_model.fit(X_train, y_train)
 
 # Initialize and train the Random Forest Regression model
-random_forest_model = RandomForestRegressor(n_estimators=100, random_state=42)
-random_forest_model.fit(X_train, y_train)
+# The fitted forest is cached under a hash of the training data and its hyperparameters,
+# so re-runs on unchanged data load it instead of training again
+model_cache = ModelCache()
+# The trees work on float32 features internally, so they are given float32 (the same model,
+# without scikit-learn's float64 -> float32 copy of the training set)
+random_forest_model = model_cache.fit_or_load(RandomForestRegressor(n_estimators=100, random_state=42),
+                                              to_float32(X_train), y_train)
 
 # 5. Evaluate the models and compare their respective scores like R2, RMSE, etc.
+trace.stage("Evaluate")
+from sklearn.metrics import r2_score, mean_squared_error
+
 # Predict on test set
 y_pred_linear = linear_model.predict(X_test)
-y_pred_rf = random_forest_model.predict(X_test)
+y_pred_rf = random_forest_model.predict(to_float32(X_test))
 
 # Calculate evaluation metrics
 def evaluate_model(y_true, y_pred):
@@ -137,25 +176,30 @@ print(f"R^2 Score: {r2_rf:.4f}")
 print(f"RMSE: {rmse_rf:.4f}")
 
 # Visualization of predicted vs actual fare amount for both models
-plt.figure(figsize=(14, 6))
-
-# Linear Regression Predictions
-plt.subplot(1, 2, 1)
-plt.scatter(y_test, y_pred_linear, alpha=0.5, color='blue')
-plt.plot([y.min(), y.max()], [y.min(), y.max()], 'r--')
-plt.xlabel("Actual Fare")
-plt.ylabel("Predicted Fare")
-plt.title("Linear Regression: Actual vs Predicted Fares")
-
-# Random Forest Predictions
-plt.subplot(1, 2, 2)
-plt.scatter(y_test, y_pred_rf, alpha=0.5, color='green')
-plt.plot([y.min(), y.max()], [y.min(), y.max()], 'r--')
-plt.xlabel("Actual Fare")
-plt.ylabel("Predicted Fare")
-plt.title("Random Forest: Actual vs Predicted Fares")
-
-plt.show()
+trace.stage("Plots")
+def plot_predictions(y_test, y_pred_linear, y_pred_rf, fare_range):
+    plt.figure(figsize=(14, 6))
+
+    # Linear Regression Predictions
+    plt.subplot(1, 2, 1)
+    plt.scatter(y_test, y_pred_linear, alpha=0.5, color='blue')
+    plt.plot(fare_range, fare_range, 'r--')
+    plt.xlabel("Actual Fare")
+    plt.ylabel("Predicted Fare")
+    plt.title("Linear Regression: Actual vs Predicted Fares")
+
+    # Random Forest Predictions
+    plt.subplot(1, 2, 2)
+    plt.scatter(y_test, y_pred_rf, alpha=0.5, color='green')
+    plt.plot(fare_range, fare_range, 'r--')
+    plt.xlabel("Actual Fare")
+    plt.ylabel("Predicted Fare")
+    plt.title("Random Forest: Actual vs Predicted Fares")
+
+
+# The test set has tens of thousands of trips; a random sample of figures.point_budget is plotted
+figures.render('actual_vs_predicted', plot_predictions, *figures.sample(y_test, y_pred_linear, y_pred_rf),
+               [y.min(), y.max()])
 
 # Bar plot of R2 and RMSE comparison
 metrics = pd.DataFrame({
@@ -164,16 +208,30 @@ metrics = pd.DataFrame({
     'RMSE': [rmse_linear, rmse_rf]
 })
 
-plt.figure(figsize=(14, 6))
-plt.subplot(1, 2, 1)
-sns.barplot(x='Model', y='R^2 Score', data=metrics, palette='viridis')
-plt.title("R^2 Score Comparison")
-
-plt.subplot(1, 2, 2)
-sns.barplot(x='Model', y='RMSE', data=metrics, palette='viridis')
-plt.title("RMSE Comparison")
-plt.show()
-
-solution= df.copy()
-solution["LinerPred"]=linear_model.predict(df.drop('fare_amount', axis=1))
-solution["RandomForestPred"]=random_forest_model.predict(df.drop('fare_amount', axis=1))
+def plot_metrics(metrics):
+    plt.figure(figsize=(14, 6))
+    plt.subplot(1, 2, 1)
+    sns.barplot(x='Model', y='R^2 Score', data=metrics, palette='viridis')
+    plt.title("R^2 Score Comparison")
+
+    plt.subplot(1, 2, 2)
+    sns.barplot(x='Model', y='RMSE', data=metrics, palette='viridis')
+    plt.title("RMSE Comparison")
+
+
+figures.render('metrics', plot_metrics, metrics)
+
+# Predictions for the whole dataset
+trace.stage("Predict full dataset")
+# Both models score the trips block by block in one pass: only one block of features is selected
+# and cast at a time, and the predictions go into arrays allocated once for all rows (streamed
+# to $ML_SCORE_DIR when it is set, see ml_common/scoring.py). The prediction columns are then
+# written into df in place (no copy of the frame).
+scorer = BlockScorer('ML_1_Uber_Price_Prediction')
+feature_columns = list(X.columns)
+predictions = scorer.score(df, {'LinerPred': linear_model.predict,
+                                'RandomForestPred': lambda features: random_forest_model.predict(to_float32(features))},
+                           transform=lambda block: block[feature_columns])
+df["LinerPred"] = predictions['LinerPred']
+df["RandomForestPred"] = predictions['RandomForestPred']
+trace.rows(len(df))
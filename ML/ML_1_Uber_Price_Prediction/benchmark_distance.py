@@ -0,0 +1,65 @@
+# Benchmark: vectorized distance engine vs the per-row geopy calculate_distance
+# Usage: python benchmark_distance.py [n_rows ...]
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from geopy.distance import geodesic
+
+from uber_distance import GEODESIC_TOLERANCE_KM, trip_distance_km
+
+
+# Original per-row implementation from ML_1_Uber_Price_Prediction.py
+def calculate_distance(row):
+    try:
+        return geodesic(
+            (row['pickup_latitude'], row['pickup_longitude']),
+            (row['dropoff_latitude'], row['dropoff_longitude'])
+        ).km
+    except ValueError as e:
+        print(f"Error calculating distance for row {row.name}: {e}")
+        return None  # or 0, depending on how you want to handle errors
+
+
+# Random trips around New York City, like the ones in uber.csv
+def make_trips(n_rows, seed=42):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'pickup_longitude': rng.normal(-73.98, 0.05, n_rows),
+        'pickup_latitude': rng.normal(40.75, 0.05, n_rows),
+        'dropoff_longitude': rng.normal(-73.98, 0.05, n_rows),
+        'dropoff_latitude': rng.normal(40.75, 0.05, n_rows),
+    })
+
+
+def time_it(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def run(n_rows):
+    df = make_trips(n_rows)
+
+    reference, t_apply = time_it(lambda: df.apply(calculate_distance, axis=1).to_numpy(dtype=float))
+    exact, t_geodesic = time_it(lambda: trip_distance_km(df, method='geodesic'))
+    fast, t_haversine = time_it(lambda: trip_distance_km(df, method='haversine'))
+
+    max_err = np.nanmax(np.abs(exact - reference))
+    max_rel_err = np.nanmax(np.abs(fast - reference) / reference)
+    status = "OK" if max_err <= GEODESIC_TOLERANCE_KM else "FAIL"
+
+    print(f"--- {n_rows} rows ---")
+    print(f"geopy apply:         {t_apply:8.3f} s")
+    print(f"vectorized geodesic: {t_geodesic:8.3f} s  ({t_apply / t_geodesic:7.1f}x)  "
+          f"max |error| = {max_err:.2e} km [{status}]")
+    print(f"vectorized haversine:{t_haversine:8.3f} s  ({t_apply / t_haversine:7.1f}x)  "
+          f"max relative error = {max_rel_err:.2%}")
+    return status == "OK"
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000]
+    ok = all([run(n) for n in sizes])
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,62 @@
+# Benchmark: chunked streaming loader vs the original read-everything-then-filter path,
+# and the streaming loader fed from the columnar dataset cache (first run builds it)
+# Usage: python benchmark_loader.py [n_rows] [chunk_size]
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from uber_loader import load_uber
+
+# Shared helpers live in ML/ml_common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ml_common.synthetic import write_csv
+
+
+# Original in-memory path from ML_1_Uber_Price_Prediction.py
+def load_in_memory(path):
+    df = pd.read_csv(path)
+    df['pickup_datetime'] = pd.to_datetime(df['pickup_datetime'], errors='coerce')
+    df.dropna(subset=['pickup_datetime', 'fare_amount'], inplace=True)
+    df = df[(df['fare_amount'] > 0) & (df['fare_amount'] < 100)]
+    df = df[(df['passenger_count'] > 0) & (df['passenger_count'] <= 6)]
+    return df
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2 ** 20
+
+
+if __name__ == '__main__':
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'uber.csv')
+        # uber.csv-shaped, including rows the filters must reject
+        write_csv('uber', path, n_rows)
+        os.environ['ML_DATASET_CACHE'] = os.path.join(tmp, 'cache')
+
+        expected, t_memory, peak_memory = measure(lambda: load_in_memory(path))
+        streamed, t_stream, peak_stream = measure(lambda: load_uber(path, chunksize=chunk_size))
+        _, t_build, _ = measure(lambda: load_uber(path, chunksize=chunk_size, cache=True))
+        cached, t_cached, peak_cached = measure(lambda: load_uber(path, chunksize=chunk_size, cache=True))
+
+    # passenger_count is narrowed to uint8 by the loader, the values must still match
+    pd.testing.assert_frame_equal(streamed, expected, check_dtype=False)
+    pd.testing.assert_frame_equal(cached, streamed)
+
+    print(f"{n_rows} rows, {len(streamed)} kept, chunk size {chunk_size}")
+    print(f"in-memory: {t_memory:7.2f} s  peak {peak_memory:8.1f} MiB  frame {expected.memory_usage(deep=True).sum() / 2 ** 20:7.1f} MiB")
+    print(f"streaming: {t_stream:7.2f} s  peak {peak_stream:8.1f} MiB  frame {streamed.memory_usage(deep=True).sum() / 2 ** 20:7.1f} MiB")
+    print(f"cached:    {t_cached:7.2f} s  peak {peak_cached:8.1f} MiB  (first run, building the cache: {t_build:.2f} s)")
+    print("Results identical: OK")
@@ -0,0 +1,57 @@
+# Tests of the vectorized distance engine against geopy's per-row geodesic
+import numpy as np
+import pandas as pd
+import pytest
+
+from uber_distance import (GEODESIC_TOLERANCE_KM, distance_km, geodesic_km, haversine_km, trip_distance_km,
+                           valid_coordinates)
+
+geopy_distance = pytest.importorskip('geopy.distance')
+
+
+def random_points(n, seed):
+    rng = np.random.default_rng(seed)
+    return (rng.uniform(-89, 89, n), rng.uniform(-180, 180, n), rng.uniform(-89, 89, n), rng.uniform(-180, 180, n))
+
+
+def test_geodesic_matches_geopy():
+    lat1, lon1, lat2, lon2 = random_points(300, seed=0)
+    # Coincident points, points on the equator and the Uber pickup area
+    lat1, lon1, lat2, lon2 = (np.append(c, extra) for c, extra in
+                              zip((lat1, lon1, lat2, lon2), ([40.7, 0, 40.74], [-73.9, 10, -73.99],
+                                                             [40.7, 0, 40.76], [-73.9, 50, -73.97])))
+    expected = [geopy_distance.geodesic((a, b), (c, d)).km for a, b, c, d in zip(lat1, lon1, lat2, lon2)]
+    np.testing.assert_allclose(geodesic_km(lat1, lon1, lat2, lon2), expected, rtol=0, atol=GEODESIC_TOLERANCE_KM)
+
+
+def test_geodesic_nearly_antipodal_points_fall_back_to_geopy():
+    lat1, lon1, lat2, lon2 = [0.0, 0.5], [0.0, 0.0], [0.5, -0.5], [179.7, 179.5]
+    expected = [geopy_distance.geodesic((a, b), (c, d)).km for a, b, c, d in zip(lat1, lon1, lat2, lon2)]
+    np.testing.assert_allclose(geodesic_km(lat1, lon1, lat2, lon2), expected, rtol=0, atol=GEODESIC_TOLERANCE_KM)
+
+
+def test_haversine_matches_great_circle():
+    lat1, lon1, lat2, lon2 = random_points(200, seed=1)
+    expected = [geopy_distance.great_circle((a, b), (c, d), radius=6371.0088).km
+                for a, b, c, d in zip(lat1, lon1, lat2, lon2)]
+    np.testing.assert_allclose(haversine_km(lat1, lon1, lat2, lon2), expected, rtol=1e-9)
+
+
+def test_invalid_coordinates_are_nan():
+    lat1 = [40.7, np.nan, 91.0, 40.7, 40.7]
+    lon1 = [-73.9, -73.9, -73.9, -181.0, -73.9]
+    lat2 = [40.8, 40.8, 40.8, 40.8, -90.5]
+    lon2 = [-73.8] * 5
+    np.testing.assert_array_equal(valid_coordinates(lat1, lon1, lat2, lon2), [True, False, False, False, False])
+    for method in ('geodesic', 'haversine'):
+        distance = distance_km(lat1, lon1, lat2, lon2, method=method)
+        assert np.isfinite(distance[0])
+        assert np.isnan(distance[1:]).all()
+
+
+def test_trip_distance_and_unknown_method():
+    df = pd.DataFrame({'pickup_latitude': [40.7], 'pickup_longitude': [-73.9],
+                       'dropoff_latitude': [40.8], 'dropoff_longitude': [-73.95]})
+    assert trip_distance_km(df)[0] == pytest.approx(geopy_distance.geodesic((40.7, -73.9), (40.8, -73.95)).km)
+    with pytest.raises(ValueError, match='Unknown distance method'):
+        distance_km(0, 0, 1, 1, method='manhattan')
@@ -0,0 +1,79 @@
+# Tests of the chunked Uber loader against the in-memory read-then-filter path
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from uber_loader import COORDINATE_COLUMNS, iter_uber_chunks, load_uber, replace_invalid_coordinates
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ml_common.synthetic import uber_trips
+
+
+@pytest.fixture
+def uber_csv(tmp_path):
+    path = tmp_path / 'uber.csv'
+    uber_trips(2500, seed=3).to_csv(path, index=False)
+    return str(path)
+
+
+def load_in_memory(path):
+    # The original script's steps on the whole file
+    df = pd.read_csv(path, dtype={'key': 'object', 'pickup_datetime': 'object'})
+    df['pickup_datetime'] = pd.to_datetime(df['pickup_datetime'], errors='coerce')
+    df = df.dropna(subset=['pickup_datetime', 'fare_amount'])
+    df = df[(df['fare_amount'] > 0) & (df['fare_amount'] < 100)]
+    df = df[(df['passenger_count'] > 0) & (df['passenger_count'] <= 6)]
+    df['passenger_count'] = df['passenger_count'].astype('uint8')
+    return df
+
+
+@pytest.mark.parametrize('chunksize', [97, 333, 10_000])
+def test_chunked_load_matches_in_memory_load(uber_csv, chunksize):
+    expected = load_in_memory(uber_csv)
+    # The synthetic file has rows for every filter to drop
+    assert 0 < len(expected) < 2500
+    pd.testing.assert_frame_equal(load_uber(uber_csv, chunksize=chunksize), expected)
+
+
+def test_cached_load_matches_in_memory_load(uber_csv, tmp_path, monkeypatch):
+    monkeypatch.setenv('ML_DATASET_CACHE', str(tmp_path / 'cache'))
+    expected = load_in_memory(uber_csv)
+    for _ in range(2):
+        # The first load builds the cache, the second reads it
+        df = load_uber(uber_csv, chunksize=700, cache=True)
+        pd.testing.assert_frame_equal(df, expected)
+        assert df['passenger_count'].dtype == np.uint8
+    assert os.listdir(tmp_path / 'cache')
+
+
+def test_float32_columns(uber_csv):
+    df = load_uber(uber_csv, chunksize=1000, float_dtype='float32')
+    assert (df[COORDINATE_COLUMNS + ['fare_amount']].dtypes == np.float32).all()
+    np.testing.assert_allclose(df['fare_amount'], load_in_memory(uber_csv)['fare_amount'], rtol=1e-6)
+
+
+def test_chunks_are_never_empty(uber_csv):
+    assert all(len(chunk) for chunk in iter_uber_chunks(uber_csv, chunksize=25))
+
+
+def test_no_surviving_rows(tmp_path):
+    path = tmp_path / 'uber.csv'
+    trips = uber_trips(50, seed=0)
+    trips['fare_amount'] = -1.0
+    trips.to_csv(path, index=False)
+    with pytest.raises(ValueError, match='survived'):
+        load_uber(str(path))
+
+
+def test_replace_invalid_coordinates_matches_per_value_apply():
+    df = uber_trips(500, seed=4, text=False)
+    df.loc[::50, 'pickup_latitude'] = 120.0
+    df.loc[::70, 'dropoff_longitude'] = -300.0
+    expected = df.copy()
+    for column in COORDINATE_COLUMNS:
+        median = expected[column].median()
+        expected[column] = expected[column].apply(lambda x: x if -90 <= x <= 90 else median)
+    pd.testing.assert_frame_equal(replace_invalid_coordinates(df), expected)
@@ -0,0 +1,100 @@
+# Tests of the out-of-core training mode against the in-memory computations
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_squared_error, r2_score
+
+from uber_out_of_core import (ChunkedForestRegressor, IncrementalLinearRegression, RunningStats,
+                              StreamingRegressionMetrics, train_out_of_core)
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ml_common.synthetic import uber_trips
+
+
+def chunks_of(values, sizes):
+    bounds = np.cumsum([0] + sizes)
+    return [values[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def test_running_stats_match_batch_statistics():
+    rng = np.random.default_rng(0)
+    # A large offset (like pickup_year) is where a naive sum of squares loses precision
+    values = np.column_stack([rng.normal(2012, 1.5, 1000), rng.gamma(2.0, 3.0, 1000), rng.normal(0, 1, 1000)])
+    stats = RunningStats(['year', 'fare', 'noise'])
+    for chunk in chunks_of(values, [1, 250, 0, 499, 250]):
+        stats.update(chunk)
+    assert stats.n == 1000
+    np.testing.assert_allclose(stats.mean, values.mean(axis=0))
+    np.testing.assert_allclose(stats.cov(ddof=1), np.cov(values, rowvar=False))
+    np.testing.assert_allclose(stats.corr().to_numpy(), np.corrcoef(values, rowvar=False))
+
+
+def test_incremental_linear_regression_matches_batch_ols():
+    rng = np.random.default_rng(1)
+    X = np.column_stack([rng.normal(2012, 2, 600), rng.uniform(0, 24, 600), rng.gamma(1.5, 2.2, 600)])
+    y = 3 + 0.1 * X[:, 0] - 0.2 * X[:, 1] + 1.56 * X[:, 2] + rng.normal(0, 0.5, 600)
+    model = IncrementalLinearRegression()
+    for X_chunk, y_chunk in zip(chunks_of(X, [200, 300, 100]), chunks_of(y, [200, 300, 100])):
+        model.partial_fit(X_chunk, y_chunk)
+    reference = LinearRegression().fit(X, y)
+    np.testing.assert_allclose(model.coef_, reference.coef_, rtol=1e-8)
+    np.testing.assert_allclose(model.intercept_, reference.intercept_, rtol=1e-8)
+
+
+def test_streaming_metrics_match_sklearn():
+    rng = np.random.default_rng(2)
+    y_true, y_pred = rng.normal(10, 3, 500), rng.normal(10, 3, 500)
+    metrics = StreamingRegressionMetrics()
+    for true, pred in zip(chunks_of(y_true, [100, 400]), chunks_of(y_pred, [100, 400])):
+        metrics.update(true, pred)
+    assert metrics.r2() == pytest.approx(r2_score(y_true, y_pred))
+    assert metrics.rmse() == pytest.approx(np.sqrt(mean_squared_error(y_true, y_pred)))
+
+
+def test_streaming_metrics_without_rows():
+    metrics = StreamingRegressionMetrics()
+    with pytest.raises(ValueError):
+        metrics.r2()
+    with pytest.raises(ValueError):
+        metrics.rmse()
+    assert np.isnan(StreamingRegressionMetrics().update([5.0, 5.0], np.array([4.0, 6.0])).r2())
+
+
+def test_chunked_forest_keeps_at_most_max_trees():
+    rng = np.random.default_rng(3)
+    X, y = rng.normal(size=(300, 3)), rng.normal(size=300)
+    forest = ChunkedForestRegressor(trees_per_chunk=4, max_trees=6)
+    for X_chunk, y_chunk in zip(chunks_of(X, [100] * 3), chunks_of(y, [100] * 3)):
+        forest.partial_fit(X_chunk, y_chunk)
+    assert forest.n_trees_grown_ == 12
+    assert len(forest.estimators_) == 6
+    assert forest.predict(X[:5]).shape == (5,)
+
+
+@pytest.fixture
+def uber_csv(tmp_path):
+    path = tmp_path / 'uber.csv'
+    uber_trips(3000, seed=7).to_csv(path, index=False)
+    return str(path)
+
+
+def test_train_out_of_core(uber_csv, tmp_path):
+    scratch = tmp_path / 'scratch'
+    scratch.mkdir()
+    linear_model, forest, corr, scores = train_out_of_core(uber_csv, chunksize=700, trees_per_chunk=2,
+                                                           max_trees=5, scratch_dir=str(scratch))
+    assert list(scores['Model']) == ['Linear Regression', 'Random Forest']
+    # The synthetic fare grows linearly with the distance
+    assert scores['R^2 Score'].iloc[0] > 0.8
+    assert corr.loc['fare_amount', 'distance_km'] > 0.8
+    assert len(forest.estimators_) == 5
+    # The spilled chunks are removed afterwards
+    assert os.listdir(scratch) == []
+
+
+def test_train_out_of_core_without_held_out_rows(uber_csv):
+    with pytest.raises(ValueError, match='No held-out rows'):
+        train_out_of_core(uber_csv, chunksize=1000, trees_per_chunk=1, test_size=0.0)
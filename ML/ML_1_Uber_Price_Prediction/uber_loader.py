@@ -0,0 +1,110 @@
+# Chunked streaming loader for uber.csv
+# Reads the file in fixed-size chunks with explicit dtypes and filters each chunk
+# as it arrives, so rejected rows never accumulate in memory.
+import contextlib
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ml_common.datasets import read_cached_csv
+
+# Explicit column dtypes instead of pandas' inferred 64-bit defaults.
+# passenger_count is read as float32 (exact for small integers and NaN-safe)
+# and narrowed to uint8 once the 1..6 filter has been applied.
+COORDINATE_COLUMNS = ['pickup_longitude', 'pickup_latitude', 'dropoff_longitude', 'dropoff_latitude']
+
+
+def uber_dtypes(float_dtype='float64'):
+    """Column dtypes for uber.csv.
+
+    float64 keeps fares and coordinates bit-identical to pd.read_csv;
+    float32 halves their footprint at ~1 m coordinate resolution.
+    """
+    dtypes = {
+        'Unnamed: 0': 'int64',
+        'key': 'object',
+        'fare_amount': float_dtype,
+        'pickup_datetime': 'object',
+        'passenger_count': 'float32',
+    }
+    dtypes.update({column: float_dtype for column in COORDINATE_COLUMNS})
+    return dtypes
+
+
+def parse_datetimes(df):
+    """Convert 'pickup_datetime' to datetime (unparseable values become NaT)."""
+    df['pickup_datetime'] = pd.to_datetime(df['pickup_datetime'], errors='coerce')
+    return df
+
+
+def filter_chunk(chunk):
+    """Apply the pre-processing filters of the in-memory path to one chunk."""
+    # Convert 'pickup_datetime' to datetime (already done for chunks from the cache)
+    if chunk['pickup_datetime'].dtype.kind != 'M':
+        chunk = parse_datetimes(chunk)
+
+    # Drop rows with missing values in 'pickup_datetime' and 'fare_amount'
+    chunk = chunk.dropna(subset=['pickup_datetime', 'fare_amount'])
+
+    # Remove negative and extremely high values in 'fare_amount' and 'passenger_count'
+    chunk = chunk[(chunk['fare_amount'] > 0) & (chunk['fare_amount'] < 100)]
+    chunk = chunk[(chunk['passenger_count'] > 0) & (chunk['passenger_count'] <= 6)]
+    return chunk
+
+
+def _iter_cached_chunks(path, chunksize, float_dtype):
+    # The datetime parsing dominates the load time, so its result is cached too; the cache is
+    # built chunk by chunk like the uncached load
+    raw = read_cached_csv(path, label='uber', transform=parse_datetimes, chunksize=chunksize,
+                          dtype=uber_dtypes(float_dtype))
+    for start in range(0, len(raw), chunksize):
+        yield raw.iloc[start:start + chunksize].copy()
+
+
+def iter_uber_chunks(path="./uber.csv", chunksize=100_000, float_dtype='float64', cache=False):
+    """Yield filtered chunks of uber.csv; empty chunks are skipped.
+
+    With cache=True the raw columns come from the columnar dataset cache
+    (ml_common.datasets) instead of the CSV parser; the numeric columns are
+    memory-mapped and 'pickup_datetime' is stored already parsed.
+    """
+    if cache:
+        reader = contextlib.closing(_iter_cached_chunks(path, chunksize, float_dtype))
+    else:
+        reader = pd.read_csv(path, dtype=uber_dtypes(float_dtype), chunksize=chunksize)
+    with reader as chunks:
+        for chunk in chunks:
+            chunk = filter_chunk(chunk)
+            if len(chunk):
+                yield chunk
+
+
+def replace_invalid_coordinates(df, lat_range=(-90.0, 90.0), lon_range=(-90.0, 90.0)):
+    """Replace out-of-range coordinates with the column median (in place).
+
+    Vectorized version of the per-value apply in the original script; the
+    median is taken over the column before replacement, exactly as before.
+    """
+    for column in COORDINATE_COLUMNS:
+        low, high = lat_range if 'latitude' in column else lon_range
+        values = df[column]
+        out_of_range = ~values.between(low, high)
+        if out_of_range.any():
+            df.loc[out_of_range, column] = values.median()
+    return df
+
+
+def load_uber(path="./uber.csv", chunksize=100_000, float_dtype='float64', cache=False):
+    """Stream uber.csv into a filtered frame.
+
+    Peak memory is one raw chunk plus the rows that survive the filters. With
+    float_dtype='float64' the result equals the in-memory read-then-filter path.
+    """
+    chunks = list(iter_uber_chunks(path, chunksize=chunksize, float_dtype=float_dtype, cache=cache))
+    if not chunks:
+        raise ValueError(f"No rows of {path} survived the pre-processing filters")
+    df = pd.concat(chunks)
+    df['passenger_count'] = df['passenger_count'].astype('uint8')
+    return df
@@ -0,0 +1,317 @@
+# Out-of-core training mode for the Uber fare regressors
+# Streams uber.csv chunk by chunk so the fare history can be far larger than memory.
+#   Pass 1: feature engineering (geodesic distances included) of every chunk, spilled to a
+#           scratch directory, and the running mean / variance of fare_amount and distance_km
+#           for the z-score filter
+#   Pass 2: z-score filter, correlation matrix, incremental linear regression, per-chunk sub-forests
+#   Pass 3: streaming R^2 and RMSE of both models on the held-out rows
+# Passes 2 and 3 read the spilled features back, so the CSV is parsed and every distance is
+# computed only once.
+# Usage: python uber_out_of_core.py [path/to/uber.csv] [chunk_size]
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from uber_distance import trip_distance_km
+from uber_loader import COORDINATE_COLUMNS, iter_uber_chunks
+
+TARGET = 'fare_amount'
+ZSCORE_COLUMNS = ['fare_amount', 'distance_km']
+
+
+class RunningStats:
+    """Streaming mean, variance and covariance of the columns of 2-D chunks.
+
+    Chunks are merged with Chan et al.'s parallel update, which stays
+    numerically stable for features with large offsets such as pickup_year.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.n = 0
+        self.mean = np.zeros(len(self.columns))
+        self.comoment = np.zeros((len(self.columns), len(self.columns)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        n_chunk = len(values)
+        if n_chunk == 0:
+            return self
+        mean_chunk = values.mean(axis=0)
+        centered = values - mean_chunk
+        comoment_chunk = centered.T @ centered
+
+        n_total = self.n + n_chunk
+        delta = mean_chunk - self.mean
+        self.comoment += comoment_chunk + np.outer(delta, delta) * self.n * n_chunk / n_total
+        self.mean += delta * n_chunk / n_total
+        self.n = n_total
+        return self
+
+    def var(self, ddof=0):
+        return np.diag(self.comoment) / (self.n - ddof)
+
+    def std(self, ddof=0):
+        return np.sqrt(self.var(ddof))
+
+    def cov(self, ddof=0):
+        return self.comoment / (self.n - ddof)
+
+    def corr(self):
+        std = np.sqrt(np.diag(self.comoment))
+        corr = self.comoment / np.outer(std, std)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+class IncrementalLinearRegression:
+    """Ordinary least squares fitted chunk by chunk.
+
+    Keeps running means and the (features + target) co-moment matrix, so the
+    solution is the same as LinearRegression on all rows at once.
+    """
+
+    def __init__(self):
+        self.stats = None
+
+    def partial_fit(self, X, y):
+        if self.stats is None:
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object) if hasattr(X, 'columns') else None
+            self.stats = RunningStats(range(np.shape(X)[1] + 1))
+        self.stats.update(np.column_stack([np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.float64)]))
+        self._solve()
+        return self
+
+    def _solve(self):
+        S = self.stats.comoment
+        Sxx, Sxy = S[:-1, :-1], S[:-1, -1]
+        self.coef_ = np.linalg.lstsq(Sxx, Sxy, rcond=None)[0]
+        self.intercept_ = self.stats.mean[-1] - self.stats.mean[:-1] @ self.coef_
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef_ + self.intercept_
+
+
+class ChunkedForestRegressor:
+    """Random forest assembled from sub-forests fitted on individual chunks.
+
+    Each call to partial_fit grows `trees_per_chunk` trees on that chunk only;
+    predictions average over the trees kept so far. Trees are bounded by
+    TREE_DEFAULTS (unless overridden in tree_params), and at most `max_trees`
+    are kept: once the forest is full, every new tree replaces a kept one with
+    reservoir sampling, so the forest stays a uniform sample of the trees
+    grown on all chunks and its size no longer grows with the file.
+    """
+
+    TREE_DEFAULTS = {'max_depth': 20, 'min_samples_leaf': 5}
+
+    def __init__(self, trees_per_chunk=10, max_trees=100, random_state=42, **tree_params):
+        self.trees_per_chunk = trees_per_chunk
+        self.max_trees = max_trees
+        self.random_state = random_state
+        self.tree_params = dict(self.TREE_DEFAULTS, **tree_params)
+        self.estimators_ = []
+        self.n_trees_grown_ = 0
+        self._rng = np.random.default_rng(random_state)
+
+    def partial_fit(self, X, y):
+        sub_forest = RandomForestRegressor(n_estimators=self.trees_per_chunk,
+                                           random_state=self.random_state + self.n_trees_grown_,
+                                           **self.tree_params)
+        sub_forest.fit(np.asarray(X, dtype=np.float32), np.asarray(y))
+        for tree in sub_forest.estimators_:
+            self.n_trees_grown_ += 1
+            if len(self.estimators_) < self.max_trees:
+                self.estimators_.append(tree)
+            else:
+                slot = self._rng.integers(self.n_trees_grown_)
+                if slot < self.max_trees:
+                    self.estimators_[slot] = tree
+        return self
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        prediction = np.zeros(len(X))
+        for tree in self.estimators_:
+            prediction += tree.predict(X)
+        return prediction / len(self.estimators_)
+
+
+class StreamingRegressionMetrics:
+    """R^2 and RMSE accumulated over batches of (y_true, y_pred).
+
+    Both raise a ValueError before any row has been seen; R^2 is NaN when
+    every y_true is the same.
+    """
+
+    def __init__(self):
+        self.sse = 0.0
+        self.y_stats = RunningStats(['y'])
+
+    def update(self, y_true, y_pred):
+        y_true = np.asarray(y_true, dtype=np.float64)
+        self.sse += float(np.sum((y_true - y_pred) ** 2))
+        self.y_stats.update(y_true[:, None])
+        return self
+
+    def _check_rows(self):
+        if self.y_stats.n == 0:
+            raise ValueError("No rows to score: the metrics have not been updated with any row")
+
+    def r2(self):
+        self._check_rows()
+        total = self.y_stats.comoment[0, 0]
+        return 1 - self.sse / total if total > 0 else np.nan
+
+    def rmse(self):
+        self._check_rows()
+        return np.sqrt(self.sse / self.y_stats.n)
+
+
+def prepare_chunk(chunk, distance_method='geodesic'):
+    """Feature engineering of the in-memory script, applied to one chunk.
+
+    Out-of-range coordinates are dropped rather than imputed with the column
+    median, because the exact median needs the whole file in memory.
+    """
+    in_range = np.ones(len(chunk), dtype=bool)
+    for column in COORDINATE_COLUMNS:
+        in_range &= chunk[column].between(-90.0, 90.0).to_numpy()
+    chunk = chunk[in_range].copy()
+
+    chunk['distance_km'] = trip_distance_km(chunk, method=distance_method)
+    chunk = chunk[(chunk['distance_km'] > 0) & (chunk['distance_km'] < 100)].copy()
+
+    chunk['pickup_hour'] = chunk['pickup_datetime'].dt.hour
+    chunk['pickup_day'] = chunk['pickup_datetime'].dt.day
+    chunk['pickup_month'] = chunk['pickup_datetime'].dt.month
+    chunk['pickup_year'] = chunk['pickup_datetime'].dt.year
+    chunk['passenger_count'] = chunk['passenger_count'].astype('uint8')
+    return chunk.drop(['key', 'pickup_datetime'] + COORDINATE_COLUMNS, axis=1)
+
+
+def iter_prepared_chunks(path, chunksize, distance_method='geodesic'):
+    for chunk in iter_uber_chunks(path, chunksize=chunksize):
+        chunk = prepare_chunk(chunk, distance_method=distance_method)
+        if len(chunk):
+            yield chunk
+
+
+class PreparedChunkSpill:
+    """Prepared chunks kept on disk between the streaming passes.
+
+    Each chunk is saved as one float64 .npy array (every prepared column is
+    numeric) in a scratch directory and read back memory-mapped, one chunk at
+    a time. The directory is removed by close().
+    """
+
+    def __init__(self, scratch_dir=None):
+        self._directory = tempfile.TemporaryDirectory(prefix='uber-chunks-', dir=scratch_dir)
+        self.columns = None
+        self.n_chunks = 0
+
+    def append(self, chunk):
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+        np.save(os.path.join(self._directory.name, f'{self.n_chunks}.npy'), chunk.to_numpy(dtype=np.float64))
+        self.n_chunks += 1
+
+    def __iter__(self):
+        for i in range(self.n_chunks):
+            values = np.load(os.path.join(self._directory.name, f'{i}.npy'), mmap_mode='r')
+            yield pd.DataFrame(values, columns=self.columns)
+
+    def close(self):
+        self._directory.cleanup()
+
+
+def iter_filtered_chunks(chunks, zscore_stats):
+    """Prepared chunks with the |z| < 3 outlier filter applied."""
+    mean, std = zscore_stats.mean, zscore_stats.std()
+    for chunk in chunks:
+        z = (chunk[ZSCORE_COLUMNS].to_numpy(dtype=np.float64) - mean) / std
+        chunk = chunk[(np.abs(z) < 3).all(axis=1)]
+        if len(chunk):
+            yield chunk
+
+
+def iter_split_chunks(chunks, zscore_stats, test_size=0.2, random_state=42):
+    """Yield (train, test) parts of each chunk; the split is reproducible across passes."""
+    rng = np.random.default_rng(random_state)
+    for chunk in iter_filtered_chunks(chunks, zscore_stats):
+        is_test = rng.random(len(chunk)) < test_size
+        yield chunk[~is_test], chunk[is_test]
+
+
+def train_out_of_core(path="./uber.csv", chunksize=100_000, trees_per_chunk=10, max_trees=100, test_size=0.2,
+                      random_state=42, distance_method='geodesic', scratch_dir=None):
+    """Run the three streaming passes and return the models, correlation matrix and scores.
+
+    The prepared chunks are spilled to a temporary directory (in scratch_dir,
+    if given) that needs about 64 bytes per row and is removed afterwards.
+    """
+    spill = PreparedChunkSpill(scratch_dir)
+    try:
+        return _train_passes(path, chunksize, spill, trees_per_chunk, max_trees, test_size, random_state,
+                             distance_method)
+    finally:
+        spill.close()
+
+
+def _train_passes(path, chunksize, spill, trees_per_chunk, max_trees, test_size, random_state, distance_method):
+    # Pass 1: prepared features to the spill, running statistics for the z-score outlier filter
+    zscore_stats = RunningStats(ZSCORE_COLUMNS)
+    for chunk in iter_prepared_chunks(path, chunksize, distance_method):
+        zscore_stats.update(chunk[ZSCORE_COLUMNS].to_numpy())
+        spill.append(chunk)
+
+    # Pass 2: correlation matrix and incremental training on the filtered rows
+    corr_stats = None
+    linear_model = IncrementalLinearRegression()
+    random_forest_model = ChunkedForestRegressor(trees_per_chunk=trees_per_chunk, max_trees=max_trees,
+                                                 random_state=random_state)
+    for train, test in iter_split_chunks(spill, zscore_stats, test_size, random_state):
+        if corr_stats is None:
+            corr_stats = RunningStats(train.columns)
+        corr_stats.update(train.to_numpy(dtype=np.float64))
+        corr_stats.update(test.to_numpy(dtype=np.float64))
+        if len(train):
+            X_train, y_train = train.drop(TARGET, axis=1), train[TARGET]
+            linear_model.partial_fit(X_train, y_train)
+            random_forest_model.partial_fit(X_train, y_train)
+
+    if corr_stats is None:
+        raise ValueError(f"No rows of {path} survived the pre-processing filters")
+
+    # Pass 3: evaluate both models on the held-out rows
+    linear_metrics = StreamingRegressionMetrics()
+    forest_metrics = StreamingRegressionMetrics()
+    for _, test in iter_split_chunks(spill, zscore_stats, test_size, random_state):
+        if len(test):
+            X_test, y_test = test.drop(TARGET, axis=1), test[TARGET]
+            linear_metrics.update(y_test, linear_model.predict(X_test))
+            forest_metrics.update(y_test, random_forest_model.predict(X_test))
+    if linear_metrics.y_stats.n == 0:
+        raise ValueError(f"No held-out rows of {path} to score the models on (test_size={test_size})")
+
+    scores = pd.DataFrame({
+        'Model': ['Linear Regression', 'Random Forest'],
+        'R^2 Score': [linear_metrics.r2(), forest_metrics.r2()],
+        'RMSE': [linear_metrics.rmse(), forest_metrics.rmse()],
+    })
+    return linear_model, random_forest_model, corr_stats.corr(), scores
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else "./uber.csv"
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+
+    linear_model, random_forest_model, corr, scores = train_out_of_core(path, chunksize=chunk_size)
+    print("Correlation Matrix:\n")
+    print(corr.round(2))
+    print(f"\nRandom Forest: {len(random_forest_model.estimators_)} of {random_forest_model.n_trees_grown_} trees "
+          f"grown on per-chunk sub-forests\n")
+    print(scores.to_string(index=False))
@@ -1,107 +1,228 @@
 # Step 1: Import the required libraries
+import os
+import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.svm import SVC
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-from sklearn.decomposition import PCA
+from spam_sparse import load_sparse_emails, memory_report
+
+# Shared helpers live in ML/ml_common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ml_common.compaction import MemoryReport
+from ml_common.evaluation import Evaluator
+from ml_common.datasets import dataset_path, load_dataset
+from ml_common.figures import FigureRenderer
+from ml_common.lazy import lazy_import
+from ml_common.model_cache import ModelCache
+from ml_common.scoring import BlockScorer
+from ml_common.tracing import StageTrace
+
+# The plotting libraries load when the first figure is drawn, and scikit-learn in the stages
+# that use it, so the dataset diagnostics print without waiting for them
+plt = lazy_import('matplotlib.pyplot')
+sns = lazy_import('seaborn')
+
+# Wall time, CPU time, peak memory and row counts of every stage go to a JSON trace
+trace = StageTrace('ML_2_Email_Spam_Classification')
+# Figures are shown, saved in the background or skipped depending on $ML_FIGURES (see ml_common/figures.py)
+figures = FigureRenderer('ML_2_Email_Spam_Classification')
+# Memory saved by compact dtypes is printed when the script ends
+memory = MemoryReport('ML_2_Email_Spam_Classification')
+
+# Sparse mode keeps the mostly-zero word counts in a CSR matrix from loading to prediction
+use_sparse = True
 
 # Step 2: Load the dataset
-# Replace 'emails.csv' with the path to the dataset file.
-df = pd.read_csv("emails.csv")
+trace.stage("Step 2: Load the dataset")
+# emails.csv is found through the dataset registry (ml_common.datasets) and read from the
+# columnar cache after the first run
+if use_sparse:
+    email_ids, X, y, feature_names = load_sparse_emails(dataset_path('emails'), cache=True)
+    df = pd.DataFrame({'Email No.': email_ids, 'Prediction': y})
+else:
+    df = load_dataset('emails')
+# Word counts and labels are small non-negative integers: one or two bytes instead of eight
+df = memory.compact(df, "Email table")
+trace.rows(len(df))
 
 # Step 3: Data Exploration
-print("Dataset Shape:", df.shape)
-print("Dataset Sample:\n", df.head())
-
-# Check for missing values
-print("Missing values:\n", df.isnull().sum().sum())
+trace.stage("Step 3: Data Exploration")
+if use_sparse:
+    print("Dataset Shape:", (X.shape[0], X.shape[1] + 2))
+    print(memory_report(X))
+    print("Dataset Sample:\n", df.head())
+    print("Missing values:\n", int(np.isnan(X.data).sum()))
+else:
+    print("Dataset Shape:", df.shape)
+    print("Dataset Sample:\n", df.head())
+
+    # Check for missing values
+    print("Missing values:\n", df.isnull().sum().sum())
 
 # Step 4: Data Preprocessing
-# Dropping the first column as it is just an email identifier
-df.drop(df.columns[0], axis=1, inplace=True)
+trace.stage("Step 4: Data Preprocessing")
+if not use_sparse:
+    # Dropping the first column as it is just an email identifier
+    df.drop(df.columns[0], axis=1, inplace=True)
 
-# Separate features and target variable
-X = df.iloc[:, :-1]
-y = df.iloc[:, -1]
+    # Separate features and target variable
+    X = df.iloc[:, :-1]
+    y = df.iloc[:, -1]
 
 # Step 5: Train-Test Split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
+trace.stage("Step 5: Train-Test Split")
+from sklearn.model_selection import train_test_split
+
+# The row positions are split along, so the test predictions can be placed back into the full table
+X_train, X_test, y_train, y_test, _, test_rows = train_test_split(X, y, np.arange(X.shape[0]),
+                                                          test_size=0.3, random_state=42)
+trace.rows(X_train.shape[0])
+
+# Every prediction goes through the evaluator, which runs each model on each input only once
+evaluator = Evaluator()
 
 # Step 6: Feature Scaling
-scaler = StandardScaler()
+trace.stage("Step 6: Feature Scaling")
+from sklearn.preprocessing import StandardScaler
+
+# Centering would densify the sparse matrix, so sparse mode only scales to unit variance
+scaler = StandardScaler(with_mean=not use_sparse)
 X_train_scaled = scaler.fit_transform(X_train)
 X_test_scaled = scaler.transform(X_test)
 
 # Step 7: Dimensionality Reduction for Visualization
-# Reduce dimensions to 2 for plotting using PCA
-pca = PCA(n_components=2)
-X_train_pca = pca.fit_transform(X_train_scaled)
-X_test_pca = pca.transform(X_test_scaled)
-
-# Visualizing the data distribution after PCA
-plt.figure(figsize=(10, 6))
-sns.scatterplot(x=X_train_pca[:, 0], y=X_train_pca[:, 1], hue=y_train, palette="coolwarm", s=60)
-plt.title("Data Distribution After PCA")
-plt.xlabel("PCA Component 1")
-plt.ylabel("PCA Component 2")
-plt.show()
+trace.stage("Step 7: Dimensionality Reduction for Visualization")
+# The reduction only serves the plot, so it runs with it: in the figure worker, or not at all
+# when figures are off. At most figures.point_budget of the projected emails are drawn.
+def plot_reduction(X_train_scaled, y_train):
+    from sklearn.decomposition import PCA, TruncatedSVD
+
+    # Reduce dimensions to 2 for plotting (TruncatedSVD works on sparse input, PCA needs dense data)
+    reducer_name = "SVD" if use_sparse else "PCA"
+    reducer = TruncatedSVD(n_components=2, random_state=42) if use_sparse else PCA(n_components=2)
+    X_train_pca, y_plotted = figures.sample(reducer.fit_transform(X_train_scaled), y_train)
+
+    # Visualizing the data distribution after the reduction
+    plt.figure(figsize=(10, 6))
+    sns.scatterplot(x=X_train_pca[:, 0], y=X_train_pca[:, 1], hue=y_plotted, palette="coolwarm", s=60)
+    plt.title(f"Data Distribution After {reducer_name}")
+    plt.xlabel(f"{reducer_name} Component 1")
+    plt.ylabel(f"{reducer_name} Component 2")
+
+
+figures.render('reduction', plot_reduction, X_train_scaled, y_train)
 
 # Step 8: Model Training and Evaluation - KNN
-knn = KNeighborsClassifier(n_neighbors=5)
+trace.stage("Step 8: Model Training and Evaluation - KNN")
+from sklearn.neighbors import KNeighborsClassifier
+from spam_ann import ApproximateKNeighborsClassifier, recall_at_k
+
+# KNN and the linear SVM both accept the CSR matrices directly
+# 'exact' is brute-force KNN, 'lsh' uses the random-projection LSH index from spam_ann
+knn_backend = 'exact'
+if knn_backend == 'lsh':
+    knn = ApproximateKNeighborsClassifier(n_neighbors=5)
+else:
+    knn = KNeighborsClassifier(n_neighbors=5)
 knn.fit(X_train_scaled, y_train)
-y_pred_knn = knn.predict(X_test_scaled)
+knn_result = evaluator.evaluate(knn, X_test_scaled, y_test, name="K-Nearest Neighbors")
+
+# Check the approximate neighbours against exact KNN on a sample of test rows
+if knn_backend == 'lsh':
+    X_sample = X_test_scaled[:200]
+    exact_knn = KNeighborsClassifier(n_neighbors=5).fit(X_train_scaled, y_train)
+    recall = recall_at_k(knn.kneighbors(X_sample)[1], exact_knn.kneighbors(X_sample)[1])
+    print(f"LSH recall@5 vs exact KNN (200 test rows): {recall:.3f}")
 
 # Step 9: Model Training and Evaluation - SVM
-svm = SVC(kernel='linear', random_state=42)
-svm.fit(X_train_scaled, y_train)
-y_pred_svm = svm.predict(X_test_scaled)
+trace.stage("Step 9: Model Training and Evaluation - SVM")
+from sklearn.svm import SVC
+from spam_online import OnlineSpamClassifier, iter_batches
+
+# 'batch' fits SVC (or loads the fit cached for the same training data and hyperparameters);
+# 'online' streams mini-batches into a linear SVM trained with partial_fit, updating its own
+# scaler statistics as it goes (it takes unscaled input)
+svm_mode = 'batch'
+if svm_mode == 'online':
+    svm = OnlineSpamClassifier(classes=np.unique(y), snapshot_every=5)
+    for X_batch, y_batch in iter_batches(X_train, y_train, batch_size=256):
+        svm.partial_fit(X_batch, y_batch)
+        if svm.snapshots and svm.snapshots[-1].n_batches == svm.n_batches_:
+            snapshot = svm.snapshots[-1]
+            print(f"Snapshot after {snapshot.n_samples} emails: "
+                  f"accuracy {evaluator.evaluate(snapshot, X_test, y_test).accuracy:.4f}")
+    # Report against the latest snapshot of the live model, which scales its own input
+    svm_model, svm_test_input = svm.latest_snapshot(), X_test
+else:
+    svm = ModelCache().fit_or_load(SVC(kernel='linear', random_state=42), X_train_scaled, y_train)
+    svm_model, svm_test_input = svm, X_test_scaled
+svm_result = evaluator.evaluate(svm_model, svm_test_input, y_test, name="Support Vector Machine")
 
 # Step 10: Performance Analysis
+trace.stage("Step 10: Performance Analysis")
 
-# Function to display performance metrics
-def display_metrics(y_true, y_pred, model_name):
-    print(f"--- {model_name} ---")
-    print("Accuracy:", accuracy_score(y_true, y_pred))
-    print("Classification Report:\n", classification_report(y_true, y_pred))
-    cm = confusion_matrix(y_true, y_pred)
+# Function to display performance metrics from a cached evaluation result
+def display_metrics(result):
+    print(f"--- {result.name} ---")
+    print("Accuracy:", result.accuracy)
+    print("Classification Report:\n", result.classification_report)
+    figures.render(f"confusion_matrix_{result.name.replace(' ', '_').lower()}", plot_confusion_matrix,
+                   result.name, result.confusion_matrix)
+
+
+def plot_confusion_matrix(name, confusion_matrix):
     plt.figure(figsize=(6, 4))
-    sns.heatmap(cm, annot=True, fmt="d", cmap="YlGnBu", cbar=False, xticklabels=['Not Spam', 'Spam'], yticklabels=['Not Spam', 'Spam'])
-    plt.title(f"{model_name} Confusion Matrix")
+    sns.heatmap(confusion_matrix, annot=True, fmt="d", cmap="YlGnBu", cbar=False, xticklabels=['Not Spam', 'Spam'], yticklabels=['Not Spam', 'Spam'])
+    plt.title(f"{name} Confusion Matrix")
     plt.xlabel("Predicted Label")
     plt.ylabel("True Label")
-    plt.show()
 
 # Display metrics for KNN
-display_metrics(y_test, y_pred_knn, "K-Nearest Neighbors")
+display_metrics(knn_result)
 
 # Display metrics for SVM
-display_metrics(y_test, y_pred_svm, "Support Vector Machine")
+display_metrics(svm_result)
 
 # Step 11: Compare Model Performance Using a Bar Chart
-knn_accuracy = accuracy_score(y_test, y_pred_knn)
-svm_accuracy = accuracy_score(y_test, y_pred_svm)
+trace.stage("Step 11: Compare Model Performance Using a Bar Chart")
+# The accuracies were already computed by display_metrics and are reused here
+knn_accuracy = knn_result.accuracy
+svm_accuracy = svm_result.accuracy
 model_names = ['K-Nearest Neighbors', 'Support Vector Machine']
 accuracies = [knn_accuracy, svm_accuracy]
 
-plt.figure(figsize=(8, 5))
-sns.barplot(x=model_names, y=accuracies, palette="viridis")
-plt.title("Comparison of Model Accuracies")
-plt.xlabel("Model")
-plt.ylabel("Accuracy")
-plt.ylim(0, 1)
-plt.show()
+def plot_accuracies(model_names, accuracies):
+    plt.figure(figsize=(8, 5))
+    sns.barplot(x=model_names, y=accuracies, palette="viridis")
+    plt.title("Comparison of Model Accuracies")
+    plt.xlabel("Model")
+    plt.ylabel("Accuracy")
+    plt.ylim(0, 1)
 
-# Step 12: Add Predictions to the Original DataFrame
 
-# Compute predictions on the entire dataset (scaled)
-X_scaled = scaler.transform(X)  # Scaling the full feature set for consistency
-df['KNN_Prediction'] = knn.predict(X_scaled)
-df['SVM_Prediction'] = svm.predict(X_scaled)
+figures.render('accuracies', plot_accuracies, model_names, accuracies)
+
+# Step 12: Add Predictions to the Original DataFrame
+trace.stage("Step 12: Add Predictions to the Original DataFrame")
+
+# Both models score the rest of X block by block in one pass: each block is scaled once and
+# predicted by KNN and the SVM, so no scaled copy of the full matrix is made, and the predictions
+# go into arrays allocated once for all emails (streamed to $ML_SCORE_DIR when it is set, see
+# ml_common/scoring.py). The test rows are not scored again: their predictions come from the
+# evaluation results of Steps 8 and 9.
+# (blocks of 2048 emails keep KNN's block-to-training-set distance matrix small)
+scorer = BlockScorer('ML_2_Email_Spam_Classification', block_rows=2048)
+test_predictions = (test_rows, {'KNN_Prediction': knn_result.y_pred, 'SVM_Prediction': svm_result.y_pred})
+if svm_mode == 'online':
+    # The online snapshot scales its own input, so only KNN's blocks go through the scaler
+    predictions = scorer.score(X, {'KNN_Prediction': lambda block: knn.predict(scaler.transform(block)),
+                                   'SVM_Prediction': svm_model}, known=test_predictions)
+else:
+    predictions = scorer.score(X, {'KNN_Prediction': knn, 'SVM_Prediction': svm_model},
+                               transform=scaler.transform, known=test_predictions)
+df['KNN_Prediction'] = predictions['KNN_Prediction']
+df['SVM_Prediction'] = predictions['SVM_Prediction']
+
+trace.rows(len(df))
 
 # Display the updated DataFrame with predictions
 print("Updated DataFrame with Predictions:")
@@ -0,0 +1,55 @@
+# Benchmark: LSH approximate KNN vs exact KNeighborsClassifier
+# Reports recall@k and queries per second as the corpus grows (emails.csv has about 5k rows).
+# Usage: python benchmark_ann.py [corpus_size ...]
+import sys
+import time
+
+import numpy as np
+from scipy import sparse
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.preprocessing import StandardScaler
+
+from spam_ann import ApproximateKNeighborsClassifier, recall_at_k
+
+N_FEATURES = 3000
+N_QUERIES = 500
+K = 5
+
+
+# Word-count matrix with topic structure, so that nearest neighbours are meaningful
+def make_corpus(n_rows, n_topics=200, seed=42):
+    rng = np.random.default_rng(seed)
+    topic_rates = rng.gamma(0.05, 4.0, (n_topics, N_FEATURES))
+    topics = rng.integers(0, n_topics, n_rows)
+    counts = rng.poisson(topic_rates[topics])
+    labels = (topics % 3 == 0).astype(int)
+    return sparse.csr_matrix(counts.astype(np.float32)), labels
+
+
+def queries_per_second(func, n_queries):
+    start = time.perf_counter()
+    result = func()
+    return result, n_queries / (time.perf_counter() - start)
+
+
+def run(n_rows):
+    X, y = make_corpus(n_rows + N_QUERIES)
+    X = StandardScaler(with_mean=False).fit_transform(X)
+    X_train, y_train, X_query = X[:n_rows], y[:n_rows], X[n_rows:]
+
+    exact = KNeighborsClassifier(n_neighbors=K).fit(X_train, y_train)
+    approx = ApproximateKNeighborsClassifier(n_neighbors=K).fit(X_train, y_train)
+
+    (_, exact_idx), exact_qps = queries_per_second(lambda: exact.kneighbors(X_query), N_QUERIES)
+    (_, approx_idx), approx_qps = queries_per_second(lambda: approx.kneighbors(X_query), N_QUERIES)
+    agreement = np.mean(exact.predict(X_query) == approx.predict(X_query))
+
+    print(f"{n_rows:>9} {exact_qps:>12.0f} {approx_qps:>12.0f} {approx_qps / exact_qps:>8.1f}x "
+          f"{recall_at_k(approx_idx, exact_idx):>10.3f} {agreement:>10.3f}")
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [2_000, 5_000, 8_000, 32_000]
+    print(f"{'corpus':>9} {'exact q/s':>12} {'lsh q/s':>12} {'speedup':>9} {f'recall@{K}':>10} {'agreement':>10}")
+    for n in sizes:
+        run(n)
@@ -0,0 +1,215 @@
+# Approximate nearest-neighbour backend for KNN spam scoring
+# Random-projection LSH in NumPy: several hash tables bucket the training rows by
+# the signs of random projections, and each query is re-ranked exactly against
+# the rows that share a bucket with it in any table. Queries are processed in blocks:
+# the bucket ranges of a block are expanded into one flat list of (query, candidate)
+# pairs, their distances computed from one batched gather of the candidate rows and the
+# nearest picked from a padded (queries x candidates) matrix. The only Python loop left
+# runs once per query of a block (not per pair), to shift a sparse query's candidate
+# rows into their own column range for one matrix-vector product; that in-place shift of
+# contiguous ranges is about twice as fast as a per-stored-value gather without a loop.
+import numpy as np
+from scipy import sparse
+
+# Queries re-ranked together; bounds the (query, candidate) pairs held at once
+QUERY_BLOCK = 256
+# Training rows projected at once by fit(), and rows sampled for the hash thresholds
+FIT_BLOCK = 16_384
+THRESHOLD_SAMPLE = 8_192
+
+
+def _row_sq_norms(X):
+    if sparse.issparse(X):
+        return np.asarray(X.multiply(X).sum(axis=1)).ravel()
+    return np.einsum('ij,ij->i', X, X)
+
+
+def _dense_rows(X):
+    return X.toarray() if sparse.issparse(X) else np.asarray(X)
+
+
+class RandomProjectionLSH:
+    """Random-projection LSH index with exact re-ranking of the candidates.
+
+    Each of the `n_tables` tables hashes a row to `n_bits` bits, one per random
+    direction, thresholded at the median training projection so buckets stay
+    balanced. More tables raise recall, more bits shrink the candidate sets.
+    With n_bits=None the bit count grows with log2 of the corpus size so that
+    buckets hold about `bucket_size` rows each, which keeps query cost roughly
+    flat as the corpus grows. Many tables of small buckets keep the recall of
+    a few large ones with far fewer candidates to re-rank. Works on dense
+    arrays and scipy.sparse matrices.
+    """
+
+    def __init__(self, n_tables=48, n_bits=None, bucket_size=2, random_state=42):
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.bucket_size = bucket_size
+        self.random_state = random_state
+
+    def fit(self, X):
+        X = X.tocsr() if sparse.issparse(X) else np.asarray(X, dtype=np.float32)
+        n_train = X.shape[0]
+        self.n_bits_ = self.n_bits or int(np.clip(np.log2(max(n_train / self.bucket_size, 2)), 1, 62))
+        rng = np.random.default_rng(self.random_state)
+        self.planes_ = rng.standard_normal((X.shape[1], self.n_tables * self.n_bits_)).astype(np.float32)
+        code_dtype = np.int32 if self.n_bits_ < 31 else np.int64
+        if n_train <= THRESHOLD_SAMPLE:
+            projections = _dense_rows(X @ self.planes_)
+            self.offsets_ = np.median(projections, axis=0)
+            codes = self._hash(projections).astype(code_dtype)
+        else:
+            # Thresholds from a sample of the rows, which are then hashed block by block, so
+            # their projections are never all held at once
+            sample = np.sort(rng.choice(n_train, THRESHOLD_SAMPLE, replace=False))
+            self.offsets_ = np.median(_dense_rows(X[sample] @ self.planes_), axis=0)
+            codes = np.empty((n_train, self.n_tables), dtype=code_dtype)
+            for start in range(0, n_train, FIT_BLOCK):
+                codes[start:start + FIT_BLOCK] = self._hash(_dense_rows(X[start:start + FIT_BLOCK] @ self.planes_))
+
+        # One sorted code array per table; a bucket is a contiguous range of it
+        self.order_ = np.empty((self.n_tables, n_train), dtype=np.int32 if n_train < 2 ** 31 else np.int64)
+        self.sorted_codes_ = np.empty((self.n_tables, n_train), dtype=codes.dtype)
+        for t in range(self.n_tables):
+            self.order_[t] = np.argsort(codes[:, t], kind='stable')
+            self.sorted_codes_[t] = codes[self.order_[t], t]
+        self._X = X
+        self._sq_norms = _row_sq_norms(X)
+        return self
+
+    def _hash(self, projections):
+        bits = (projections > self.offsets_).reshape(len(projections), self.n_tables, self.n_bits_)
+        codes = np.zeros((len(projections), self.n_tables), dtype=np.int64)
+        for bit in range(self.n_bits_):
+            codes |= bits[:, :, bit].astype(np.int64) << bit
+        return codes
+
+    def _candidate_pairs(self, X):
+        """(query, candidate) index pairs, unique and sorted by query then candidate."""
+        codes = self._hash(_dense_rows(X @ self.planes_))
+        n_queries, n_train = codes.shape[0], self._X.shape[0]
+        starts = np.empty(codes.shape, dtype=np.int64)
+        stops = np.empty(codes.shape, dtype=np.int64)
+        for t in range(self.n_tables):
+            starts[:, t] = np.searchsorted(self.sorted_codes_[t], codes[:, t], side='left')
+            stops[:, t] = np.searchsorted(self.sorted_codes_[t], codes[:, t], side='right')
+        # Expand every bucket range into positions of the flattened (table, rank) order array
+        lengths = (stops - starts).ravel()
+        first = (starts + np.arange(self.n_tables) * n_train).ravel()
+        offsets = np.cumsum(lengths) - lengths
+        positions = np.repeat(first - offsets, lengths) + np.arange(lengths.sum())
+        queries = np.repeat(np.arange(n_queries), self.n_tables)
+        keys = np.repeat(queries, lengths) * n_train + self.order_.ravel()[positions]
+        keys.sort()
+        keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])] if len(keys) else keys
+        return keys // n_train, keys % n_train
+
+    def candidates(self, X):
+        """Candidate training rows for each query row (list of index arrays)."""
+        query_ids, cands = self._candidate_pairs(X)
+        return np.split(cands, np.searchsorted(query_ids, np.arange(1, X.shape[0])))
+
+    def _pair_dots(self, X, query_ids, cands):
+        """Dot product of query row query_ids[j] with training row cands[j], for every j.
+
+        query_ids must be sorted, so the candidates of each query are contiguous.
+        """
+        queries = _dense_rows(X)
+        if not sparse.issparse(self._X):
+            return np.einsum('ij,ij->i', self._X[cands], queries[query_ids])
+        # Shift the gathered training rows of query i into columns [i * d, (i + 1) * d), so one
+        # sparse matrix-vector product with the concatenated queries gives all the dots
+        rows = self._X[cands]
+        # int32 indices validate and multiply faster, as long as neither the shifted column
+        # indices nor the row pointers (up to the number of stored values) overflow them
+        index_dtype = np.int32 if max(queries.size, rows.nnz) < np.iinfo(np.int32).max else np.int64
+        # The gathered rows are a copy, so their column indices can be shifted in place
+        indices = rows.indices.astype(index_dtype, copy=False)
+        bounds = rows.indptr[np.searchsorted(query_ids, np.arange(len(queries) + 1))]
+        for i in range(1, len(queries)):
+            indices[bounds[i]:bounds[i + 1]] += i * queries.shape[1]
+        shifted = sparse.csr_matrix((rows.data, indices, rows.indptr.astype(index_dtype, copy=False)),
+                                    shape=(len(cands), queries.size))
+        return shifted @ queries.ravel()
+
+    def _kneighbors_block(self, X, query_sq_norms, n_neighbors):
+        n_queries = X.shape[0]
+        query_ids, cands = self._candidate_pairs(X)
+        sq_dist = self._sq_norms[cands] + query_sq_norms[query_ids] - 2 * self._pair_dots(X, query_ids, cands)
+        np.maximum(sq_dist, 0.0, out=sq_dist)
+
+        # Candidates of query i fill row i of a padded matrix; the padding never wins
+        counts = np.bincount(query_ids, minlength=n_queries)
+        width = max(int(counts.max(initial=0)), n_neighbors)
+        column = np.arange(len(cands)) - np.repeat(np.cumsum(counts) - counts, counts)
+        padded_dist = np.full((n_queries, width), np.inf)
+        padded_idx = np.zeros((n_queries, width), dtype=np.int64)
+        padded_dist[query_ids, column] = sq_dist
+        padded_idx[query_ids, column] = cands
+
+        nearest = np.argpartition(padded_dist, n_neighbors - 1, axis=1)[:, :n_neighbors]
+        distances = np.take_along_axis(padded_dist, nearest, axis=1)
+        indices = np.take_along_axis(padded_idx, nearest, axis=1)
+
+        # Queries with fewer than n_neighbors candidates are scanned against the whole index
+        scan = np.flatnonzero(counts < n_neighbors)
+        if len(scan):
+            full_dist = self._sq_norms[None, :] + query_sq_norms[scan, None] - 2 * _dense_rows(X[scan] @ self._X.T)
+            nearest = np.argpartition(np.maximum(full_dist, 0.0), n_neighbors - 1, axis=1)[:, :n_neighbors]
+            distances[scan] = np.maximum(np.take_along_axis(full_dist, nearest, axis=1), 0.0)
+            indices[scan] = nearest
+
+        ranked = np.argsort(distances, axis=1, kind='stable')
+        return np.sqrt(np.take_along_axis(distances, ranked, axis=1)), np.take_along_axis(indices, ranked, axis=1)
+
+    def kneighbors(self, X, n_neighbors=5):
+        """Distances and indices of the approximate nearest training rows.
+
+        Queries whose candidate set is smaller than n_neighbors fall back to
+        an exact scan of the whole index.
+        """
+        X = X.tocsr() if sparse.issparse(X) else np.asarray(X, dtype=np.float32)
+        query_sq_norms = _row_sq_norms(X)
+        distances = np.empty((X.shape[0], n_neighbors))
+        indices = np.empty((X.shape[0], n_neighbors), dtype=np.int64)
+        for start in range(0, X.shape[0], QUERY_BLOCK):
+            stop = min(start + QUERY_BLOCK, X.shape[0])
+            distances[start:stop], indices[start:stop] = self._kneighbors_block(
+                X[start:stop], query_sq_norms[start:stop], n_neighbors)
+        return distances, indices
+
+
+class ApproximateKNeighborsClassifier:
+    """Drop-in replacement for KNeighborsClassifier backed by RandomProjectionLSH.
+
+    Uniform majority vote over the approximate neighbours; ties go to the
+    smallest class label, as in scikit-learn.
+    """
+
+    def __init__(self, n_neighbors=5, n_tables=48, n_bits=None, bucket_size=2, random_state=42):
+        self.n_neighbors = n_neighbors
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.bucket_size = bucket_size
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        self.classes_, self._y = np.unique(np.asarray(y), return_inverse=True)
+        self.index_ = RandomProjectionLSH(self.n_tables, self.n_bits, self.bucket_size, self.random_state).fit(X)
+        return self
+
+    def kneighbors(self, X, n_neighbors=None):
+        return self.index_.kneighbors(X, n_neighbors or self.n_neighbors)
+
+    def predict(self, X):
+        _, indices = self.kneighbors(X)
+        votes = np.zeros((len(indices), len(self.classes_)), dtype=np.int64)
+        np.add.at(votes, (np.repeat(np.arange(len(indices)), indices.shape[1]), self._y[indices].ravel()), 1)
+        return self.classes_[votes.argmax(axis=1)]
+
+
+def recall_at_k(approx_indices, exact_indices):
+    """Fraction of the exact k nearest neighbours that the approximate search found."""
+    approx_indices, exact_indices = np.asarray(approx_indices), np.asarray(exact_indices)
+    hits = sum(len(np.intersect1d(a, e)) for a, e in zip(approx_indices, exact_indices))
+    return hits / exact_indices.size
@@ -0,0 +1,90 @@
+# Online spam classifier updated with mini-batches
+# A linear SVM (hinge-loss SGD) and the scaler statistics are both updated with
+# partial_fit as new labelled emails arrive, so nothing is retrained from scratch.
+# Frozen snapshots of the live model are kept for reporting.
+import copy
+from collections import deque
+
+import numpy as np
+from scipy import sparse
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+from spam_sparse import iter_sparse_emails
+
+
+class ModelSnapshot:
+    """Frozen copy of the scaler and model after a given number of batches."""
+
+    def __init__(self, scaler, model, n_batches, n_samples):
+        self.scaler = scaler
+        self.model = model
+        self.n_batches = n_batches
+        self.n_samples = n_samples
+
+    def predict(self, X):
+        return self.model.predict(self.scaler.transform(X))
+
+
+class OnlineSpamClassifier:
+    """Streaming linear SVM with incrementally updated scaling.
+
+    Inputs are raw (unscaled) word counts; the internal StandardScaler is
+    updated with every batch. Sparse input is scaled without centering so it
+    stays sparse. Every `snapshot_every` batches a snapshot is appended to
+    `snapshots`, which keeps the most recent `max_snapshots` of them.
+    """
+
+    def __init__(self, classes=(0, 1), alpha=1e-4, snapshot_every=10, max_snapshots=5, random_state=42):
+        self.classes = np.asarray(classes)
+        self.snapshot_every = snapshot_every
+        self.model = SGDClassifier(loss='hinge', alpha=alpha, random_state=random_state)
+        self.scaler = None
+        self.snapshots = deque(maxlen=max_snapshots)
+        self.n_batches_ = 0
+        self.n_samples_seen_ = 0
+
+    def partial_fit(self, X, y):
+        if self.scaler is None:
+            self.scaler = StandardScaler(with_mean=not sparse.issparse(X))
+        self.scaler.partial_fit(X)
+        self.model.partial_fit(self.scaler.transform(X), y, classes=self.classes)
+        self.n_batches_ += 1
+        self.n_samples_seen_ += X.shape[0]
+        if self.n_batches_ % self.snapshot_every == 0:
+            self.take_snapshot()
+        return self
+
+    def take_snapshot(self):
+        snapshot = ModelSnapshot(copy.deepcopy(self.scaler), copy.deepcopy(self.model),
+                                 self.n_batches_, self.n_samples_seen_)
+        self.snapshots.append(snapshot)
+        return snapshot
+
+    def latest_snapshot(self):
+        """Most recent snapshot, taking one now if the live model is ahead of it."""
+        if not self.snapshots or self.snapshots[-1].n_batches != self.n_batches_:
+            self.take_snapshot()
+        return self.snapshots[-1]
+
+    def predict(self, X):
+        return self.model.predict(self.scaler.transform(X))
+
+    def fit_stream(self, batches):
+        """Consume an iterable of (X, y) mini-batches."""
+        for X, y in batches:
+            self.partial_fit(X, y)
+        return self
+
+
+def iter_batches(X, y, batch_size=256):
+    """Split in-memory data into (X, y) mini-batches, in order."""
+    y = np.asarray(y)
+    for start in range(0, X.shape[0], batch_size):
+        yield X[start:start + batch_size], y[start:start + batch_size]
+
+
+def iter_csv_batches(path="emails.csv", batch_size=256):
+    """Mini-batches of (X, y) read from a CSV of new labelled emails as CSR."""
+    for _, X, y, _ in iter_sparse_emails(path, chunksize=batch_size):
+        yield X, y
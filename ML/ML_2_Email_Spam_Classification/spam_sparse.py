@@ -0,0 +1,66 @@
+# Sparse loading helpers for the email spam word-count matrix
+# emails.csv has one identifier column, thousands of mostly-zero word-count
+# columns and the label in the last column.
+import contextlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ml_common.datasets import read_cached_csv
+
+
+def _iter_cached_chunks(path, chunksize):
+    raw = read_cached_csv(path, label='emails', chunksize=chunksize)
+    for start in range(0, len(raw), chunksize):
+        yield raw.iloc[start:start + chunksize]
+
+
+def iter_sparse_emails(path="emails.csv", chunksize=1000, dtype=np.float32, cache=False):
+    """Yield (email_ids, X, y, feature_names) per chunk of emails.csv, X as CSR.
+
+    With cache=True the word counts are read from the memory-mapped columnar
+    dataset cache (ml_common.datasets) instead of being parsed from the CSV.
+    """
+    if cache:
+        reader = contextlib.closing(_iter_cached_chunks(path, chunksize))
+    else:
+        reader = pd.read_csv(path, chunksize=chunksize)
+    with reader as chunks:
+        for chunk in chunks:
+            X = sparse.csr_matrix(chunk.iloc[:, 1:-1].to_numpy(dtype=dtype))
+            yield chunk.iloc[:, 0].to_numpy(), X, chunk.iloc[:, -1].to_numpy(), np.asarray(chunk.columns[1:-1])
+
+
+def load_sparse_emails(path="emails.csv", chunksize=1000, dtype=np.float32, cache=False):
+    """Read emails.csv straight into a CSR matrix, one chunk at a time.
+
+    Returns (email_ids, X, y, feature_names) where X is a scipy.sparse CSR
+    matrix of word counts and y the label array. Only one dense chunk is held
+    in memory at any time.
+    """
+    ids, blocks, labels = [], [], []
+    feature_names = None
+    for chunk_ids, X, y, feature_names in iter_sparse_emails(path, chunksize, dtype, cache):
+        ids.append(chunk_ids)
+        blocks.append(X)
+        labels.append(y)
+    X = sparse.vstack(blocks, format='csr')
+    return np.concatenate(ids), X, np.concatenate(labels), feature_names
+
+
+def sparse_nbytes(X):
+    """Memory used by a CSR/CSC matrix (data + indices + index pointer)."""
+    return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+
+
+def memory_report(X):
+    """Compare the CSR footprint with the dense float64 frame it replaces."""
+    dense = X.shape[0] * X.shape[1] * np.dtype(np.float64).itemsize
+    stored = sparse_nbytes(X)
+    density = X.nnz / (X.shape[0] * X.shape[1])
+    return (f"Sparse matrix: {X.shape}, density {density:.2%}, "
+            f"{stored / 2 ** 20:.1f} MiB vs {dense / 2 ** 20:.1f} MiB dense ({dense / stored:.1f}x smaller)")
@@ -0,0 +1,77 @@
+# Tests of the LSH nearest-neighbour backend against exact search
+import numpy as np
+import pytest
+from sklearn.neighbors import KNeighborsClassifier, NearestNeighbors
+from sklearn.preprocessing import StandardScaler
+
+from benchmark_ann import make_corpus
+from spam_ann import ApproximateKNeighborsClassifier, RandomProjectionLSH, recall_at_k
+
+
+@pytest.fixture(scope='module')
+def corpus():
+    X, y = make_corpus(2300)
+    X = StandardScaler(with_mean=False).fit_transform(X).astype(np.float32)
+    return X[:2000], y[:2000], X[2000:], y[2000:]
+
+
+def test_recall_against_exact_search(corpus):
+    X_train, _, X_query, _ = corpus
+    _, exact = NearestNeighbors(n_neighbors=5).fit(X_train).kneighbors(X_query)
+    distances, approx = RandomProjectionLSH().fit(X_train).kneighbors(X_query, 5)
+    assert recall_at_k(approx, exact) > 0.9
+    # Distances are exact for the neighbours found, in increasing order
+    found = np.linalg.norm(X_query.toarray()[:, None, :] - X_train[approx.ravel()].toarray().reshape(*approx.shape, -1),
+                           axis=2)
+    np.testing.assert_allclose(distances, found, rtol=1e-4, atol=1e-3)
+    assert (np.diff(distances, axis=1) >= 0).all()
+
+
+def test_sparse_and_dense_input_agree(corpus):
+    X_train, _, X_query, _ = corpus
+    sparse_result = RandomProjectionLSH().fit(X_train).kneighbors(X_query[:50])
+    dense_result = RandomProjectionLSH().fit(X_train.toarray()).kneighbors(X_query[:50].toarray())
+    np.testing.assert_array_equal(sparse_result[1], dense_result[1])
+    np.testing.assert_allclose(sparse_result[0], dense_result[0], rtol=1e-4)
+
+
+def test_pair_dots(corpus):
+    X_train, _, X_query, _ = corpus
+    index = RandomProjectionLSH().fit(X_train)
+    query_ids, cands = index._candidate_pairs(X_query[:20])
+    expected = np.einsum('ij,ij->i', X_train[cands].toarray(), X_query[:20].toarray()[query_ids])
+    np.testing.assert_allclose(index._pair_dots(X_query[:20], query_ids, cands), expected, rtol=1e-4, atol=1e-3)
+
+
+def test_candidates_are_bucket_mates(corpus):
+    X_train, _, X_query, _ = corpus
+    index = RandomProjectionLSH(n_tables=4).fit(X_train)
+    candidates = index.candidates(X_query[:10])
+    assert len(candidates) == 10
+    codes_query = index._hash(X_query[:10].toarray() @ index.planes_)
+    codes_train = index._hash(X_train.toarray() @ index.planes_)
+    for query, cands in enumerate(candidates):
+        expected = np.flatnonzero((codes_train == codes_query[query]).any(axis=1))
+        np.testing.assert_array_equal(cands, expected)
+
+
+def test_exact_scan_when_buckets_are_too_small():
+    rng = np.random.default_rng(0)
+    X_train, X_query = rng.normal(size=(300, 20)), rng.normal(size=(30, 20))
+    # One table of many bits leaves most queries with fewer than 5 candidates
+    _, indices = RandomProjectionLSH(n_tables=1, n_bits=20).fit(X_train).kneighbors(X_query, 5)
+    _, exact = NearestNeighbors(n_neighbors=5).fit(X_train).kneighbors(X_query)
+    assert recall_at_k(indices, exact) == 1.0
+
+
+def test_classifier_agrees_with_knn(corpus):
+    X_train, y_train, X_query, _ = corpus
+    approx = ApproximateKNeighborsClassifier(n_neighbors=5).fit(X_train, y_train).predict(X_query)
+    exact = KNeighborsClassifier(n_neighbors=5).fit(X_train, y_train).predict(X_query)
+    assert np.mean(approx == exact) > 0.95
+    labels = ApproximateKNeighborsClassifier().fit(X_train, np.where(y_train == 1, 'spam', 'ham')).predict(X_query)
+    assert set(labels) <= {'spam', 'ham'}
+
+
+def test_recall_at_k():
+    assert recall_at_k([[1, 2], [3, 4]], [[2, 1], [3, 5]]) == 0.75
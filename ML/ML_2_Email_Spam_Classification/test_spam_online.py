@@ -0,0 +1,54 @@
+# Tests of the online mini-batch spam classifier
+import os
+import sys
+
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+from spam_online import OnlineSpamClassifier, iter_batches, iter_csv_batches
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ml_common.synthetic import email_counts, email_frame
+
+
+def test_matches_manual_partial_fit():
+    _, X, y = email_counts(1000, n_words=500, seed=1)
+    X = X.astype(np.float64)
+    online = OnlineSpamClassifier(snapshot_every=3).fit_stream(iter_batches(X, y, batch_size=128))
+
+    scaler, model = StandardScaler(with_mean=False), SGDClassifier(loss='hinge', alpha=1e-4, random_state=42)
+    for X_batch, y_batch in iter_batches(X, y, batch_size=128):
+        scaler.partial_fit(X_batch)
+        model.partial_fit(scaler.transform(X_batch), y_batch, classes=[0, 1])
+    np.testing.assert_array_equal(online.model.coef_, model.coef_)
+    # The incremental scaler ends up with the statistics of the whole data
+    np.testing.assert_allclose(online.scaler.var_, StandardScaler(with_mean=False).fit(X).var_)
+    assert online.n_batches_ == 8 and online.n_samples_seen_ == 1000
+    assert (online.predict(X) == y).mean() > 0.9
+
+
+def test_snapshots_are_frozen_and_bounded():
+    _, X, y = email_counts(600, n_words=300, seed=2)
+    online = OnlineSpamClassifier(snapshot_every=2, max_snapshots=2)
+    batches = list(iter_batches(X, y, batch_size=50))
+    online.fit_stream(batches[:4])
+    snapshot = online.snapshots[-1]
+    coef = snapshot.model.coef_.copy()
+    online.fit_stream(batches[4:9])
+    np.testing.assert_array_equal(snapshot.model.coef_, coef)
+    assert [s.n_batches for s in online.snapshots] == [6, 8]
+    # The live model is one batch ahead of the last snapshot
+    latest = online.latest_snapshot()
+    assert (latest.n_batches, latest.n_samples) == (9, 450)
+    np.testing.assert_array_equal(latest.predict(X), online.predict(X))
+    assert online.latest_snapshot() is latest
+
+
+def test_csv_batches(tmp_path):
+    path = tmp_path / 'emails.csv'
+    email_frame(300, n_words=200, seed=3).to_csv(path, index=False)
+    batches = list(iter_csv_batches(str(path), batch_size=128))
+    assert [X.shape[0] for X, _ in batches] == [128, 128, 44]
+    online = OnlineSpamClassifier().fit_stream(batches)
+    assert online.n_samples_seen_ == 300
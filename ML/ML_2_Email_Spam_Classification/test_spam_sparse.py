@@ -0,0 +1,44 @@
+# Tests of the sparse emails.csv loader against the dense pd.read_csv frame
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from spam_sparse import iter_sparse_emails, load_sparse_emails, memory_report, sparse_nbytes
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ml_common.synthetic import email_frame
+
+
+@pytest.fixture
+def emails_csv(tmp_path):
+    path = tmp_path / 'emails.csv'
+    email_frame(230, n_words=400, seed=5).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize('cache', [False, True])
+@pytest.mark.parametrize('chunksize', [50, 1000])
+def test_matches_dense_frame(emails_csv, tmp_path, monkeypatch, chunksize, cache):
+    monkeypatch.setenv('ML_DATASET_CACHE', str(tmp_path / 'cache'))
+    df = pd.read_csv(emails_csv)
+    ids, X, y, feature_names = load_sparse_emails(emails_csv, chunksize=chunksize, cache=cache)
+    assert X.format == 'csr' and X.dtype == np.float32
+    np.testing.assert_array_equal(X.toarray(), df.iloc[:, 1:-1].to_numpy())
+    np.testing.assert_array_equal(ids, df['Email No.'].to_numpy())
+    np.testing.assert_array_equal(y, df['Prediction'].to_numpy())
+    np.testing.assert_array_equal(feature_names, df.columns[1:-1])
+
+
+def test_chunks(emails_csv):
+    sizes = [X.shape for _, X, _, _ in iter_sparse_emails(emails_csv, chunksize=100, dtype=np.float64)]
+    assert sizes == [(100, 400), (100, 400), (30, 400)]
+
+
+def test_memory_report(emails_csv):
+    _, X, _, _ = load_sparse_emails(emails_csv)
+    assert sparse_nbytes(X) == X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    assert sparse_nbytes(X) < X.shape[0] * X.shape[1] * 8
+    assert memory_report(X).startswith(f"Sparse matrix: {X.shape}")
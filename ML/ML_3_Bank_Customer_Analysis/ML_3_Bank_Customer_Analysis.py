@@ -1,21 +1,45 @@
 # Importing necessary libraries
-import pandas as pd
+import os
+import sys
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.metrics import accuracy_score, confusion_matrix, classification_report
-from tensorflow.keras.models import Sequential()
-from tensorflow.keras.layers import Dense, Dropout
-from tensorflow.keras.callbacks import EarlyStopping
+from churn_runtime import ChurnRuntime, export_churn_model
+
+# Shared helpers live in ML/ml_common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ml_common.compaction import MemoryReport, to_float32
+from ml_common.evaluation import Evaluator
+from ml_common.datasets import load_dataset
+from ml_common.figures import FigureRenderer
+from ml_common.lazy import lazy_import
+from ml_common.model_cache import ModelCache, keras_config
+from ml_common.tracing import StageTrace
+
+# The plotting libraries load when the first figure is drawn, and scikit-learn and TensorFlow
+# in the stages that use them, so the dataset diagnostics print without waiting for them
+plt = lazy_import('matplotlib.pyplot')
+sns = lazy_import('seaborn')
+
+# Wall time, CPU time, peak memory and row counts of every stage go to a JSON trace
+trace = StageTrace('ML_3_Bank_Customer_Analysis')
+# Figures are shown, saved in the background or skipped depending on $ML_FIGURES (see ml_common/figures.py)
+figures = FigureRenderer('ML_3_Bank_Customer_Analysis')
+# Memory saved by compact dtypes is printed when the script ends
+memory = MemoryReport('ML_3_Bank_Customer_Analysis')
 
 # Step 1: Load the dataset
-data = pd.read_csv('./Churn_Modelling.csv')
+trace.stage("Step 1: Load the dataset")
+# Churn_Modelling.csv is parsed once and read from the columnar cache on later runs
+data = load_dataset('churn')
+# Geography, Gender and Surname become categoricals, the integer columns their smallest widths
+data = memory.compact(data, "Customer table")
+trace.rows(len(data))
 print("Dataset Shape:", data.shape)
 data.head()
 
 # Step 2: Distinguish the feature and target set
+trace.stage("Step 2: Distinguish the feature and target set")
+from sklearn.preprocessing import LabelEncoder
+
 # Dropping irrelevant columns
 X = data.drop(columns=['RowNumber', 'CustomerId', 'Surname', 'Exited'])
 y = data['Exited']  # 'Exited' column is the target
@@ -28,14 +52,29 @@ le_gender = LabelEncoder()
 X['Gender'] = le_gender.fit_transform(X['Gender'])
 
 # Step 3: Split data into training and test sets
+trace.stage("Step 3: Split data into training and test sets")
+from sklearn.model_selection import train_test_split
+
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+trace.rows(len(X_train))
 
 # Step 4: Normalize the data
+trace.stage("Step 4: Normalize the data")
+from sklearn.preprocessing import StandardScaler
+
+# Keep the unscaled test features for the results table instead of inverse-transforming later
+X_test_unscaled = X_test
+# The network computes in float32, so the scaled features are handed over as float32
 scaler = StandardScaler()
-X_train = scaler.fit_transform(X_train)
-X_test = scaler.transform(X_test)
+X_train = to_float32(scaler.fit_transform(X_train))
+X_test = to_float32(scaler.transform(X_test))
 
 # Step 5: Initialize and build the neural network model
+trace.stage("Step 5: Initialize and build the neural network model")
+from tensorflow.keras.models import Sequential
+from tensorflow.keras.layers import Dense, Dropout
+from tensorflow.keras.callbacks import EarlyStopping
+
 model = Sequential()
 model.add(Dense(64, activation='relu', input_shape=(X_train.shape[1],)))
 model.add(Dropout(0.3))  # Adding dropout to prevent overfitting
@@ -53,64 +92,87 @@ model.summary()
 early_stopping = EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True)
 
 # Train the model
-history = model.fit(X_train, y_train, epochs=50, batch_size=32, validation_split=0.2, callbacks=[early_stopping])
+trace.stage("Step 5: Train the model")
+# The trained network, its history and the scaler and encoders it was trained with are cached
+# under a hash of the training data and the architecture / training settings; a re-run on
+# unchanged data loads them instead of training again
+fit_params = dict(epochs=50, batch_size=32, validation_split=0.2)
+model_cache = ModelCache()
+model_key = model_cache.key(X_train, y_train, config={'model': keras_config(model), 'fit': fit_params,
+                                                      'early_stopping': {'monitor': 'val_loss', 'patience': 5}})
+artifacts = model_cache.get(model_key)
+if artifacts is None:
+    history = model.fit(X_train, y_train, callbacks=[early_stopping], **fit_params)
+    artifacts = model_cache.put(model_key, {'model': model, 'history': history.history, 'scaler': scaler,
+                                            'encoders': {'Geography': le_geography, 'Gender': le_gender}})
+model, training_history, scaler = artifacts['model'], artifacts['history'], artifacts['scaler']
+le_geography, le_gender = artifacts['encoders']['Geography'], artifacts['encoders']['Gender']
 
 # Step 6: Model Evaluation
+trace.stage("Step 6: Model Evaluation")
 # Plot training history
-plt.figure(figsize=(14, 5))
-plt.subplot(1, 2, 1)
-plt.plot(history.history['accuracy'], label='Train Accuracy')
-plt.plot(history.history['val_accuracy'], label='Validation Accuracy')
-plt.title('Training and Validation Accuracy')
-plt.xlabel('Epochs')
-plt.ylabel('Accuracy')
-plt.legend()
-
-plt.subplot(1, 2, 2)
-plt.plot(history.history['loss'], label='Train Loss')
-plt.plot(history.history['val_loss'], label='Validation Loss')
-plt.title('Training and Validation Loss')
-plt.xlabel('Epochs')
-plt.ylabel('Loss')
-plt.legend()
-plt.show()
-
-# Make predictions
-y_pred = (model.predict(X_test) > 0.5).astype("int32")
+def plot_history(training_history):
+    plt.figure(figsize=(14, 5))
+    plt.subplot(1, 2, 1)
+    plt.plot(training_history['accuracy'], label='Train Accuracy')
+    plt.plot(training_history['val_accuracy'], label='Validation Accuracy')
+    plt.title('Training and Validation Accuracy')
+    plt.xlabel('Epochs')
+    plt.ylabel('Accuracy')
+    plt.legend()
+
+    plt.subplot(1, 2, 2)
+    plt.plot(training_history['loss'], label='Train Loss')
+    plt.plot(training_history['val_loss'], label='Validation Loss')
+    plt.title('Training and Validation Loss')
+    plt.xlabel('Epochs')
+    plt.ylabel('Loss')
+    plt.legend()
+
+
+figures.render('training_history', plot_history, training_history)
+
+# Make predictions once; every score below is derived from the cached result
+evaluator = Evaluator()
+result = evaluator.evaluate(model, X_test, y_test, name="Churn Neural Network", threshold=0.5)
+y_pred = result.y_pred
 
 # Calculate accuracy score
-accuracy = accuracy_score(y_test, y_pred)
+accuracy = result.accuracy
 print("Accuracy Score:", accuracy)
 
 # Confusion Matrix
-cm = confusion_matrix(y_test, y_pred)
+cm = result.confusion_matrix
 
 # Plot Confusion Matrix
-plt.figure(figsize=(8, 6))
-sns.heatmap(cm, annot=True, fmt="d", cmap="Blues", xticklabels=['Not Churn', 'Churn'], yticklabels=['Not Churn', 'Churn'])
-plt.title("Confusion Matrix")
-plt.xlabel("Predicted Labels")
-plt.ylabel("True Labels")
-plt.show()
+def plot_confusion_matrix(cm):
+    plt.figure(figsize=(8, 6))
+    sns.heatmap(cm, annot=True, fmt="d", cmap="Blues", xticklabels=['Not Churn', 'Churn'], yticklabels=['Not Churn', 'Churn'])
+    plt.title("Confusion Matrix")
+    plt.xlabel("Predicted Labels")
+    plt.ylabel("True Labels")
 
-# Classification Report
-print("Classification Report:\n", classification_report(y_test, y_pred))
-
-# Make predictions
-y_pred = (model.predict(X_test) > 0.5).astype("int32")
 
-# Convert predictions back to the original DataFrame's index
-# First, create a DataFrame from y_test with matching indices
-y_test_df = y_test.reset_index(drop=True)
+figures.render('confusion_matrix', plot_confusion_matrix, cm)
 
-# Create a DataFrame for predictions
-predictions_df = pd.DataFrame(y_pred, columns=["Predicted"], index=y_test_df.index)
+# Classification Report
+print("Classification Report:\n", result.classification_report)
 
-# Combine the predictions with the original test set DataFrame (re-indexed)
-results_df = X_test.copy()
-results_df = pd.DataFrame(scaler.inverse_transform(results_df), columns=X.columns)
-results_df['True Label'] = y_test_df
-results_df['Predicted Label'] = predictions_df
+# Combine the unscaled test features with the true and predicted labels (re-indexed)
+results_df = result.results_frame(X_test_unscaled)
 
 # Display the updated DataFrame with the true and predicted labels
-results_df.head()
\ No newline at end of file
+results_df.head()
+
+# Step 7: Export the model for TensorFlow-free scoring
+trace.stage("Step 7: Export the model for TensorFlow-free scoring")
+# Dense weights, label encoders and scaler parameters go into one compact artifact
+# that churn_runtime.ChurnRuntime scores with NumPy only
+export_churn_model('churn_model.npz', model, scaler,
+                   encoders={'Geography': le_geography, 'Gender': le_gender},
+                   feature_names=X.columns)
+
+# Check the NumPy runtime reproduces the Keras probabilities
+runtime = ChurnRuntime('churn_model.npz')
+max_diff = np.abs(runtime.predict_proba_scaled(X_test) - evaluator.predict_scores(model, X_test)).max()
+print(f"NumPy runtime vs Keras: max |probability difference| = {max_diff:.2e}")
@@ -0,0 +1,87 @@
+# Benchmark: NumPy churn runtime vs Keras model.predict
+# Trains a small model on Churn_Modelling.csv, exports it, checks that the predictions
+# match and compares import time and scoring latency for single rows and batches.
+# Usage: python benchmark_runtime.py
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler, LabelEncoder
+
+from churn_runtime import ChurnRuntime, export_churn_model
+
+TOLERANCE = 1e-5
+
+
+def import_time(module):
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def latency(func, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats
+
+
+if __name__ == '__main__':
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Dense, Dropout, Input
+
+    data = pd.read_csv(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Churn_Modelling.csv'))
+    X = data.drop(columns=['RowNumber', 'CustomerId', 'Surname', 'Exited'])
+    y = data['Exited']
+    le_geography, le_gender = LabelEncoder(), LabelEncoder()
+    X_encoded = X.copy()
+    X_encoded['Geography'] = le_geography.fit_transform(X['Geography'])
+    X_encoded['Gender'] = le_gender.fit_transform(X['Gender'])
+    X_train, X_test, y_train, y_test = train_test_split(X_encoded, y, test_size=0.2, random_state=42)
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X_train)
+    X_test = scaler.transform(X_test)
+
+    model = Sequential([Input(shape=(X_train.shape[1],)),
+                        Dense(64, activation='relu'), Dropout(0.3),
+                        Dense(32, activation='relu'), Dropout(0.3),
+                        Dense(1, activation='sigmoid')])
+    model.compile(optimizer='adam', loss='binary_crossentropy')
+    model.fit(X_train, y_train, epochs=3, batch_size=32, verbose=0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'churn_model.npz')
+        export_churn_model(path, model, scaler, {'Geography': le_geography, 'Gender': le_gender}, X.columns)
+        artifact_kib = os.path.getsize(path) / 1024
+        runtime = ChurnRuntime(path)
+
+    # Predictions must match, both from scaled matrices and from raw customer rows
+    keras_proba = model.predict(X_test, verbose=0)
+    max_diff = np.abs(runtime.predict_proba_scaled(X_test) - keras_proba).max()
+    raw_test = X.loc[y_test.index]
+    max_diff_raw = np.abs(runtime.predict_proba(raw_test) - keras_proba).max()
+    status = "OK" if max(max_diff, max_diff_raw) <= TOLERANCE else "FAIL"
+
+    single_row = X_test[:1]
+    single_customer = raw_test.iloc[0].to_dict()
+    t_keras_single = latency(lambda: model.predict(single_row, verbose=0), 50)
+    t_keras_call = latency(lambda: model(single_row, training=False), 50)
+    t_numpy_single = latency(lambda: runtime.predict_proba_scaled(single_row), 2000)
+    t_numpy_raw = latency(lambda: runtime.predict_proba(single_customer), 2000)
+    t_keras_batch = latency(lambda: model.predict(X_test, verbose=0), 5)
+    t_numpy_batch = latency(lambda: runtime.predict_proba_scaled(X_test), 50)
+
+    print(f"Artifact size: {artifact_kib:.1f} KiB")
+    print(f"Max |difference| vs model.predict: scaled {max_diff:.2e}, raw rows {max_diff_raw:.2e} [{status}]")
+    print(f"Import time:   tensorflow.keras {import_time('tensorflow.keras'):7.3f} s   "
+          f"churn_runtime {import_time('churn_runtime'):7.3f} s")
+    print(f"Single row:    model.predict {t_keras_single * 1e3:8.3f} ms   model() {t_keras_call * 1e3:8.3f} ms   "
+          f"numpy {t_numpy_single * 1e3:8.3f} ms   numpy raw row {t_numpy_raw * 1e3:8.3f} ms")
+    print(f"Batch ({len(X_test)}): model.predict {t_keras_batch * 1e3:8.3f} ms   numpy {t_numpy_batch * 1e3:8.3f} ms")
+    sys.exit(0 if status == "OK" else 1)
@@ -0,0 +1,102 @@
+# Pure-NumPy inference runtime for the churn network
+# export_churn_model() writes the Dense weights of the trained Sequential model together
+# with the LabelEncoder classes and StandardScaler parameters into one .npz artifact
+# (write_churn_model() writes the same artifact from plain weight arrays).
+# ChurnRuntime loads that artifact and scores customers without importing TensorFlow.
+import numpy as np
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=1, keepdims=True))
+    return e / e.sum(axis=1, keepdims=True)
+
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+    'sigmoid': lambda x: 1 / (1 + np.exp(-x)),
+    'tanh': np.tanh,
+    'softmax': _softmax,
+}
+
+
+def export_churn_model(path, model, scaler, encoders, feature_names):
+    """Write a trained Keras Sequential model and its preprocessing to one .npz file.
+
+    encoders maps a column name to its fitted LabelEncoder. Dropout and other
+    weightless layers are skipped, since they are the identity at inference.
+    """
+    layers = [(*layer.get_weights(), layer.get_config()['activation'])
+              for layer in model.layers if type(layer).__name__ == 'Dense']
+    write_churn_model(path, layers, scaler, encoders, feature_names)
+
+
+def write_churn_model(path, layers, scaler, encoders, feature_names):
+    """Write (kernel, bias, activation) layers and the preprocessing to one .npz file."""
+    arrays = {
+        'feature_names': np.asarray(feature_names, dtype=str),
+        'scaler_mean': np.asarray(scaler.mean_, dtype=np.float64),
+        'scaler_scale': np.asarray(scaler.scale_, dtype=np.float64),
+        'encoded_columns': np.asarray(list(encoders), dtype=str),
+    }
+    for column, encoder in encoders.items():
+        arrays[f'classes_{column}'] = np.asarray(encoder.classes_, dtype=str)
+
+    for i, (kernel, bias, activation) in enumerate(layers):
+        arrays[f'kernel_{i}'] = np.asarray(kernel, dtype=np.float32)
+        arrays[f'bias_{i}'] = np.asarray(bias, dtype=np.float32)
+    arrays['activations'] = np.asarray([activation for _, _, activation in layers], dtype=str)
+
+    np.savez_compressed(path, **arrays)
+
+
+class ChurnRuntime:
+    """Scores churn probabilities from an exported artifact using NumPy only."""
+
+    def __init__(self, path):
+        with np.load(path) as artifact:
+            self.feature_names = [str(name) for name in artifact['feature_names']]
+            self.mean = artifact['scaler_mean']
+            self.scale = artifact['scaler_scale']
+            self.classes = {str(column): artifact[f'classes_{column}'] for column in artifact['encoded_columns']}
+            activations = [str(name) for name in artifact['activations']]
+            self.layers = [(artifact[f'kernel_{i}'], artifact[f'bias_{i}'], ACTIVATIONS[name])
+                           for i, name in enumerate(activations)]
+
+    def encode(self, column, values):
+        """LabelEncoder.transform for one column (classes are stored sorted)."""
+        classes = self.classes[column]
+        values = np.asarray(values, dtype=str)
+        codes = np.searchsorted(classes, values)
+        codes = np.minimum(codes, len(classes) - 1)
+        unknown = classes[codes] != values
+        if unknown.any():
+            raise ValueError(f"{column} contains previously unseen labels: {sorted(set(values[unknown]))}")
+        return codes
+
+    def to_matrix(self, rows):
+        """Raw customer rows (DataFrame, dict of columns or one dict) to a float matrix."""
+        if isinstance(rows, dict):
+            rows = {column: np.atleast_1d(value) for column, value in rows.items()}
+        columns = []
+        for name in self.feature_names:
+            values = rows[name]
+            columns.append(self.encode(name, values) if name in self.classes else np.asarray(values, dtype=np.float64))
+        return np.column_stack(columns)
+
+    def predict_proba_scaled(self, X_scaled):
+        """Churn probability for rows already passed through the StandardScaler."""
+        activations = np.asarray(X_scaled, dtype=np.float32)
+        if activations.ndim == 1:
+            activations = activations[None, :]
+        for kernel, bias, activation in self.layers:
+            activations = activation(activations @ kernel + bias)
+        return activations
+
+    def predict_proba(self, rows):
+        """Churn probability for raw customer rows (strings encoded, then scaled)."""
+        X_scaled = (self.to_matrix(rows) - self.mean) / self.scale
+        return self.predict_proba_scaled(X_scaled)
+
+    def predict(self, rows, threshold=0.5):
+        return (self.predict_proba(rows) > threshold).astype("int32")
@@ -0,0 +1,76 @@
+# Tests of the NumPy churn runtime against the Keras network it was exported from
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from churn_runtime import ChurnRuntime, export_churn_model, write_churn_model
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ml_common.synthetic import churn_customers
+
+
+@pytest.fixture(scope='module')
+def customers():
+    data = churn_customers(300, seed=9)
+    X = data.drop(columns=['RowNumber', 'CustomerId', 'Surname', 'Exited'])
+    X['Geography'] = X['Geography'].astype(str)
+    X['Gender'] = X['Gender'].astype(str)
+    encoders = {column: LabelEncoder().fit(X[column]) for column in ('Geography', 'Gender')}
+    encoded = X.copy()
+    for column, encoder in encoders.items():
+        encoded[column] = encoder.transform(X[column])
+    scaler = StandardScaler().fit(encoded)
+    return X, scaler.transform(encoded).astype(np.float32), scaler, encoders
+
+
+def test_matches_keras_model(customers, tmp_path):
+    keras = pytest.importorskip('keras')
+    X, X_scaled, scaler, encoders = customers
+    model = keras.Sequential([keras.Input(shape=(X.shape[1],)), keras.layers.Dense(16, activation='relu'),
+                              keras.layers.Dropout(0.3), keras.layers.Dense(8, activation='tanh'),
+                              keras.layers.Dense(1, activation='sigmoid')])
+    path = tmp_path / 'churn_model.npz'
+    export_churn_model(path, model, scaler, encoders, feature_names=X.columns)
+
+    runtime = ChurnRuntime(path)
+    expected = model.predict(X_scaled, verbose=0)
+    np.testing.assert_allclose(runtime.predict_proba(X), expected, atol=1e-5)
+    np.testing.assert_allclose(runtime.predict_proba_scaled(X_scaled), expected, atol=1e-5)
+    np.testing.assert_array_equal(runtime.predict(X), (expected > 0.5).astype('int32'))
+
+
+def test_written_weights_round_trip(customers, tmp_path):
+    X, X_scaled, scaler, encoders = customers
+    rng = np.random.default_rng(0)
+    layers = [(rng.normal(size=(X.shape[1], 4)), rng.normal(size=4), 'relu'),
+              (rng.normal(size=(4, 2)), rng.normal(size=2), 'softmax')]
+    path = tmp_path / 'churn_model.npz'
+    write_churn_model(path, layers, scaler, encoders, X.columns)
+
+    runtime = ChurnRuntime(path)
+    assert runtime.feature_names == list(X.columns)
+    np.testing.assert_array_equal(runtime.classes['Geography'], encoders['Geography'].classes_)
+    hidden = np.maximum(X_scaled @ layers[0][0] + layers[0][1], 0)
+    logits = hidden @ layers[1][0] + layers[1][1]
+    expected = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+    np.testing.assert_allclose(runtime.predict_proba(X), expected, rtol=1e-4, atol=1e-6)
+
+    # A single customer as a dict of scalars
+    one = runtime.predict_proba(X.iloc[0].to_dict())
+    np.testing.assert_allclose(one, expected[:1], rtol=1e-4, atol=1e-6)
+
+
+def test_encode_matches_label_encoder_and_rejects_unseen(customers, tmp_path):
+    X, _, scaler, encoders = customers
+    path = tmp_path / 'churn_model.npz'
+    write_churn_model(path, [(np.ones((X.shape[1], 1)), np.zeros(1), 'sigmoid')], scaler, encoders, X.columns)
+    runtime = ChurnRuntime(path)
+    np.testing.assert_array_equal(runtime.encode('Geography', X['Geography']),
+                                  encoders['Geography'].transform(X['Geography']))
+    with pytest.raises(ValueError, match='unseen labels'):
+        runtime.encode('Geography', ['France', 'Italy'])
+    with pytest.raises(ValueError, match='unseen labels'):
+        runtime.encode('Gender', ['Zzz'])
@@ -1,6 +1,23 @@
 # Import necessary libraries
+import os
+import sys
 import numpy as np
-import matplotlib.pyplot as plt
+from gradient_descent import batched_gradient_descent, sweep_grid
+from optimizers import Adam, BacktrackingLineSearch, GradientDescent, Momentum, Nesterov, minimize
+
+# Shared helpers live in ML/ml_common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ml_common.figures import FigureRenderer
+from ml_common.lazy import lazy_import
+from ml_common.tracing import StageTrace
+
+# matplotlib loads when the figure is drawn (and not at all with $ML_FIGURES=off)
+plt = lazy_import('matplotlib.pyplot')
+
+# Wall time, CPU time and peak memory of every stage go to a JSON trace
+trace = StageTrace('ML_4_Gradient_Descent_Algorithm')
+# Figures are shown, saved in the background or skipped depending on $ML_FIGURES (see ml_common/figures.py)
+figures = FigureRenderer('ML_4_Gradient_Descent_Algorithm')
 
 # Define the function and its derivative
 def function(x):
@@ -14,36 +31,55 @@ learning_rate = 0.1  # Step size
 n_iterations = 50    # Number of iterations
 x_start = 2          # Starting point
 
-# Lists to store x values and corresponding y values for visualization
-x_values = [x_start]
-y_values = [function(x_start)]
-
 # Gradient Descent Loop
-x = x_start
-for i in range(n_iterations):
-    gradient = derivative(x)           # Compute the gradient at the current point
-    x = x - learning_rate * gradient    # Update x value
-    y = function(x)                     # Compute y for the updated x
-
-    # Append updated values for visualization
-    x_values.append(x)
-    y_values.append(y)
+trace.stage("Gradient descent")
+# The batched engine stores the path in a preallocated array; here it runs a single configuration
+result = batched_gradient_descent(derivative, [x_start], learning_rate, n_iterations=n_iterations, objective=function)
+x_values, y_values = result.path(0)
+x_values = x_values[:, 0]
 
 # Plot the function and the path of gradient descent
+trace.stage("Plot")
 x_range = np.linspace(-10, 4, 100)
 y_range = function(x_range)
 
-plt.figure(figsize=(10, 6))
-plt.plot(x_range, y_range, label="y = (x + 3)^2", color="blue")
-plt.scatter(x_values, y_values, color="red", label="Gradient Descent Path")
-plt.plot(x_values, y_values, color="red", linestyle="--")
-plt.title("Gradient Descent to Find Local Minima of y = (x + 3)^2")
-plt.xlabel("x")
-plt.ylabel("y")
-plt.legend()
+def plot_path(x_range, y_range, x_values, y_values):
+    plt.figure(figsize=(10, 6))
+    plt.plot(x_range, y_range, label="y = (x + 3)^2", color="blue")
+    plt.scatter(x_values, y_values, color="red", label="Gradient Descent Path")
+    plt.plot(x_values, y_values, color="red", linestyle="--")
+    plt.title("Gradient Descent to Find Local Minima of y = (x + 3)^2")
+    plt.xlabel("x")
+    plt.ylabel("y")
+    plt.legend()
 
-# Show the plot
-plt.show()
+
+# Show (or save) the plot
+figures.render('gradient_descent_path', plot_path, x_range, y_range, x_values, y_values)
 
 # Print final results
-print(f"Local minimum occurs at x = {x_values[-1]:.4f}, y = {y_values[-1]:.4f}")
\ No newline at end of file
+print(f"Local minimum occurs at x = {x_values[-1]:.4f}, y = {y_values[-1]:.4f}")
+
+# Sweep many starting points and learning rates in one vectorized pass
+trace.stage("Learning-rate sweep")
+# Each run stops on its own once its step is smaller than the tolerance
+x_starts = np.linspace(-10, 4, 100)
+learning_rates = np.linspace(0.01, 0.9, 50)
+starts, rates = sweep_grid(x_starts, learning_rates)
+sweep = batched_gradient_descent(derivative, starts, rates, n_iterations=1000, tol=1e-6)
+trace.rows(len(starts))
+
+steps_per_rate = sweep.n_steps.reshape(len(x_starts), len(learning_rates)).mean(axis=0)
+best = np.argmin(steps_per_rate)
+print(f"Swept {len(starts)} configurations: {sweep.converged.mean():.0%} converged")
+print(f"Fastest learning rate: {learning_rates[best]:.3f} ({steps_per_rate[best]:.1f} iterations on average)")
+
+# Compare the optimizer family on the same function: iterations and time to reach the minimum
+trace.stage("Optimizer comparison")
+# (benchmark_optimizers.py runs the same comparison on harder test functions)
+tolerance = 1e-6
+for optimizer in [GradientDescent(learning_rate), Momentum(learning_rate), Nesterov(learning_rate),
+                  Adam(0.5), BacktrackingLineSearch()]:
+    history = minimize(function, derivative, x_start, optimizer, n_iterations=1000, tol=tolerance, f_min=0.0)
+    print(f"{history.name}: {history.n_iterations} iterations, {history.total_time * 1e3:.2f} ms, "
+          f"x = {float(history.x_values[-1]):.4f}")
@@ -0,0 +1,52 @@
+# Benchmark: iterations and wall time each optimizer needs to reach a target tolerance
+# on a set of standard test functions.
+# Usage: python benchmark_optimizers.py [tolerance]
+import sys
+
+import numpy as np
+
+from optimizers import Adam, BacktrackingLineSearch, GradientDescent, Momentum, Nesterov, minimize
+
+MAX_ITERATIONS = 20_000
+
+# Ill-conditioned quadratic: curvatures 1 and 100
+CURVATURES = np.array([1.0, 100.0])
+
+# name: (function, derivative, x_start, minimum value)
+TEST_FUNCTIONS = {
+    "(x + 3)^2": (lambda x: (x + 3) ** 2,
+                  lambda x: 2 * (x + 3),
+                  2.0, 0.0),
+    "Ill-conditioned quadratic": (lambda x: 0.5 * np.sum(CURVATURES * x ** 2),
+                                  lambda x: CURVATURES * x,
+                                  np.array([10.0, 1.0]), 0.0),
+    "Rosenbrock": (lambda x: (1 - x[0]) ** 2 + 100 * (x[1] - x[0] ** 2) ** 2,
+                   lambda x: np.array([-2 * (1 - x[0]) - 400 * x[0] * (x[1] - x[0] ** 2),
+                                       200 * (x[1] - x[0] ** 2)]),
+                   np.array([-1.2, 1.0]), 0.0),
+    "Booth": (lambda x: (x[0] + 2 * x[1] - 7) ** 2 + (2 * x[0] + x[1] - 5) ** 2,
+              lambda x: np.array([10 * x[0] + 8 * x[1] - 34, 8 * x[0] + 10 * x[1] - 38]),
+              np.array([0.0, 0.0]), 0.0),
+}
+
+# Step sizes are chosen per problem family the way one would tune them by hand
+OPTIMIZERS = {
+    "(x + 3)^2": [GradientDescent(0.1), Momentum(0.1), Nesterov(0.1), Adam(0.5), BacktrackingLineSearch()],
+    "Ill-conditioned quadratic": [GradientDescent(0.019), Momentum(0.005), Nesterov(0.005), Adam(0.5), BacktrackingLineSearch()],
+    "Rosenbrock": [GradientDescent(0.001), Momentum(0.0005), Nesterov(0.0005), Adam(0.02), BacktrackingLineSearch()],
+    "Booth": [GradientDescent(0.05), Momentum(0.02), Nesterov(0.02), Adam(0.5), BacktrackingLineSearch()],
+}
+
+
+if __name__ == '__main__':
+    tol = float(sys.argv[1]) if len(sys.argv) > 1 else 1e-6
+    print(f"Target: f(x) - f_min < {tol:g} (at most {MAX_ITERATIONS} iterations)\n")
+    for problem, (function, derivative, x_start, f_min) in TEST_FUNCTIONS.items():
+        print(f"--- {problem} ---")
+        for optimizer in OPTIMIZERS[problem]:
+            history = minimize(function, derivative, x_start, optimizer,
+                               n_iterations=MAX_ITERATIONS, tol=tol, f_min=f_min)
+            status = "converged" if history.converged else "not converged"
+            print(f"{history.name:<26} {history.n_iterations:>7} iterations  "
+                  f"{history.total_time * 1e3:9.2f} ms  final cost {history.y_values[-1]:.3e}  ({status})")
+        print()
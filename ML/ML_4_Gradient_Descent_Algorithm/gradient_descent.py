@@ -0,0 +1,101 @@
+# Batched gradient descent engine
+# Runs many (starting point, learning rate) configurations in one vectorized pass:
+# element i of every array belongs to run i.
+import numpy as np
+
+
+class DescentResult:
+    """Paths and convergence information of a batch of gradient descent runs.
+
+    paths has shape (n_runs, n_iterations + 1, dim) and values shape
+    (n_runs, n_iterations + 1). Once a run stops, its remaining path entries
+    repeat its final point, so every run can be sliced the same way.
+    """
+
+    def __init__(self, paths, values, n_steps, converged):
+        self.paths = paths
+        self.values = values
+        self.n_steps = n_steps
+        self.converged = converged
+
+    @property
+    def x_final(self):
+        return self.paths[:, -1]
+
+    @property
+    def y_final(self):
+        return None if self.values is None else self.values[:, -1]
+
+    def path(self, run):
+        """(x_values, y_values) of one run up to the step where it stopped."""
+        stop = self.n_steps[run] + 1
+        x_values = self.paths[run, :stop]
+        y_values = None if self.values is None else self.values[run, :stop]
+        return x_values, y_values
+
+
+def _as_points(x):
+    # A copy: the runs are updated in place and must not write into the caller's array
+    x = np.array(x, dtype=np.float64, copy=True)
+    return x.reshape(-1, 1) if x.ndim <= 1 else x
+
+
+def batched_gradient_descent(gradient, x_starts, learning_rates, n_iterations=50, tol=None, objective=None):
+    """Fixed-step gradient descent for a whole batch of runs at once.
+
+    gradient maps an (n, dim) array of points to their (n, dim) gradients;
+    objective (optional) maps the points to (n,) values for the recorded path.
+    Scalar functions written with NumPy operators, like `derivative` in the
+    script, work unchanged. x_starts is (n_runs,) or (n_runs, dim);
+    learning_rates is a scalar or one value per run. With a tolerance, a run
+    stops as soon as its step length drops below tol.
+    """
+    x = _as_points(x_starts)
+    n_runs, dim = x.shape
+    learning_rates = np.broadcast_to(np.asarray(learning_rates, dtype=np.float64), (n_runs,))[:, None]
+
+    # Preallocated storage for every run's path
+    paths = np.empty((n_runs, n_iterations + 1, dim))
+    paths[:, 0] = x
+    values = None
+    if objective is not None:
+        values = np.empty((n_runs, n_iterations + 1))
+        values[:, 0] = np.asarray(objective(x), dtype=np.float64).reshape(n_runs)
+
+    n_steps = np.full(n_runs, n_iterations)
+    converged = np.zeros(n_runs, dtype=bool)
+    active = np.arange(n_runs)
+
+    for i in range(n_iterations):
+        # Only runs that have not met the tolerance are updated
+        step = learning_rates[active] * np.asarray(gradient(x[active]), dtype=np.float64).reshape(len(active), dim)
+        x[active] -= step
+        paths[:, i + 1] = x
+        if values is not None:
+            values[:, i + 1] = values[:, i]
+            values[active, i + 1] = np.asarray(objective(x[active]), dtype=np.float64).reshape(len(active))
+
+        if tol is not None:
+            done = np.linalg.norm(step, axis=1) < tol
+            if done.any():
+                finished = active[done]
+                converged[finished] = True
+                n_steps[finished] = i + 1
+                active = active[~done]
+                if len(active) == 0:
+                    paths[:, i + 2:] = x[:, None, :]
+                    if values is not None:
+                        values[:, i + 2:] = values[:, i + 1, None]
+                    break
+
+    return DescentResult(paths, values, n_steps, converged)
+
+
+def sweep_grid(x_starts, learning_rates):
+    """Every combination of starting point and learning rate as per-run arrays.
+
+    Returns (points, rates) with points of shape (n_starts * n_rates, dim).
+    """
+    points = _as_points(x_starts)
+    learning_rates = np.asarray(learning_rates, dtype=np.float64).ravel()
+    return np.repeat(points, len(learning_rates), axis=0), np.tile(learning_rates, len(points))
@@ -0,0 +1,158 @@
+# Pluggable optimizers for the gradient descent module
+# Every optimizer works on the same (function, derivative) pair as the script and
+# takes one step at a time; minimize() drives it and records per-iteration cost and time.
+import time
+
+import numpy as np
+
+
+class GradientDescent:
+    """Fixed-step update x = x - learning_rate * gradient."""
+
+    name = "Gradient Descent"
+
+    def __init__(self, learning_rate=0.1):
+        self.learning_rate = learning_rate
+
+    def reset(self, x):
+        pass
+
+    def step(self, x, function, derivative):
+        return x - self.learning_rate * derivative(x)
+
+
+class Momentum(GradientDescent):
+    """Heavy-ball momentum: a running velocity smooths and accelerates the steps."""
+
+    name = "Momentum"
+
+    def __init__(self, learning_rate=0.1, beta=0.9):
+        super().__init__(learning_rate)
+        self.beta = beta
+
+    def reset(self, x):
+        self.velocity = np.zeros_like(x)
+
+    def step(self, x, function, derivative):
+        self.velocity = self.beta * self.velocity - self.learning_rate * derivative(x)
+        return x + self.velocity
+
+
+class Nesterov(Momentum):
+    """Nesterov accelerated gradient: the gradient is taken at the look-ahead point."""
+
+    name = "Nesterov"
+
+    def step(self, x, function, derivative):
+        look_ahead = x + self.beta * self.velocity
+        self.velocity = self.beta * self.velocity - self.learning_rate * derivative(look_ahead)
+        return x + self.velocity
+
+
+class Adam(GradientDescent):
+    """Adam: per-coordinate steps from bias-corrected first and second moment estimates."""
+
+    name = "Adam"
+
+    def __init__(self, learning_rate=0.1, beta1=0.9, beta2=0.999, epsilon=1e-8):
+        super().__init__(learning_rate)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+
+    def reset(self, x):
+        self.m = np.zeros_like(x)
+        self.v = np.zeros_like(x)
+        self.t = 0
+
+    def step(self, x, function, derivative):
+        gradient = derivative(x)
+        self.t += 1
+        self.m = self.beta1 * self.m + (1 - self.beta1) * gradient
+        self.v = self.beta2 * self.v + (1 - self.beta2) * gradient ** 2
+        m_hat = self.m / (1 - self.beta1 ** self.t)
+        v_hat = self.v / (1 - self.beta2 ** self.t)
+        return x - self.learning_rate * m_hat / (np.sqrt(v_hat) + self.epsilon)
+
+
+class BacktrackingLineSearch(GradientDescent):
+    """Steepest descent with an Armijo backtracking line search.
+
+    Starts every iteration from `learning_rate` and shrinks the step until
+    the sufficient-decrease condition holds, so it cannot diverge on badly
+    conditioned problems.
+    """
+
+    name = "Backtracking Line Search"
+
+    def __init__(self, learning_rate=1.0, shrink=0.5, c=1e-4, max_backtracks=50):
+        super().__init__(learning_rate)
+        self.shrink = shrink
+        self.c = c
+        self.max_backtracks = max_backtracks
+
+    def step(self, x, function, derivative):
+        gradient = derivative(x)
+        y = function(x)
+        slope = np.sum(gradient * gradient)
+        step_size = self.learning_rate
+        for _ in range(self.max_backtracks):
+            x_new = x - step_size * gradient
+            if function(x_new) <= y - self.c * step_size * slope:
+                break
+            step_size *= self.shrink
+        return x_new
+
+
+class OptimizationHistory:
+    """Per-iteration record of one optimizer run."""
+
+    def __init__(self, name, x_values, y_values, wall_times, converged):
+        self.name = name
+        self.x_values = x_values
+        self.y_values = y_values
+        self.wall_times = wall_times
+        self.converged = converged
+
+    @property
+    def n_iterations(self):
+        return len(self.y_values) - 1
+
+    @property
+    def total_time(self):
+        return self.wall_times[-1]
+
+
+def minimize(function, derivative, x_start, optimizer, n_iterations=1000, tol=None, f_min=None):
+    """Run an optimizer from x_start, recording cost and cumulative wall time per iteration.
+
+    With a tolerance the run stops early: once function(x) - f_min < tol when
+    the minimum value is known, otherwise once the gradient norm is below tol.
+    """
+    x = np.asarray(x_start, dtype=np.float64)
+    optimizer.reset(x)
+
+    def reached(x, y):
+        if tol is None:
+            return False
+        if f_min is not None:
+            return y - f_min < tol
+        return np.linalg.norm(np.atleast_1d(derivative(x))) < tol
+
+    y = float(function(x))
+    x_values, y_values, wall_times = [x], [y], [0.0]
+    converged = reached(x, y)
+    start = time.perf_counter()
+    for _ in range(n_iterations):
+        if converged:
+            break
+        x = optimizer.step(x, function, derivative)
+        y = float(function(x))
+        x_values.append(x)
+        y_values.append(y)
+        wall_times.append(time.perf_counter() - start)
+        if not np.isfinite(y):
+            break
+        converged = reached(x, y)
+
+    return OptimizationHistory(optimizer.name, np.array(x_values), np.array(y_values), np.array(wall_times), converged)
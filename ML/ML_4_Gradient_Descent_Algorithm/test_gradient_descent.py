@@ -0,0 +1,55 @@
+# Tests of the batched gradient descent engine against the plain per-run loop
+import numpy as np
+
+from gradient_descent import batched_gradient_descent, sweep_grid
+
+
+def function(x):
+    return (x + 3) ** 2
+
+
+def derivative(x):
+    return 2 * (x + 3)
+
+
+def loop_descent(x, learning_rate, n_iterations):
+    path = [x]
+    for _ in range(n_iterations):
+        x = x - learning_rate * derivative(x)
+        path.append(x)
+    return np.array(path)
+
+
+def test_matches_per_run_loop():
+    starts, rates = sweep_grid(np.linspace(-10, 4, 7), [0.01, 0.1, 0.5])
+    result = batched_gradient_descent(derivative, starts, rates, n_iterations=40, objective=function)
+    for run in range(len(starts)):
+        expected = loop_descent(starts[run, 0], rates[run], 40)
+        np.testing.assert_allclose(result.paths[run, :, 0], expected)
+        np.testing.assert_allclose(result.values[run], function(expected))
+
+
+def test_does_not_modify_the_starting_points():
+    x_starts = np.linspace(-10, 4, 20)
+    original = x_starts.copy()
+    batched_gradient_descent(derivative, x_starts, 0.1, n_iterations=100, tol=1e-8)
+    np.testing.assert_array_equal(x_starts, original)
+
+
+def test_tolerance_stops_each_run_on_its_own():
+    result = batched_gradient_descent(derivative, [2.0, -3.0, 50.0], 0.1, n_iterations=500, tol=1e-6,
+                                      objective=function)
+    assert result.converged.all()
+    # The run that starts at the minimum stops at once, the far one last
+    assert result.n_steps[1] == 1
+    assert result.n_steps[0] < result.n_steps[2]
+    np.testing.assert_allclose(result.x_final[:, 0], -3, atol=1e-4)
+    # A stopped run's path repeats its final point
+    x_values, _ = result.path(1)
+    np.testing.assert_array_equal(result.paths[1, len(x_values):], np.broadcast_to(x_values[-1], (500 - 1, 1)))
+
+
+def test_multidimensional_points():
+    gradient = lambda x: 2 * (x - np.array([1.0, -2.0]))
+    result = batched_gradient_descent(gradient, np.zeros((3, 2)), [0.1, 0.2, 0.3], n_iterations=200)
+    np.testing.assert_allclose(result.x_final, np.tile([1.0, -2.0], (3, 1)), atol=1e-8)
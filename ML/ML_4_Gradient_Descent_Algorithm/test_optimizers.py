@@ -0,0 +1,57 @@
+# Tests of the pluggable optimizers and the minimize() driver
+import numpy as np
+import pytest
+
+from optimizers import Adam, BacktrackingLineSearch, GradientDescent, Momentum, Nesterov, minimize
+
+
+def function(x):
+    return (x + 3) ** 2
+
+
+def derivative(x):
+    return 2 * (x + 3)
+
+
+def test_gradient_descent_matches_plain_loop():
+    history = minimize(function, derivative, 2.0, GradientDescent(0.1), n_iterations=50)
+    x = 2.0
+    for _ in range(50):
+        x = x - 0.1 * derivative(x)
+    assert history.x_values[-1] == pytest.approx(x)
+    assert history.n_iterations == 50
+    assert history.y_values[0] == function(2.0)
+    assert (np.diff(history.wall_times) >= 0).all()
+
+
+@pytest.mark.parametrize('optimizer', [GradientDescent(0.1), Momentum(0.05), Nesterov(0.05), Adam(0.5),
+                                       BacktrackingLineSearch()])
+def test_every_optimizer_reaches_the_minimum(optimizer):
+    history = minimize(function, derivative, 2.0, optimizer, n_iterations=2000, tol=1e-10, f_min=0.0)
+    assert history.converged
+    assert history.x_values[-1] == pytest.approx(-3, abs=1e-4)
+    assert history.name == optimizer.name
+
+
+def test_optimizers_work_on_vectors():
+    scales = np.array([1.0, 100.0])
+    f = lambda x: np.sum(scales * x ** 2)
+    grad = lambda x: 2 * scales * x
+    for optimizer in (Nesterov(0.004), Adam(0.1), BacktrackingLineSearch()):
+        history = minimize(f, grad, [1.0, 1.0], optimizer, n_iterations=5000, tol=1e-6)
+        assert history.converged
+        np.testing.assert_allclose(history.x_values[-1], 0, atol=1e-5)
+
+
+@pytest.mark.filterwarnings('ignore:overflow:RuntimeWarning')
+def test_line_search_does_not_diverge_where_a_fixed_step_does():
+    fixed = minimize(function, derivative, 2.0, GradientDescent(1.5), n_iterations=2000)
+    assert not np.isfinite(fixed.y_values[-1])
+    assert fixed.n_iterations < 2000
+    searched = minimize(function, derivative, 2.0, BacktrackingLineSearch(learning_rate=1.5), n_iterations=100)
+    assert (np.diff(searched.y_values) <= 0).all()
+
+
+def test_gradient_tolerance_without_known_minimum():
+    history = minimize(function, derivative, -3.0, GradientDescent(), tol=1e-6)
+    assert history.converged and history.n_iterations == 0
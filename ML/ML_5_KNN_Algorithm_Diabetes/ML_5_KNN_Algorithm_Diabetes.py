@@ -1,18 +1,39 @@
 # Importing necessary libraries
-import pandas as pd
-import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.metrics import confusion_matrix, accuracy_score, precision_score, recall_score
-import seaborn as sns
-import matplotlib.pyplot as plt
+import os
+import sys
+
+# Shared helpers live in ML/ml_common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ml_common.compaction import MemoryReport, to_float32
+from ml_common.evaluation import Evaluator
+from ml_common.datasets import load_dataset
+from ml_common.figures import FigureRenderer
+from ml_common.lazy import lazy_import
+from ml_common.tracing import StageTrace
+
+# The plotting libraries load when the first figure is drawn, and scikit-learn in the stages
+# that use it, so the dataset diagnostics print without waiting for them
+plt = lazy_import('matplotlib.pyplot')
+sns = lazy_import('seaborn')
+
+# Wall time, CPU time, peak memory and row counts of every stage go to a JSON trace
+trace = StageTrace('ML_5_KNN_Algorithm_Diabetes')
+# Figures are shown, saved in the background or skipped depending on $ML_FIGURES (see ml_common/figures.py)
+figures = FigureRenderer('ML_5_KNN_Algorithm_Diabetes')
+# Memory saved by compact dtypes is printed when the script ends
+memory = MemoryReport('ML_5_KNN_Algorithm_Diabetes')
 
 # Step 1: Load the dataset
-url = 'https://www.kaggle.com/datasets/abdallamahgoub/diabetes/download'  # Change to actual file path if locally stored
-df = pd.read_csv(url)
+trace.stage("Step 1: Load the dataset")
+# diabetes.csv is resolved locally by name (see ml_common/datasets.py for the download source)
+# and read from the columnar cache after the first run
+df = load_dataset('diabetes')
+# The clinical measurements are small integers; each column is stored at its smallest width
+df = memory.compact(df, "Patient table")
+trace.rows(len(df))
 
 # Step 2: Data Preprocessing
+trace.stage("Step 2: Data Preprocessing")
 # Check for any null values
 print("Null values:\n", df.isnull().sum())
 
@@ -21,36 +42,66 @@ X = df.drop('Outcome', axis=1)
 y = df['Outcome']
 
 # Step 3: Split the dataset into training and testing sets
+trace.stage("Step 3: Split the dataset into training and testing sets")
+from sklearn.model_selection import train_test_split
+
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
+trace.rows(len(X_train))
 
 # Step 4: Data Normalization (KNN benefits from scaling)
+trace.stage("Step 4: Data Normalization")
+from sklearn.preprocessing import StandardScaler
+
+# Keep the unscaled training rows for the k sweep, which scales inside each fold
+X_train_unscaled = X_train
+# KNN only compares distances, which float32 resolves well enough for these eight features
 scaler = StandardScaler()
-X_train = scaler.fit_transform(X_train)
-X_test = scaler.transform(X_test)
+X_train = to_float32(scaler.fit_transform(X_train))
+X_test = to_float32(scaler.transform(X_test))
 
 # Step 5: Implement K-Nearest Neighbors
-k = 5  # Number of neighbors
+trace.stage("Step 5: Implement K-Nearest Neighbors")
+from sklearn.neighbors import KNeighborsClassifier
+from knn_sweep import cross_validated_sweep
+
+# Choose k by cross-validation on the training set. The neighbour lists are computed once per fold
+# for the largest candidate k and every smaller k (uniform and distance-weighted) is scored from them;
+# the folds run in parallel worker processes
+tune_k = True
+k = 5  # Number of neighbors (used when tune_k is False)
+if tune_k:
+    k_candidates = range(1, 31)
+    k_sweep = cross_validated_sweep(X_train_unscaled, y_train, k_candidates, n_splits=5, weights=('uniform',))
+    k = int(k_sweep.loc[k_sweep['accuracy_mean'].idxmax(), 'k'])
+    print(k_sweep.sort_values('accuracy_mean', ascending=False).head().to_string(index=False))
+    print(f"Selected k = {k} by 5-fold cross-validation")
+
 knn = KNeighborsClassifier(n_neighbors=k)
 knn.fit(X_train, y_train)
 
 # Step 6: Make Predictions
-y_pred = knn.predict(X_test)
-
-# Step 7: Compute Performance Metrics
+trace.stage("Step 6: Make Predictions")
+# The evaluator runs the model once and caches the predictions
+evaluator = Evaluator()
+result = evaluator.evaluate(knn, X_test, y_test, name=f"KNN (k={k})")
+y_pred = result.y_pred
+
+# Step 7: Compute Performance Metrics (all derived from the cached predictions)
+trace.stage("Step 7: Compute Performance Metrics")
 # Confusion Matrix
-conf_matrix = confusion_matrix(y_test, y_pred)
+conf_matrix = result.confusion_matrix
 
 # Accuracy
-accuracy = accuracy_score(y_test, y_pred)
+accuracy = result.accuracy
 
 # Error Rate
-error_rate = 1 - accuracy
+error_rate = result.error_rate
 
 # Precision
-precision = precision_score(y_test, y_pred)
+precision = result.precision
 
 # Recall
-recall = recall_score(y_test, y_pred)
+recall = result.recall
 
 # Print results
 print("Confusion Matrix:\n", conf_matrix)
@@ -60,21 +111,28 @@ print(f"Precision: {precision:.4f}")
 print(f"Recall: {recall:.4f}")
 
 # Step 8: Visualizations
+trace.stage("Step 8: Visualizations")
 # Confusion Matrix Heatmap
-plt.figure(figsize=(6, 4))
-sns.heatmap(conf_matrix, annot=True, fmt="d", cmap="Blues", xticklabels=["No Diabetes", "Diabetes"], yticklabels=["No Diabetes", "Diabetes"])
-plt.xlabel("Predicted Labels")
-plt.ylabel("True Labels")
-plt.title("Confusion Matrix")
-plt.show()
+def plot_confusion_matrix(conf_matrix):
+    plt.figure(figsize=(6, 4))
+    sns.heatmap(conf_matrix, annot=True, fmt="d", cmap="Blues", xticklabels=["No Diabetes", "Diabetes"], yticklabels=["No Diabetes", "Diabetes"])
+    plt.xlabel("Predicted Labels")
+    plt.ylabel("True Labels")
+    plt.title("Confusion Matrix")
+
+
+figures.render('confusion_matrix', plot_confusion_matrix, conf_matrix)
 
 # Performance Metrics Bar Plot
 metrics = ["Accuracy", "Error Rate", "Precision", "Recall"]
 values = [accuracy, error_rate, precision, recall]
 
-plt.figure(figsize=(8, 5))
-sns.barplot(x=metrics, y=values, palette="viridis")
-plt.ylim(0, 1)
-plt.title("KNN Performance Metrics")
-plt.ylabel("Score")
-plt.show()
+def plot_metrics(metrics, values):
+    plt.figure(figsize=(8, 5))
+    sns.barplot(x=metrics, y=values, palette="viridis")
+    plt.ylim(0, 1)
+    plt.title("KNN Performance Metrics")
+    plt.ylabel("Score")
+
+
+figures.render('metrics', plot_metrics, metrics, values)
@@ -0,0 +1,103 @@
+# Single-pass multi-k KNN sweep
+# The neighbour lists are computed once for the largest k; predictions and metrics for
+# every smaller k, with uniform or distance-weighted voting, are derived from them.
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import StratifiedKFold
+from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import StandardScaler
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ml_common.parallel import process_pool
+
+
+def neighbour_lists(X_train, X_query, k_max):
+    """Distances and indices of the k_max nearest training rows, nearest first."""
+    return NearestNeighbors(n_neighbors=k_max).fit(X_train).kneighbors(X_query)
+
+
+def _vote_weights(distances, weights):
+    if weights == 'uniform':
+        return np.ones_like(distances)
+    # Same rule as scikit-learn: rows with an exact match vote only with the exact matches
+    with np.errstate(divide='ignore'):
+        inverse = 1.0 / distances
+    exact = np.isinf(inverse)
+    exact_rows = exact.any(axis=1)
+    inverse[exact_rows] = exact[exact_rows]
+    return inverse
+
+
+def predictions_for_all_k(y_train, distances, indices, k_values, weights='uniform'):
+    """Predicted labels for every k in k_values from one set of neighbour lists.
+
+    Returns (classes, {k: y_pred}). Vote totals are cumulative sums over the
+    neighbour axis, so the cost is one pass over the lists for all k together.
+    Ties go to the smallest class label, as in KNeighborsClassifier.
+    """
+    classes, y_encoded = np.unique(np.asarray(y_train), return_inverse=True)
+    neighbour_labels = y_encoded[indices]
+    vote_weights = _vote_weights(distances, weights)
+
+    # votes[:, j, c] = total weight of class c among the j + 1 nearest neighbours
+    one_hot = neighbour_labels[:, :, None] == np.arange(len(classes))
+    votes = np.cumsum(one_hot * vote_weights[:, :, None], axis=1)
+    return classes, {k: classes[votes[:, k - 1].argmax(axis=1)] for k in k_values}
+
+
+def sweep_scores(y_true, predictions, weights='uniform', positive_label=1):
+    """Accuracy, error rate, precision and recall for each k's predictions."""
+    y_true = np.asarray(y_true)
+    actual = y_true == positive_label
+    rows = []
+    for k, y_pred in predictions.items():
+        predicted = y_pred == positive_label
+        true_positives = np.sum(predicted & actual)
+        accuracy = np.mean(y_pred == y_true)
+        rows.append({
+            'k': k,
+            'weights': weights,
+            'accuracy': accuracy,
+            'error_rate': 1 - accuracy,
+            'precision': true_positives / predicted.sum() if predicted.any() else 0.0,
+            'recall': true_positives / actual.sum() if actual.any() else 0.0,
+        })
+    return pd.DataFrame(rows)
+
+
+def sweep_k(X_train, y_train, X_test, y_test, k_values, weights=('uniform', 'distance')):
+    """Scores for every k and voting scheme with a single neighbour query."""
+    k_values = sorted(k_values)
+    distances, indices = neighbour_lists(X_train, X_test, k_values[-1])
+    frames = [sweep_scores(y_test, predictions_for_all_k(y_train, distances, indices, k_values, w)[1], w)
+              for w in weights]
+    return pd.concat(frames, ignore_index=True)
+
+
+def _fold_sweep(X, y, train_rows, test_rows, k_values, weights, fold):
+    # Scale inside the fold so no test statistics leak into training
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X[train_rows])
+    X_test = scaler.transform(X[test_rows])
+    scores = sweep_k(X_train, y[train_rows], X_test, y[test_rows], k_values, weights)
+    scores['fold'] = fold
+    return scores
+
+
+def cross_validated_sweep(X, y, k_values, n_splits=5, weights=('uniform', 'distance'), n_jobs=None, random_state=42):
+    """Mean and standard deviation of the sweep scores over stratified CV folds.
+
+    Each fold runs in its own worker process (see ml_common.parallel).
+    """
+    X, y = np.asarray(X, dtype=np.float64), np.asarray(y)
+    folds = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state).split(X, y)
+    with process_pool(min(n_jobs or n_splits, n_splits)) as pool:
+        jobs = [pool.submit(_fold_sweep, X, y, train_rows, test_rows, k_values, weights, fold)
+                for fold, (train_rows, test_rows) in enumerate(folds)]
+        scores = pd.concat([job.result() for job in jobs], ignore_index=True)
+    summary = scores.drop(columns='fold').groupby(['weights', 'k']).agg(['mean', 'std'])
+    summary.columns = [f'{metric}_{stat}' for metric, stat in summary.columns]
+    return summary.reset_index()
@@ -0,0 +1,67 @@
+# Tests of the single-pass multi-k sweep against one KNeighborsClassifier per k
+import numpy as np
+import pytest
+from sklearn import metrics
+from sklearn.model_selection import StratifiedKFold
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.preprocessing import StandardScaler
+
+from knn_sweep import cross_validated_sweep, neighbour_lists, predictions_for_all_k, sweep_k
+
+K_VALUES = [1, 2, 3, 5, 8, 13]
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 4))
+    y = (X[:, 0] + X[:, 1] ** 2 + rng.normal(0, 0.7, 400) > 1).astype(np.int64)
+    # Query rows that are also training rows have a neighbour at distance zero
+    return X[:300], y[:300], np.vstack([X[300:], X[:10]]), np.concatenate([y[300:], y[:10]])
+
+
+@pytest.mark.parametrize('weights', ['uniform', 'distance'])
+def test_matches_one_classifier_per_k(data, weights):
+    X_train, y_train, X_test, _ = data
+    distances, indices = neighbour_lists(X_train, X_test, max(K_VALUES))
+    classes, predictions = predictions_for_all_k(y_train, distances, indices, K_VALUES, weights)
+    np.testing.assert_array_equal(classes, [0, 1])
+    for k in K_VALUES:
+        expected = KNeighborsClassifier(n_neighbors=k, weights=weights).fit(X_train, y_train).predict(X_test)
+        np.testing.assert_array_equal(predictions[k], expected, err_msg=f'k={k}')
+
+
+def test_string_labels(data):
+    X_train, y_train, X_test, _ = data
+    labels = np.array(['healthy', 'diabetic'])[y_train]
+    distances, indices = neighbour_lists(X_train, X_test, 4)
+    _, predictions = predictions_for_all_k(labels, distances, indices, [4])
+    expected = KNeighborsClassifier(n_neighbors=4).fit(X_train, labels).predict(X_test)
+    np.testing.assert_array_equal(predictions[4], expected)
+
+
+def test_scores_match_sklearn(data):
+    X_train, y_train, X_test, y_test = data
+    scores = sweep_k(X_train, y_train, X_test, y_test, K_VALUES[::-1])
+    assert len(scores) == 2 * len(K_VALUES)
+    for row in scores.itertuples():
+        y_pred = KNeighborsClassifier(n_neighbors=row.k, weights=row.weights).fit(X_train, y_train).predict(X_test)
+        assert row.accuracy == pytest.approx(metrics.accuracy_score(y_test, y_pred))
+        assert row.error_rate == pytest.approx(1 - row.accuracy)
+        assert row.precision == pytest.approx(metrics.precision_score(y_test, y_pred, zero_division=0))
+        assert row.recall == pytest.approx(metrics.recall_score(y_test, y_pred))
+
+
+def test_cross_validated_sweep_matches_per_fold_classifiers(data):
+    X, y = data[0], data[1]
+    summary = cross_validated_sweep(X, y, [3, 7], n_splits=3, weights=('uniform',), n_jobs=1)
+    folds = StratifiedKFold(n_splits=3, shuffle=True, random_state=42).split(X, y)
+    accuracies = {3: [], 7: []}
+    for train_rows, test_rows in folds:
+        scaler = StandardScaler().fit(X[train_rows])
+        for k in accuracies:
+            model = KNeighborsClassifier(n_neighbors=k).fit(scaler.transform(X[train_rows]), y[train_rows])
+            accuracies[k].append(model.score(scaler.transform(X[test_rows]), y[test_rows]))
+    assert list(summary['k']) == [3, 7]
+    np.testing.assert_allclose(summary['accuracy_mean'], [np.mean(accuracies[3]), np.mean(accuracies[7])])
+    np.testing.assert_allclose(summary['accuracy_std'], [np.std(accuracies[3], ddof=1), np.std(accuracies[7], ddof=1)])
@@ -1,64 +1,135 @@
 # Import necessary libraries
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import silhouette_score
+import os
+import sys
+
+# Shared helpers live in ML/ml_common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ml_common.compaction import MemoryReport, to_float32
+from ml_common.datasets import load_dataset
+from ml_common.figures import FigureRenderer
+from ml_common.lazy import lazy_import
+from ml_common.model_cache import ModelCache
+from ml_common.tracing import StageTrace
+
+# The plotting libraries load when the first figure is drawn, and scikit-learn in the stages
+# that use it, so the dataset diagnostics print without waiting for them
+plt = lazy_import('matplotlib.pyplot')
+sns = lazy_import('seaborn')
+
+# Wall time, CPU time, peak memory and row counts of every stage go to a JSON trace
+trace = StageTrace('ML_6_KMeansClustering_Sales_Data')
+# Figures are shown, saved in the background or skipped depending on $ML_FIGURES (see ml_common/figures.py)
+figures = FigureRenderer('ML_6_KMeansClustering_Sales_Data')
+# Memory saved by compact dtypes is printed when the script ends
+memory = MemoryReport('ML_6_KMeansClustering_Sales_Data')
 
 # Step 1: Load the dataset
-url = 'https://www.kaggle.com/datasets/kyanyoga/sample-sales-data/download'  # Update if stored locally
-df = pd.read_csv(url)
+trace.stage("Step 1: Load the dataset")
+# sales_data_sample.csv is resolved locally by name (see ml_common/datasets.py for the download
+# source and its latin-1 encoding) and read from the columnar cache after the first run
+df = load_dataset('sales')
+trace.rows(len(df))
 
 # Step 2: Data Preprocessing
+trace.stage("Step 2: Data Preprocessing")
 # Dropping unnecessary columns for clustering (ORDERNUMBER, ORDERDATE, etc.)
 df = df[['QUANTITYORDERED', 'PRICEEACH', 'SALES', 'MONTH_ID', 'YEAR_ID']]
+# Quantities, months and years fit in one- and two-byte integers
+df = memory.compact(df, "Order features")
 
 # Check for any null values
 print("Null values:\n", df.isnull().sum())
 
 # Scaling the data for K-means
+trace.stage("Step 2: Scale the data")
+from sklearn.preprocessing import StandardScaler
+
+# KMeans and the silhouette run in float32: the inertia curve, elbow and scores match float64
 scaler = StandardScaler()
-scaled_data = scaler.fit_transform(df)
+scaled_data = to_float32(scaler.fit_transform(df))
 
 # Step 3: Determine the optimal number of clusters using the Elbow Method
-inertia = []
-K_range = range(1, 11)
+trace.stage("Step 3: Elbow search")
+from kmeans_elbow import ElbowSearch
 
-for k in K_range:
-    kmeans = KMeans(n_clusters=k, random_state=42)
-    kmeans.fit(scaled_data)
-    inertia.append(kmeans.inertia_)
+# Each k is warm-started from the centroids found for k-1. On tables of 50k+ rows the k values are
+# fitted in parallel processes (one warm-started run of consecutive k per core); this table is
+# small enough that the whole search runs in-process faster than worker processes would start
+# Every k >= 2 also gets a silhouette score, computed in bounded-memory row blocks
+# (set silhouette_sample_size to switch to the stratified-sample estimate on large tables)
+# The fitted search (every k's model and scores) is cached under a hash of the data and its settings
+K_range = range(1, 11)
+elbow = ModelCache().fit_or_load(ElbowSearch(K_range, random_state=42, silhouette=True, silhouette_sample_size=None),
+                                 scaled_data)
+inertia = elbow.inertia_
+for k, score in elbow.silhouette_.items():
+    print(f"k={k}: inertia {elbow.models_[k].inertia_:.1f}, silhouette {score}")
 
+trace.stage("Step 3: Plot the Elbow Graph")
 # Plot the Elbow Graph
-plt.figure(figsize=(8, 5))
-plt.plot(K_range, inertia, marker='o')
-plt.xlabel("Number of Clusters (k)")
-plt.ylabel("Inertia")
-plt.title("Elbow Method for Optimal k")
-plt.show()
-
-# Step 4: Apply K-Means with Optimal Number of Clusters (e.g., using k=4 after analyzing elbow plot)
-optimal_k = 4  # Replace based on elbow plot observation
-kmeans = KMeans(n_clusters=optimal_k, random_state=42)
-df['Cluster'] = kmeans.fit_predict(scaled_data)
+def plot_elbow(K_range, inertia):
+    plt.figure(figsize=(8, 5))
+    plt.plot(K_range, inertia, marker='o')
+    plt.xlabel("Number of Clusters (k)")
+    plt.ylabel("Inertia")
+    plt.title("Elbow Method for Optimal k")
+
+
+figures.render('elbow', plot_elbow, K_range, inertia)
+
+# Step 4: Apply K-Means with the Optimal Number of Clusters
+trace.stage("Step 4: Apply K-Means with the Optimal Number of Clusters")
+# The elbow is detected automatically and the model already fitted for it is reused (no refit)
+optimal_k = elbow.optimal_k_
+print(f"Elbow detected at k={optimal_k}")
+kmeans = elbow.best_model_
+df['Cluster'] = kmeans.labels_
 
 # Step 5: Visualizations
+trace.stage("Step 5: Visualizations")
+# Both plots draw a random sample of at most figures.point_budget orders
+plotted = figures.sample(df)
+
+
 # Scatter plot for two features colored by cluster
-plt.figure(figsize=(10, 6))
-sns.scatterplot(x=df['QUANTITYORDERED'], y=df['SALES'], hue=df['Cluster'], palette='viridis')
-plt.title("K-Means Clustering on Sales Data")
-plt.xlabel("Quantity Ordered")
-plt.ylabel("Sales")
-plt.legend(title='Cluster')
-plt.show()
+def plot_clusters(plotted):
+    plt.figure(figsize=(10, 6))
+    sns.scatterplot(x=plotted['QUANTITYORDERED'], y=plotted['SALES'], hue=plotted['Cluster'], palette='viridis')
+    plt.title("K-Means Clustering on Sales Data")
+    plt.xlabel("Quantity Ordered")
+    plt.ylabel("Sales")
+    plt.legend(title='Cluster')
+
 
 # Pair plot of features with cluster color for deeper analysis
-sns.pairplot(df, hue='Cluster', palette='viridis', diag_kind='kde', markers='o')
-plt.suptitle("Pair Plot of Features with Clusters", y=1.02)
-plt.show()
+def plot_pairs(plotted):
+    sns.pairplot(plotted, hue='Cluster', palette='viridis', diag_kind='kde', markers='o')
+    plt.suptitle("Pair Plot of Features with Clusters", y=1.02)
+
 
-# Optional: Print silhouette score
-silhouette_avg = silhouette_score(scaled_data, df['Cluster'])
+figures.render('clusters', plot_clusters, plotted)
+figures.render('pair_plot', plot_pairs, plotted)
+
+trace.stage("Silhouette score")
+from silhouette import silhouette_score_chunked
+
+# Optional: Print silhouette score (already computed in the elbow loop, in bounded-memory blocks)
+if optimal_k in elbow.silhouette_:
+    silhouette_avg = float(elbow.silhouette_[optimal_k])
+else:
+    silhouette_avg = silhouette_score_chunked(scaled_data, df['Cluster'])
 print(f"Silhouette Score for k={optimal_k}: {silhouette_avg:.4f}")
+
+# Step 6: Assign incoming orders to clusters as they arrive
+trace.stage("Step 6: Assign incoming orders to clusters as they arrive")
+from online_clusters import OnlineClusterAssigner, iter_order_batches
+
+# Set order_feed to a CSV of new orders (same columns as the sales data). Each batch is assigned
+# to the nearest centroid, the centroids and scaler are updated incrementally, and a drift in the
+# feed triggers a warm-started refit on the most recent orders.
+order_feed = None
+if order_feed is not None:
+    online = OnlineClusterAssigner.from_model(scaler, kmeans, scaled_data)
+    new_labels = [online.partial_fit(batch) for batch in iter_order_batches(order_feed)]
+    print(f"Assigned {sum(len(labels) for labels in new_labels)} new orders, refits on drift: {online.n_refits}")
+    df['Cluster'] = online.assign(df)
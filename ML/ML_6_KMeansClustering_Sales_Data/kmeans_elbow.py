@@ -0,0 +1,135 @@
+# Warm-started, parallel elbow search for KMeans
+# The fit for k is seeded from the centroids found for the previous k plus the missing
+# centroids drawn with k-means++ (D^2) sampling. On large data the k values are evaluated in
+# parallel: the k range is cut into one contiguous run per worker process, and each run is a
+# warm-started chain whose first k is cold-started. Small data (or a single core) is fitted
+# in-process as one chain, since starting workers costs more than the fits themselves (the
+# whole sales search takes about 60 ms). The elbow is then picked automatically.
+import os
+import sys
+
+import numpy as np
+from sklearn.cluster import KMeans
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ml_common.parallel import SerialExecutor, max_workers_limit, process_pool
+from silhouette import silhouette_score_chunked, silhouette_score_sampled
+
+# Data shared with forked workers so it is not pickled for every job
+_SHARED = {}
+
+
+def _sq_distances(X, x_sq, centroids):
+    """Squared distance of every row of X to every centroid, as ||x||^2 - 2 x.c + ||c||^2."""
+    c_sq = np.einsum('ij,ij->i', centroids, centroids)
+    sq_dist = x_sq[:, None] - 2 * (X @ centroids.T) + c_sq[None, :]
+    return np.maximum(sq_dist, 0, out=sq_dist)
+
+
+def _fit_candidate(k, previous_centroids, seed):
+    X = _SHARED['X']
+    if previous_centroids is None or len(previous_centroids) >= k:
+        model = KMeans(n_clusters=k, n_init=1, random_state=seed)
+    else:
+        # Add the missing centroids one at a time, each sampled with probability proportional
+        # to the squared distance to the nearest centroid chosen so far
+        rng = np.random.default_rng(seed)
+        x_sq = np.einsum('ij,ij->i', X, X)
+        sq_dist = _sq_distances(X, x_sq, previous_centroids).min(axis=1)
+        centroids = [previous_centroids]
+        for _ in range(k - len(previous_centroids)):
+            total = sq_dist.sum()
+            new_row = rng.choice(len(X), p=sq_dist / total) if total > 0 else rng.integers(len(X))
+            centroids.append(X[new_row][None, :])
+            np.minimum(sq_dist, _sq_distances(X, x_sq, centroids[-1])[:, 0], out=sq_dist)
+        model = KMeans(n_clusters=k, init=np.vstack(centroids), n_init=1, random_state=seed)
+    return model.fit(X)
+
+
+def _fit_chain(k_values, n_candidates, seed):
+    # Fits for consecutive k, each warm-started from the previous one (the first is cold-started)
+    models, previous_centroids = [], None
+    for k in k_values:
+        # A cold start with k = 1 has nothing to vary, one candidate is enough
+        n_tries = n_candidates if previous_centroids is not None or k > 1 else 1
+        best = min((_fit_candidate(k, previous_centroids, seed + i) for i in range(n_tries)),
+                   key=lambda model: model.inertia_)
+        models.append(best)
+        previous_centroids = best.cluster_centers_
+    return models
+
+
+def find_elbow(k_values, inertia):
+    """k at the elbow of the inertia curve.
+
+    Both axes are scaled to [0, 1] and the elbow is the point farthest below
+    the straight line joining the first and last points (the "kneedle" rule).
+    """
+    k_values = np.asarray(k_values, dtype=np.float64)
+    inertia = np.asarray(inertia, dtype=np.float64)
+    if len(k_values) < 3:
+        return int(k_values[0])
+    x = (k_values - k_values[0]) / (k_values[-1] - k_values[0])
+    span = inertia[0] - inertia[-1]
+    y = (inertia - inertia[-1]) / span if span > 0 else np.zeros_like(inertia)
+    # For a decreasing convex curve the line runs from (0, 1) to (1, 0)
+    gap = (1 - x) - y
+    return int(k_values[np.argmax(gap)])
+
+
+class ElbowSearch:
+    """Fits KMeans for every k in k_range and keeps the fitted models.
+
+    models_[k] is the best of `n_candidates` warm-started fits for k,
+    inertia_ lists their inertia in k order and optimal_k_ is the elbow.
+    With `parallel_min_rows` rows or more and several workers (n_jobs, at
+    most one per k), the k values are fitted in parallel processes as one
+    warm-started chain per worker over consecutive k; smaller data is fitted
+    in-process as a single chain.
+    With silhouette=True every k >= 2 is also scored into silhouette_[k]:
+    exactly in bounded-memory blocks, or as a stratified-sample estimate
+    when silhouette_sample_size is set and smaller than the data.
+    """
+
+    def __init__(self, k_range=range(1, 11), n_candidates=1, n_jobs=None, random_state=42,
+                 silhouette=False, silhouette_sample_size=None, parallel_min_rows=50_000):
+        self.k_range = list(k_range)
+        self.n_candidates = n_candidates
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.silhouette = silhouette
+        self.silhouette_sample_size = silhouette_sample_size
+        self.parallel_min_rows = parallel_min_rows
+
+    def fit(self, X):
+        # float32 input is kept as is (KMeans runs natively in float32), anything else becomes float64
+        X = np.asarray(X)
+        _SHARED['X'] = X if X.dtype == np.float32 else X.astype(np.float64)
+        n_workers = min(self.n_jobs or len(self.k_range), len(self.k_range), max_workers_limit())
+        parallel = n_workers > 1 and len(X) >= self.parallel_min_rows
+        chains = [[int(k) for k in chain] for chain in np.array_split(self.k_range, n_workers if parallel else 1)]
+        try:
+            with process_pool(n_workers) if parallel else SerialExecutor() as pool:
+                jobs = [pool.submit(_fit_chain, chain, self.n_candidates, self.random_state) for chain in chains]
+                models = [model for job in jobs for model in job.result()]
+        finally:
+            _SHARED.clear()
+        self.models_ = dict(zip(self.k_range, models))
+        self.inertia_ = [model.inertia_ for model in models]
+        self.optimal_k_ = find_elbow(self.k_range, self.inertia_)
+        if self.silhouette:
+            self.silhouette_ = {k: self.score_silhouette(X, self.models_[k].labels_)
+                                for k in self.k_range if 2 <= k < len(X)}
+        return self
+
+    def score_silhouette(self, X, labels):
+        """Silhouette score (float) or sampled estimate (SilhouetteEstimate) of one labelling."""
+        if self.silhouette_sample_size and self.silhouette_sample_size < len(X):
+            return silhouette_score_sampled(X, labels, sample_size=self.silhouette_sample_size,
+                                            random_state=self.random_state)
+        return silhouette_score_chunked(X, labels)
+
+    @property
+    def best_model_(self):
+        """The already fitted model for the elbow k."""
+        return self.models_[self.optimal_k_]
@@ -0,0 +1,144 @@
+# Streaming cluster assignment for incoming sales orders
+# New orders are assigned to the existing centroids in vectorized batches. The
+# centroids (mini-batch KMeans updates) and the scaler statistics are updated
+# incrementally, and a drift check triggers a full refit on a bounded window
+# of recent orders when the clustering no longer fits the feed.
+import copy
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+
+FEATURES = ['QUANTITYORDERED', 'PRICEEACH', 'SALES', 'MONTH_ID', 'YEAR_ID']
+
+
+class OnlineClusterAssigner:
+    """Keeps KMeans cluster labels fresh under a continuous order feed.
+
+    Centroids are stored in original units and scaled with the current
+    scaler statistics whenever distances are needed, so the incremental
+    scaler and centroid updates stay consistent with each other.
+
+    Drift is flagged when the running (exponentially weighted) mean squared
+    distance of new orders to their centroid exceeds the baseline of the
+    last full fit by more than `drift_tolerance` (relative), or when a
+    feature's running (exponentially weighted) batch mean moves by more than
+    `mean_shift_tolerance` baseline standard deviations. Both use
+    `ewma_alpha`, so they track recent batches rather than everything seen
+    since the last fit. A flagged drift refits KMeans on the
+    most recent `window_size` orders, warm-started from the current
+    centroids.
+    """
+
+    def __init__(self, scaler, centroids_scaled, features=FEATURES, baseline_sq_distance=None,
+                 drift_tolerance=0.5, mean_shift_tolerance=0.5, ewma_alpha=0.1,
+                 window_size=50_000, random_state=42):
+        # Work on a copy of the scaler; it is fed plain arrays from here on
+        self.scaler = copy.deepcopy(scaler)
+        if hasattr(self.scaler, 'feature_names_in_'):
+            del self.scaler.feature_names_in_
+        self.features = list(features)
+        self.centroids = scaler.inverse_transform(centroids_scaled)
+        self.counts = np.zeros(len(self.centroids))
+        self.baseline_sq_distance = baseline_sq_distance
+        self.drift_tolerance = drift_tolerance
+        self.mean_shift_tolerance = mean_shift_tolerance
+        self.ewma_alpha = ewma_alpha
+        self.window_size = window_size
+        self.random_state = random_state
+        self._reset_baseline()
+        self.recent = np.empty((0, len(self.features)))
+        self.n_seen = 0
+        self.n_refits = 0
+
+    @classmethod
+    def from_model(cls, scaler, kmeans, X_scaled, **kwargs):
+        """Start from a batch-fitted scaler and KMeans model (and the data it was fitted on)."""
+        assigner = cls(scaler, kmeans.cluster_centers_,
+                       baseline_sq_distance=kmeans.inertia_ / len(X_scaled), **kwargs)
+        assigner.counts = np.bincount(kmeans.labels_, minlength=kmeans.n_clusters).astype(np.float64)
+        assigner._remember(scaler.inverse_transform(X_scaled))
+        return assigner
+
+    def _reset_baseline(self):
+        self.baseline_mean = self.scaler.mean_.copy()
+        self.baseline_scale = self.scaler.scale_.copy()
+        self.running_mean = self.baseline_mean.copy()
+        self.running_sq_distance = self.baseline_sq_distance
+
+    def _values(self, orders):
+        if isinstance(orders, pd.DataFrame):
+            orders = orders[self.features]
+        return np.asarray(orders, dtype=np.float64)
+
+    def _nearest(self, X_scaled):
+        centroids_scaled = self.scaler.transform(self.centroids)
+        sq_dist = ((X_scaled[:, None, :] - centroids_scaled[None, :, :]) ** 2).sum(axis=2)
+        labels = sq_dist.argmin(axis=1)
+        return labels, sq_dist[np.arange(len(labels)), labels]
+
+    def assign(self, orders):
+        """Cluster labels of a batch of orders, without changing any state."""
+        return self._nearest(self.scaler.transform(self._values(orders)))[0]
+
+    def _remember(self, X):
+        # Keep only the most recent window of orders for refits
+        self.recent = np.vstack([self.recent, X[-self.window_size:]])[-self.window_size:]
+        self.n_seen += len(X)
+
+    def partial_fit(self, orders):
+        """Assign a batch, update scaler and centroids, check for drift.
+
+        Returns the labels of the batch (after a refit, if one was triggered).
+        """
+        X = self._values(orders)
+        self.scaler.partial_fit(X)
+        labels, sq_dist = self._nearest(self.scaler.transform(X))
+
+        # Mini-batch KMeans update: each centroid moves towards its points with a
+        # per-centroid learning rate of 1 / (number of points it has absorbed)
+        for cluster in np.unique(labels):
+            members = X[labels == cluster]
+            self.counts[cluster] += len(members)
+            eta = len(members) / self.counts[cluster]
+            self.centroids[cluster] = (1 - eta) * self.centroids[cluster] + eta * members.mean(axis=0)
+
+        batch_sq_distance = sq_dist.mean()
+        if self.running_sq_distance is None:
+            self.running_sq_distance = self.baseline_sq_distance = batch_sq_distance
+        else:
+            self.running_sq_distance += self.ewma_alpha * (batch_sq_distance - self.running_sq_distance)
+        # Not the scaler's cumulative mean, which responds less to each batch the more it has seen
+        self.running_mean += self.ewma_alpha * (X.mean(axis=0) - self.running_mean)
+        self._remember(X)
+
+        if self.drift_detected():
+            self.refit()
+            labels = self.assign(X)
+        return labels
+
+    def drift_detected(self):
+        distance_drift = self.running_sq_distance > self.baseline_sq_distance * (1 + self.drift_tolerance)
+        mean_shift = np.abs(self.running_mean - self.baseline_mean) / self.baseline_scale
+        return bool(distance_drift or (mean_shift > self.mean_shift_tolerance).any())
+
+    def refit(self):
+        """Full KMeans refit on the recent window, warm-started from the current centroids."""
+        self.scaler = StandardScaler().fit(self.recent)
+        X_scaled = self.scaler.transform(self.recent)
+        kmeans = KMeans(n_clusters=len(self.centroids), init=self.scaler.transform(self.centroids),
+                        n_init=1, random_state=self.random_state).fit(X_scaled)
+        self.centroids = self.scaler.inverse_transform(kmeans.cluster_centers_)
+        self.counts = np.bincount(kmeans.labels_, minlength=len(self.centroids)).astype(np.float64)
+        self.baseline_sq_distance = kmeans.inertia_ / len(X_scaled)
+        self._reset_baseline()
+        self.n_refits += 1
+        return kmeans
+
+
+def iter_order_batches(path, batch_size=500, features=FEATURES):
+    """Batches of new orders from a CSV laid out like sales_data_sample.csv."""
+    with pd.read_csv(path, usecols=features, chunksize=batch_size, encoding='latin1') as reader:
+        for batch in reader:
+            yield batch
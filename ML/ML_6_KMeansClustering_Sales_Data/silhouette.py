@@ -0,0 +1,134 @@
+# Bounded-memory silhouette scoring
+# Distances are computed for a block of rows at a time and reduced to per-cluster sums right
+# away. The block height is derived from a byte budget (memory_budget, default 64 MiB), so
+# the block x n distance temporaries stay within it however large n gets, and X is used in
+# its own floating dtype instead of being copied to float64.
+# A stratified-sampling estimator with a confidence interval covers very large runs.
+from statistics import NormalDist
+
+import numpy as np
+
+DEFAULT_MEMORY_BUDGET = 64 * 2 ** 20
+
+
+def _encode(labels):
+    _, encoded, counts = np.unique(np.asarray(labels), return_inverse=True, return_counts=True)
+    return encoded, counts
+
+
+def block_rows(n, itemsize, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Rows per block so that the block's distance temporaries fit in memory_budget bytes."""
+    # Per block row: the dot products (X's dtype), the float64 distances and, at most, a
+    # float64 copy of one cluster's columns
+    return max(1, int(memory_budget // ((itemsize + 16) * n)))
+
+
+def silhouette_values(X, labels, rows=None, block_size=None, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Silhouette coefficient of each row in `rows` (default: every row).
+
+    Each value is exact: it uses the distances to all n points, as
+    sklearn.metrics.silhouette_samples does, including the convention that
+    points in singleton clusters score 0. block_size overrides the number of
+    rows per block that memory_budget would give.
+    """
+    X = np.asarray(X)
+    if X.dtype.kind != 'f':
+        X = X.astype(np.float64)
+    encoded, counts = _encode(labels)
+    n_clusters = len(counts)
+    if not 2 <= n_clusters <= len(X) - 1:
+        raise ValueError(f"Number of labels is {n_clusters}. Valid values are 2 to n_samples - 1 (inclusive)")
+    rows = np.arange(len(X)) if rows is None else np.asarray(rows)
+    block_size = block_size or block_rows(len(X), X.dtype.itemsize, memory_budget)
+
+    # Column indices of each cluster (n integers in total, instead of an n x k one-hot matrix)
+    members = [np.flatnonzero(encoded == c) for c in range(n_clusters)]
+    sq_norms = np.einsum('ij,ij->i', X, X, dtype=np.float64)
+
+    values = np.empty(len(rows))
+    cluster_sums = np.empty((min(block_size, len(rows)), n_clusters))
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        # |x|^2 - 2 x.y + |y|^2, accumulated in float64 in place
+        dist = np.multiply(X[block] @ X.T, -2.0, dtype=np.float64)
+        dist += sq_norms[block, None]
+        dist += sq_norms[None, :]
+        np.maximum(dist, 0.0, out=dist)
+        np.sqrt(dist, out=dist)
+        dist[np.arange(len(block)), block] = 0.0
+
+        # Sum of distances from each block row to every cluster
+        sums = cluster_sums[:len(block)]
+        for c, columns in enumerate(members):
+            sums[:, c] = dist[:, columns].sum(axis=1)
+        del dist
+        own = encoded[block]
+        own_counts = counts[own]
+        a = sums[np.arange(len(block)), own] / np.maximum(own_counts - 1, 1)
+        mean_to_others = sums / counts
+        mean_to_others[np.arange(len(block)), own] = np.inf
+        b = mean_to_others.min(axis=1)
+
+        s = (b - a) / np.maximum(a, b)
+        s[(own_counts == 1) | ~np.isfinite(s)] = 0.0
+        values[start:start + len(block)] = s
+    return values
+
+
+def silhouette_score_chunked(X, labels, block_size=None, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Exact mean silhouette coefficient with memory bounded by memory_budget."""
+    return float(silhouette_values(X, labels, block_size=block_size, memory_budget=memory_budget).mean())
+
+
+class SilhouetteEstimate:
+    """Sampled silhouette score with a normal-approximation confidence interval."""
+
+    def __init__(self, score, std_error, confidence, sample_size):
+        self.score = score
+        self.std_error = std_error
+        self.confidence = confidence
+        self.sample_size = sample_size
+        half_width = NormalDist().inv_cdf(0.5 + confidence / 2) * std_error
+        self.low = score - half_width
+        self.high = score + half_width
+
+    def __float__(self):
+        return self.score
+
+    def __repr__(self):
+        return (f"{self.score:.4f} ({self.confidence:.0%} CI {self.low:.4f} to {self.high:.4f}, "
+                f"n={self.sample_size})")
+
+
+def silhouette_score_sampled(X, labels, sample_size=2000, confidence=0.95, block_size=None,
+                             memory_budget=DEFAULT_MEMORY_BUDGET, random_state=42):
+    """Stratified-sample estimate of the mean silhouette coefficient.
+
+    Rows are sampled from each cluster in proportion to its size (at least
+    two per cluster) and scored exactly against the full dataset, so the
+    cost is O(sample_size * n) time within memory_budget bytes. The estimator
+    and its standard error are the usual stratified ones, with the
+    finite-population correction.
+    """
+    encoded, counts = _encode(labels)
+    n = len(encoded)
+    if sample_size >= n:
+        values = silhouette_values(X, labels, block_size=block_size, memory_budget=memory_budget)
+        return SilhouetteEstimate(float(values.mean()), 0.0, confidence, n)
+
+    rng = np.random.default_rng(random_state)
+    allocation = np.minimum(np.maximum(np.round(sample_size * counts / n).astype(int), 2), counts)
+    strata = [rng.choice(np.flatnonzero(encoded == c), size=allocation[c], replace=False)
+              for c in range(len(counts))]
+    values = silhouette_values(X, labels, rows=np.concatenate(strata), block_size=block_size,
+                               memory_budget=memory_budget)
+
+    weights = counts / n
+    score, variance, offset = 0.0, 0.0, 0
+    for c, size in enumerate(allocation):
+        stratum = values[offset:offset + size]
+        offset += size
+        score += weights[c] * stratum.mean()
+        if size > 1:
+            variance += weights[c] ** 2 * stratum.var(ddof=1) / size * (1 - size / counts[c])
+    return SilhouetteEstimate(float(score), float(np.sqrt(variance)), confidence, int(allocation.sum()))
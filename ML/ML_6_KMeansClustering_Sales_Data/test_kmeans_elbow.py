@@ -0,0 +1,59 @@
+# Tests of the warm-started elbow search
+import numpy as np
+import pytest
+from sklearn.datasets import make_blobs
+
+import kmeans_elbow
+from kmeans_elbow import ElbowSearch, find_elbow
+
+
+@pytest.fixture(scope='module')
+def blobs():
+    centers = [[0, 0, 0], [10, 0, 0], [0, 10, 0], [0, 0, 10]]
+    X, _ = make_blobs(1500, centers=centers, cluster_std=1.0, random_state=0)
+    return X
+
+
+def test_find_elbow():
+    k_values = np.arange(1, 9)
+    assert find_elbow(k_values, [100, 40, 12, 10, 9, 8, 7.5, 7]) == 3
+    assert find_elbow([1, 2], [10, 5]) == 1
+    # A flat curve has no elbow to speak of: the first k is returned
+    assert find_elbow(k_values, np.ones(8)) == 1
+
+
+def test_fits_every_k_and_finds_the_blobs(blobs):
+    search = ElbowSearch(range(1, 9)).fit(blobs)
+    assert sorted(search.models_) == list(range(1, 9))
+    assert all(search.models_[k].n_clusters == k for k in search.models_)
+    assert search.inertia_ == [search.models_[k].inertia_ for k in range(1, 9)]
+    assert search.optimal_k_ == 4
+    assert search.best_model_ is search.models_[4]
+
+
+def test_warm_start_keeps_the_previous_centroids(blobs):
+    kmeans_elbow._SHARED['X'] = blobs
+    try:
+        previous = kmeans_elbow._fit_candidate(3, None, seed=0).cluster_centers_
+        model = kmeans_elbow._fit_candidate(5, previous, seed=0)
+    finally:
+        kmeans_elbow._SHARED.clear()
+    np.testing.assert_array_equal(model.init[:3], previous)
+    assert model.init.shape == (5, blobs.shape[1])
+
+
+def test_parallel_chains_cover_every_k(blobs, monkeypatch):
+    monkeypatch.setenv('ML_MAX_WORKERS', '3')
+    serial = ElbowSearch(range(1, 9)).fit(blobs)
+    parallel = ElbowSearch(range(1, 9), parallel_min_rows=0).fit(blobs)
+    assert sorted(parallel.models_) == list(range(1, 9))
+    assert all(parallel.models_[k].n_clusters == k for k in parallel.models_)
+    # The first k of each chain is cold-started, so later inertias may differ slightly
+    np.testing.assert_allclose(parallel.inertia_, serial.inertia_, rtol=0.05)
+    assert parallel.optimal_k_ == serial.optimal_k_ == 4
+
+
+def test_silhouette_scores(blobs):
+    search = ElbowSearch(range(1, 6), silhouette=True).fit(blobs)
+    assert sorted(search.silhouette_) == [2, 3, 4, 5]
+    assert max(search.silhouette_, key=search.silhouette_.get) == 4
@@ -0,0 +1,94 @@
+# Tests of the streaming cluster assigner and its EWMA drift checks
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+
+from online_clusters import FEATURES, OnlineClusterAssigner, iter_order_batches
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ml_common.synthetic import sales_orders
+
+
+@pytest.fixture(scope='module')
+def orders():
+    return sales_orders(6000, seed=1)[FEATURES].astype(np.float64)
+
+
+@pytest.fixture
+def fitted(orders):
+    history = orders.iloc[:2000]
+    scaler = StandardScaler().fit(history)
+    X_scaled = scaler.transform(history)
+    kmeans = KMeans(n_clusters=4, n_init=4, random_state=0).fit(X_scaled)
+    return scaler, kmeans, X_scaled
+
+
+def batches(frame, size=200):
+    return [frame.iloc[start:start + size] for start in range(0, len(frame), size)]
+
+
+def test_assign_matches_kmeans_predict(fitted, orders):
+    scaler, kmeans, X_scaled = fitted
+    assigner = OnlineClusterAssigner.from_model(scaler, kmeans, X_scaled)
+    new = orders.iloc[2000:2500]
+    np.testing.assert_array_equal(assigner.assign(new), kmeans.predict(scaler.transform(new)))
+    # assign() changes nothing, and the caller's scaler is never updated
+    assigner.partial_fit(new)
+    np.testing.assert_array_equal(scaler.mean_, StandardScaler().fit(orders.iloc[:2000]).mean_)
+
+
+def test_stationary_feed_keeps_the_clustering(fitted, orders):
+    assigner = OnlineClusterAssigner.from_model(*fitted)
+    for batch in batches(orders.iloc[2000:]):
+        assigner.partial_fit(batch)
+    assert assigner.n_refits == 0
+    assert assigner.n_seen == len(orders)
+
+
+def test_running_mean_is_an_ewma_of_batch_means(fitted, orders):
+    assigner = OnlineClusterAssigner.from_model(*fitted, ewma_alpha=0.2)
+    expected = assigner.baseline_mean.copy()
+    for batch in batches(orders.iloc[2000:3000]):
+        assigner.partial_fit(batch)
+        expected += 0.2 * (batch.to_numpy().mean(axis=0) - expected)
+    np.testing.assert_allclose(assigner.running_mean, expected)
+
+
+def test_sustained_mean_shift_triggers_a_refit(fitted, orders):
+    assigner = OnlineClusterAssigner.from_model(*fitted, window_size=1000)
+    old_mean, old_scale = assigner.baseline_mean[0], assigner.baseline_scale[0]
+    shifted = orders.iloc[2000:4000].copy()
+    shifted['QUANTITYORDERED'] += 2 * old_scale
+    refit_after = None
+    for i, batch in enumerate(batches(shifted)):
+        assigner.partial_fit(batch)
+        if assigner.n_refits and refit_after is None:
+            refit_after = i + 1
+    # An EWMA with alpha=0.1 crosses a quarter of the shift after about three batches
+    assert refit_after is not None and refit_after <= 5
+    assert len(assigner.recent) == 1000
+    # The refit's baseline comes from the recent window, which now holds shifted orders
+    assert assigner.baseline_mean[0] > old_mean + 0.5 * old_scale
+
+
+def test_single_outlier_batch_does_not_trigger_a_refit(fitted, orders):
+    assigner = OnlineClusterAssigner.from_model(*fitted)
+    outlier = orders.iloc[2000:2200].copy()
+    outlier['QUANTITYORDERED'] += 3 * assigner.baseline_scale[0]
+    assigner.partial_fit(outlier)
+    for batch in batches(orders.iloc[2200:4000]):
+        assigner.partial_fit(batch)
+    assert assigner.n_refits == 0
+    np.testing.assert_allclose(assigner.running_mean, assigner.baseline_mean,
+                               atol=0.25 * assigner.baseline_scale.max())
+
+
+def test_order_batches_from_csv(tmp_path):
+    path = tmp_path / 'orders.csv'
+    sales_orders(1200, seed=2).to_csv(path, index=False, encoding='latin1')
+    sizes = [len(batch) for batch in iter_order_batches(str(path), batch_size=500)]
+    assert sizes == [500, 500, 200]
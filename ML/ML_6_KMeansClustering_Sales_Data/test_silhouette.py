@@ -0,0 +1,60 @@
+# Tests of the bounded-memory silhouette scores against sklearn's exact ones
+import numpy as np
+import pytest
+from sklearn.metrics import silhouette_samples, silhouette_score
+
+from silhouette import block_rows, silhouette_score_chunked, silhouette_score_sampled, silhouette_values
+
+
+@pytest.fixture(scope='module')
+def clusters():
+    rng = np.random.default_rng(0)
+    centers = np.array([[0, 0, 0], [4, 0, 1], [0, 5, -2], [3, 3, 3]])
+    labels = rng.choice(4, size=1500, p=[0.5, 0.25, 0.15, 0.1])
+    return centers[labels] + rng.normal(0, 1.2, (1500, 3)), labels
+
+
+@pytest.mark.parametrize('block_size', [None, 1, 97])
+def test_values_match_sklearn(clusters, block_size):
+    X, labels = clusters
+    np.testing.assert_allclose(silhouette_values(X, labels, block_size=block_size), silhouette_samples(X, labels),
+                               atol=1e-10)
+
+
+def test_singleton_clusters_and_subsets():
+    X = np.array([[0.0], [0.1], [0.2], [5.0], [9.0]])
+    labels = np.array(['a', 'a', 'a', 'b', 'c'])
+    np.testing.assert_allclose(silhouette_values(X, labels), silhouette_samples(X, labels))
+    np.testing.assert_allclose(silhouette_values(X, labels, rows=[4, 1]), silhouette_samples(X, labels)[[4, 1]])
+    with pytest.raises(ValueError, match='Number of labels'):
+        silhouette_values(X, np.zeros(5))
+
+
+def test_memory_budget_bounds_the_block(clusters):
+    X, labels = clusters
+    assert block_rows(len(X), 8, memory_budget=24 * len(X) * 10) == 10
+    assert block_rows(10 ** 9, 8) == 1
+    # float32 input is scored in float32, to about its precision
+    score = silhouette_score_chunked(X.astype(np.float32), labels, memory_budget=2 ** 16)
+    assert score == pytest.approx(silhouette_score(X, labels), abs=1e-5)
+
+
+def test_sampled_estimate(clusters):
+    X, labels = clusters
+    exact = silhouette_score(X, labels)
+    estimate = silhouette_score_sampled(X, labels, sample_size=300)
+    assert estimate.sample_size == 300
+    assert estimate.low < exact < estimate.high
+    assert abs(float(estimate) - exact) < 0.05
+    # A sample as large as the data is the exact score
+    full = silhouette_score_sampled(X, labels, sample_size=len(X))
+    assert float(full) == pytest.approx(exact) and full.std_error == 0.0
+
+
+def test_confidence_interval_coverage(clusters):
+    X, labels = clusters
+    exact = silhouette_score(X, labels)
+    covered = [silhouette_score_sampled(X, labels, sample_size=200, confidence=0.9, random_state=seed)
+               for seed in range(40)]
+    coverage = np.mean([estimate.low < exact < estimate.high for estimate in covered])
+    assert 0.75 <= coverage <= 1.0
@@ -0,0 +1,3 @@
+# Shared helpers for the ML_* pipeline scripts.
+# The scripts add the ML/ directory to sys.path and import the submodules they need,
+# e.g. `from ml_common.evaluation import Evaluator`.
@@ -0,0 +1,252 @@
+# Scaling benchmark: the hot stages of every pipeline on synthetic data of growing size
+# Each stage runs at 10^3, 10^4, ... rows (up to --max-rows, and up to a per-stage cap for
+# stages that are super-linear or write large files) and is measured with ml_common.tracing.
+# The report lists throughput and memory per size and flags scaling cliffs: sizes where the
+# time per row grew by more than --cliff-factor over the previous size. The measurements are
+# also written as a stage trace, so two runs can be compared with ml_common.compare_traces.
+# A stage that fails at some size (running out of memory, say) is reported and its larger
+# sizes are skipped; the other stages still run, and the exit status is 1.
+# Usage: python -m ml_common.benchmark_scaling [--max-rows 1000000] [--pipelines uber sales]
+#        [--cliff-factor 2.0]
+import argparse
+import gc
+import os
+import sys
+import tempfile
+
+import numpy as np
+from sklearn.cluster import KMeans
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from . import synthetic
+from .tracing import StageTrace
+
+ML_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in ['ML_1_Uber_Price_Prediction', 'ML_2_Email_Spam_Classification', 'ML_3_Bank_Customer_Analysis',
+               'ML_5_KNN_Algorithm_Diabetes', 'ML_6_KMeansClustering_Sales_Data']:
+    sys.path.append(os.path.join(ML_ROOT, folder))
+
+from churn_runtime import ChurnRuntime, write_churn_model
+from kmeans_elbow import ElbowSearch
+from knn_sweep import neighbour_lists, predictions_for_all_k
+from online_clusters import FEATURES as SALES_FEATURES, OnlineClusterAssigner
+from silhouette import silhouette_score_sampled
+from spam_ann import ApproximateKNeighborsClassifier
+from spam_online import OnlineSpamClassifier, iter_batches
+from uber_distance import trip_distance_km
+from uber_loader import load_uber, replace_invalid_coordinates
+
+SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+CHURN_FEATURES = ['CreditScore', 'Geography', 'Gender', 'Age', 'Tenure', 'Balance', 'NumOfProducts',
+                  'HasCrCard', 'IsActiveMember', 'EstimatedSalary']
+
+
+# Every stage is set up (data generated, models prepared) outside the measurement and
+# returns the callable that is measured
+def uber_load_csv(n, workdir):
+    path = synthetic.write_csv('uber', os.path.join(workdir, f'uber-{n}.csv'), n)
+    return lambda: load_uber(path)
+
+
+def uber_geodesic(n, workdir):
+    df = synthetic.uber_trips(n, text=False)
+    return lambda: trip_distance_km(df, method='geodesic')
+
+
+def uber_haversine(n, workdir):
+    df = synthetic.uber_trips(n, text=False)
+    return lambda: trip_distance_km(df, method='haversine')
+
+
+def uber_invalid_coordinates(n, workdir):
+    df = synthetic.uber_trips(n, text=False)
+    return lambda: replace_invalid_coordinates(df)
+
+
+def uber_forest(n, workdir):
+    df = synthetic.uber_trips(n, text=False, dirty=False)
+    X = np.column_stack([trip_distance_km(df, method='haversine'), df['passenger_count'],
+                         df['pickup_datetime'].dt.hour])
+    forest = RandomForestRegressor(n_estimators=20, n_jobs=-1, random_state=42)
+    return lambda: forest.fit(X, df['fare_amount'])
+
+
+def emails_scale(n, workdir):
+    _, X, _ = synthetic.email_counts(n)
+    return lambda: StandardScaler(with_mean=False).fit_transform(X.astype(np.float32))
+
+
+def emails_lsh_knn(n, workdir):
+    _, X, y = synthetic.email_counts(n + 1000)
+    X = StandardScaler(with_mean=False).fit_transform(X.astype(np.float32))
+    return lambda: ApproximateKNeighborsClassifier(n_neighbors=5).fit(X[:n], y[:n]).predict(X[n:])
+
+
+def emails_online_svm(n, workdir):
+    _, X, y = synthetic.email_counts(n)
+    return lambda: OnlineSpamClassifier().fit_stream(iter_batches(X.astype(np.float32), y, batch_size=1000))
+
+
+def churn_encode_scale(n, workdir):
+    df = synthetic.churn_customers(n)
+
+    def run():
+        X = df[CHURN_FEATURES].copy()
+        for column in ['Geography', 'Gender']:
+            X[column] = LabelEncoder().fit_transform(X[column].astype(str))
+        return StandardScaler().fit_transform(X)
+    return run
+
+
+def churn_runtime_predict(n, workdir):
+    # A network with the pipeline's architecture (64-32-1) and seeded random weights: the
+    # scoring cost does not depend on the weights, and no trained artifact is needed
+    df = synthetic.churn_customers(n)
+    encoders = {column: LabelEncoder().fit(df[column].astype(str)) for column in ['Geography', 'Gender']}
+    X = df[CHURN_FEATURES].copy()
+    for column, encoder in encoders.items():
+        X[column] = encoder.transform(X[column].astype(str))
+    rng = np.random.default_rng(42)
+    sizes = [len(CHURN_FEATURES), 64, 32, 1]
+    layers = [(rng.normal(0, 0.1, (fan_in, fan_out)), np.zeros(fan_out), activation)
+              for fan_in, fan_out, activation in zip(sizes, sizes[1:], ['relu', 'relu', 'sigmoid'])]
+    path = os.path.join(workdir, 'churn_model.npz')
+    write_churn_model(path, layers, StandardScaler().fit(X), encoders, CHURN_FEATURES)
+    runtime = ChurnRuntime(path)
+    return lambda: runtime.predict_proba(df)
+
+
+def diabetes_knn_sweep(n, workdir):
+    df = synthetic.diabetes_patients(n)
+    X = StandardScaler().fit_transform(df.drop(columns='Outcome'))
+    y = df['Outcome'].to_numpy()
+    split = int(n * 0.8)
+
+    def run():
+        distances, indices = neighbour_lists(X[:split], X[split:], 30)
+        return predictions_for_all_k(y[:split], distances, indices, range(1, 31))
+    return run
+
+
+def _scaled_sales(n):
+    return StandardScaler().fit_transform(synthetic.sales_orders(n)[SALES_FEATURES])
+
+
+def sales_elbow(n, workdir):
+    X = _scaled_sales(n)
+    return lambda: ElbowSearch(range(1, 11), n_candidates=2).fit(X)
+
+
+def sales_online_assign(n, workdir):
+    orders = synthetic.sales_orders(n)[SALES_FEATURES]
+    seed = orders.iloc[:min(n, 10_000)]
+    scaler = StandardScaler().fit(seed)
+    X_seed = scaler.transform(seed)
+    assigner = OnlineClusterAssigner.from_model(scaler, KMeans(n_clusters=4, random_state=42).fit(X_seed), X_seed)
+
+    def run():
+        for start in range(0, n, 5000):
+            assigner.partial_fit(orders.iloc[start:start + 5000])
+    return run
+
+
+def sales_silhouette(n, workdir):
+    X = _scaled_sales(n)
+    labels = KMeans(n_clusters=4, random_state=42).fit(X[:10_000]).predict(X)
+    return lambda: silhouette_score_sampled(X, labels, sample_size=2000)
+
+
+# (pipeline, stage, largest size it runs at, setup)
+STAGES = [
+    ('uber', 'load_csv', 10 ** 6, uber_load_csv),
+    ('uber', 'geodesic_distance', 10 ** 7, uber_geodesic),
+    ('uber', 'haversine_distance', 10 ** 7, uber_haversine),
+    ('uber', 'replace_invalid_coordinates', 10 ** 7, uber_invalid_coordinates),
+    ('uber', 'random_forest_fit', 10 ** 5, uber_forest),
+    ('emails', 'sparse_scaling', 10 ** 6, emails_scale),
+    ('emails', 'lsh_knn_1000_queries', 10 ** 6, emails_lsh_knn),
+    ('emails', 'online_svm_stream', 10 ** 6, emails_online_svm),
+    ('churn', 'encode_and_scale', 10 ** 7, churn_encode_scale),
+    ('churn', 'numpy_runtime_predict', 10 ** 7, churn_runtime_predict),
+    ('diabetes', 'knn_sweep_k1_30', 10 ** 5, diabetes_knn_sweep),
+    ('sales', 'elbow_search_k1_10', 10 ** 6, sales_elbow),
+    ('sales', 'online_assign', 10 ** 7, sales_online_assign),
+    ('sales', 'silhouette_sampled', 10 ** 6, sales_silhouette),
+]
+
+
+def run_benchmark(max_rows=10 ** 6, pipelines=None, sizes=SIZES):
+    """Run every selected stage at every size.
+
+    Returns the StageTrace holding the measurements and a list of
+    (stage, size, error) for the runs that failed. A failure (e.g. running out
+    of memory) skips the larger sizes of that stage only.
+    """
+    trace = StageTrace('benchmark_scaling', verbose=False)
+    failures = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for pipeline, stage, cap, setup in STAGES:
+            if pipelines and pipeline not in pipelines:
+                continue
+            for n in [size for size in sizes if size <= min(cap, max_rows)]:
+                run = None
+                try:
+                    run = setup(n, workdir)
+                    with trace.stage(f'{pipeline}/{stage} n={n}') as measured:
+                        run()
+                        measured.rows = n
+                except Exception as exc:
+                    # The failed run is not a measurement
+                    trace.stages = [record for record in trace.stages if record['name'] != f'{pipeline}/{stage} n={n}']
+                    failures.append((f'{pipeline}/{stage}', n, f'{type(exc).__name__}: {exc}'))
+                    print(f"{pipeline}/{stage} n={n}: failed ({type(exc).__name__}: {exc})", flush=True)
+                    break
+                finally:
+                    del run
+                    gc.collect()
+                print(f"{pipeline}/{stage} n={n}: {measured.record['wall_s']:.3f} s", flush=True)
+    return trace, failures
+
+
+def scaling_report(trace, cliff_factor=2.0, min_seconds=0.05):
+    """Throughput and memory per stage and size; returns (report text, list of cliffs)."""
+    lines = [f"{'stage':42s} {'rows':>9s} {'wall s':>9s} {'rows/s':>11s} {'peak MiB':>9s} {'extra MiB':>9s}"]
+    cliffs = []
+    previous = {}
+    for record in trace.stages:
+        name = record['name'].rsplit(' n=', 1)[0]
+        n, wall = record['rows'], record['wall_s']
+        extra = '-'
+        if trace.peak_scope == 'stage' and record['peak_rss_mb'] is not None:
+            extra = f"{record['peak_rss_mb'] - record['rss_start_mb']:.0f}"
+        flag = ''
+        if name in previous:
+            last_n, last_wall = previous[name]
+            growth = (wall / n) / (last_wall / last_n)
+            if wall > min_seconds and growth > cliff_factor:
+                flag = f'  <- cliff: {growth:.1f}x time per row vs n={last_n}'
+                cliffs.append((name, n, growth))
+        previous[name] = (n, wall)
+        peak = '-' if record['peak_rss_mb'] is None else f"{record['peak_rss_mb']:.0f}"
+        lines.append(f"{name[:42]:42s} {n:>9d} {wall:9.3f} {n / wall:11.0f} {peak:>9s} {extra:>9s}{flag}")
+    return '\n'.join(lines), cliffs
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline hot stages on growing synthetic data')
+    parser.add_argument('--max-rows', type=int, default=10 ** 6, help='largest size to run (10^7 is opt-in)')
+    parser.add_argument('--pipelines', nargs='*', choices=sorted({stage[0] for stage in STAGES}),
+                        help='only these pipelines (default all)')
+    parser.add_argument('--cliff-factor', type=float, default=2.0,
+                        help='flag sizes where time per row grew more than this factor')
+    args = parser.parse_args()
+
+    trace, failures = run_benchmark(args.max_rows, args.pipelines)
+    report, cliffs = scaling_report(trace, args.cliff_factor)
+    print(f"\n{report}")
+    print(f"\n{len(cliffs)} scaling cliff(s) found" if cliffs else "\nNo scaling cliffs")
+    for stage, n, error in failures:
+        print(f"Failed: {stage} at n={n} ({error}); larger sizes skipped")
+    print(f"Trace written to {trace.finish()} (compare runs with python -m ml_common.compare_traces)")
+    sys.exit(1 if failures else 0)
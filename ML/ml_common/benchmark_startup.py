@@ -0,0 +1,88 @@
+# Start-up benchmark of the pipeline scripts
+# Times every script from launch until it has printed its dataset diagnostics: the script is
+# ended after its first stages through $ML_STOP_AFTER (see ml_common/tracing.py), with figures
+# off and no trace written. Each script runs once untimed (which also fills the dataset cache)
+# and is then timed --repeat times; the best run is reported with the heaviest imports of that
+# start-up (from ml_common.import_profile). Scripts slower than --budget seconds are flagged and
+# make the benchmark exit with status 1, so heavy imports creeping back in get noticed.
+# Usage: python -m ml_common.benchmark_startup [--repeat N] [--budget SECONDS] [--top N]
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from .datasets import dataset_path
+from .import_profile import profile_script, script_environment
+from .orchestrator import JOBS, ML_ROOT
+
+# Stages each script runs before its diagnostics are printed (the gradient-descent script has
+# no dataset; its first result is printed at the end of its second stage)
+DIAGNOSTIC_STAGES = {
+    'ML_1_Uber_Price_Prediction': 1,
+    'ML_2_Email_Spam_Classification': 2,
+    'ML_3_Bank_Customer_Analysis': 1,
+    'ML_4_Gradient_Descent_Algorithm': 2,
+    'ML_5_KNN_Algorithm_Diabetes': 2,
+    'ML_6_KMeansClustering_Sales_Data': 2,
+}
+
+
+def time_startup(script, stop_after):
+    """Wall seconds from launching the script until it ends after `stop_after` stages."""
+    start = time.perf_counter()
+    returncode = subprocess.call([sys.executable, os.path.basename(script)], cwd=os.path.dirname(script),
+                                 env=script_environment(stop_after),
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if returncode != 0:
+        raise RuntimeError(f"{os.path.basename(script)} exited with status {returncode}")
+    return time.perf_counter() - start
+
+
+def run_benchmark(repeat=3, top=3):
+    results = []
+    for name, stop_after in DIAGNOSTIC_STAGES.items():
+        job = JOBS[name]
+        try:
+            if job.get('dataset'):
+                dataset_path(job['dataset'])
+        except FileNotFoundError as exc:
+            print(f"[skip] {name}: {exc}", flush=True)
+            continue
+        script = os.path.join(ML_ROOT, job['script'])
+        time_startup(script, stop_after)
+        times = [time_startup(script, stop_after) for _ in range(repeat)]
+        profile = profile_script(script, stop_after=stop_after)
+        results.append({'name': name, 'best_s': min(times), 'times': times, 'import_s': profile['import_s'],
+                        'heaviest': list(profile['packages'].items())[:top]})
+        print(f"{name}: {min(times):.3f} s", flush=True)
+    return results
+
+
+def format_results(results, budget):
+    lines = [f"{'script':34s} {'start-up s':>10s} {'imports s':>9s}  heaviest imports"]
+    for result in results:
+        heaviest = ', '.join(f"{package} {seconds:.2f}" for package, seconds in result['heaviest'])
+        flag = '  OVER BUDGET' if result['best_s'] > budget else ''
+        lines.append(f"{result['name'][:34]:34s} {result['best_s']:10.3f} {result['import_s']:9.3f}  "
+                     f"{heaviest}{flag}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time how long each pipeline script takes to start')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per script (best is reported)')
+    parser.add_argument('--budget', type=float, default=1.0, help='start-up seconds allowed per script')
+    parser.add_argument('--top', type=int, default=3, help='heaviest imports listed per script')
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(repeat=args.repeat, top=args.top)
+    print(f"\n{format_results(results, args.budget)}")
+    over = [result['name'] for result in results if result['best_s'] > args.budget]
+    if over:
+        print(f"\nOver the {args.budget:.1f} s start-up budget: {', '.join(over)}")
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
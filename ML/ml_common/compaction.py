@@ -0,0 +1,126 @@
+# Memory-compact frames
+# compact_frame() stores every integer column at the smallest width that holds its values,
+# narrows float64 columns to float32 when that is lossless (or always, on request) and turns
+# low-cardinality string columns into categoricals. MemoryReport records what each compaction
+# saved, as measured on the frame before and after, and prints the total when the script exits.
+import atexit
+import os
+
+import numpy as np
+import pandas as pd
+
+from .lazy import lazy_import
+
+sparse = lazy_import('scipy.sparse')
+
+
+def frame_nbytes(df):
+    """Memory held by a frame's columns and index, strings included."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _smallest_integer(values):
+    # pandas picks the narrowest (unsigned where possible) dtype that holds min and max
+    return pd.to_numeric(values, downcast='unsigned' if values.min() >= 0 else 'integer')
+
+
+def _lossless_float32(values):
+    narrowed = values.to_numpy().astype(np.float32)
+    return np.array_equal(narrowed.astype(values.dtype), values.to_numpy(), equal_nan=True)
+
+
+def downcast_numeric(df, float32=False, exclude=(), inplace=False):
+    """Integers to their smallest safe width, float64 to float32 when lossless (or float32=True).
+
+    Returns a shallow copy of df with the narrowed columns, so the caller's
+    frame keeps its dtypes; with inplace=True the columns are replaced in df
+    itself, which is also returned.
+    """
+    if not inplace:
+        df = df.copy(deep=False)
+    for name in df.columns:
+        if name in exclude or len(df) == 0:
+            continue
+        values = df[name]
+        if pd.api.types.is_bool_dtype(values.dtype) or not isinstance(values.dtype, np.dtype):
+            continue
+        if values.dtype.kind in 'iu':
+            df[name] = _smallest_integer(values)
+        elif values.dtype == np.float64 and (float32 or _lossless_float32(values)):
+            df[name] = values.astype(np.float32)
+    return df
+
+
+def categorize_strings(df, max_unique_ratio=0.5, exclude=(), inplace=False):
+    """String columns with at most max_unique_ratio distinct values per row become categoricals.
+
+    Like downcast_numeric, works on a shallow copy of df unless inplace=True.
+    """
+    if not inplace:
+        df = df.copy(deep=False)
+    for name in df.columns:
+        values = df[name]
+        if name in exclude or not (pd.api.types.is_object_dtype(values.dtype)
+                                   or pd.api.types.is_string_dtype(values.dtype)):
+            continue
+        if values.nunique(dropna=True) <= max_unique_ratio * len(values):
+            df[name] = values.astype('category')
+    return df
+
+
+def compact_frame(df, float32=False, max_unique_ratio=0.5, exclude=(), inplace=False):
+    """downcast_numeric and categorize_strings in one pass; values are unchanged unless float32=True.
+
+    The compacted frame is a shallow copy of df unless inplace=True.
+    """
+    df = downcast_numeric(df, float32=float32, exclude=exclude, inplace=inplace)
+    return categorize_strings(df, max_unique_ratio=max_unique_ratio, exclude=exclude, inplace=True)
+
+
+def to_float32(X):
+    """Estimator input as float32 (dense array or sparse matrix)."""
+    if sparse.issparse(X):
+        return X.astype(np.float32)
+    return np.asarray(X, dtype=np.float32)
+
+
+class MemoryReport:
+    """Memory saved by the compaction steps of one script, printed when the script exits."""
+
+    def __init__(self, script, verbose=True):
+        self.script = script
+        self.verbose = verbose
+        self.steps = []
+        self._pid = os.getpid()
+        self._printed = False
+        atexit.register(self.print_summary)
+
+    def compact(self, df, label, **options):
+        """compact_frame(df, **options), recording the frame's size before and after."""
+        before = frame_nbytes(df)
+        df = compact_frame(df, **options)
+        self.record(label, before, frame_nbytes(df))
+        return df
+
+    def record(self, label, before, after):
+        self.steps.append({'label': label, 'before': before, 'after': after})
+        if self.verbose:
+            print(f"[memory] {label}: {before / 2 ** 20:.2f} MiB -> {after / 2 ** 20:.2f} MiB")
+
+    def saved(self):
+        return sum(step['before'] - step['after'] for step in self.steps)
+
+    def summary(self):
+        lines = [f"{'step':48s} {'before MiB':>11s} {'after MiB':>10s} {'saved':>7s}"]
+        for step in self.steps:
+            share = 1 - step['after'] / step['before'] if step['before'] else 0.0
+            lines.append(f"{step['label'][:48]:48s} {step['before'] / 2 ** 20:11.2f} "
+                         f"{step['after'] / 2 ** 20:10.2f} {share:7.0%}")
+        lines.append(f"{self.script}: {self.saved() / 2 ** 20:.2f} MiB saved in total")
+        return '\n'.join(lines)
+
+    def print_summary(self):
+        if self._printed or not self.steps or os.getpid() != self._pid:
+            return
+        self._printed = True
+        print(f"\nMemory compaction\n{self.summary()}")
@@ -0,0 +1,86 @@
+# Compare two stage traces written by ml_common.tracing and flag regressions
+# Usage: python -m ml_common.compare_traces BASELINE.json CANDIDATE.json [--tolerance 0.2]
+#        [--min-seconds 0.05] [--min-mb 16]
+# Stages are matched by name. A stage regresses when its wall time (or peak memory) grew by
+# more than the relative tolerance and by more than the absolute floor, which keeps noise on
+# short stages from being reported. Exits with status 1 when any regression is found.
+import argparse
+import json
+import sys
+
+
+def load_trace(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def _grew(old, new, tolerance, floor):
+    return old is not None and new is not None and new - old > floor and new > old * (1 + tolerance)
+
+
+def compare_traces(baseline, candidate, tolerance=0.2, min_seconds=0.05, min_mb=16.0):
+    """One row per stage name with both measurements and the regressions found.
+
+    Stages present in only one trace are reported with the other side as None.
+    """
+    old_stages = {stage['name']: stage for stage in baseline['stages']}
+    new_stages = {stage['name']: stage for stage in candidate['stages']}
+    names = list(old_stages) + [name for name in new_stages if name not in old_stages]
+    # Per-stage peaks are only comparable when both traces measured them per stage
+    compare_memory = baseline.get('peak_scope') == candidate.get('peak_scope') == 'stage'
+
+    rows = []
+    for name in names:
+        old, new = old_stages.get(name, {}), new_stages.get(name, {})
+        flags = []
+        if _grew(old.get('wall_s'), new.get('wall_s'), tolerance, min_seconds):
+            flags.append('wall')
+        if compare_memory and _grew(old.get('peak_rss_mb'), new.get('peak_rss_mb'), tolerance, min_mb):
+            flags.append('memory')
+        if old.get('rows') is not None and new.get('rows') is not None and old['rows'] != new['rows']:
+            flags.append('rows changed')
+        rows.append({'name': name, 'old': old or None, 'new': new or None, 'flags': flags})
+    return rows
+
+
+def _format(value, spec):
+    return '-' if value is None else format(value, spec)
+
+
+def format_report(rows):
+    lines = [f"{'stage':36s} {'wall s (old -> new)':>24s} {'peak MiB (old -> new)':>24s}  flags"]
+    for row in rows:
+        old, new = row['old'] or {}, row['new'] or {}
+        wall = f"{_format(old.get('wall_s'), '.3f')} -> {_format(new.get('wall_s'), '.3f')}"
+        peak = f"{_format(old.get('peak_rss_mb'), '.0f')} -> {_format(new.get('peak_rss_mb'), '.0f')}"
+        flags = ', '.join(row['flags']) or ('only in baseline' if not new else 'new stage' if not old else '')
+        lines.append(f"{row['name'][:36]:36s} {wall:>24s} {peak:>24s}  {flags}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare two stage traces and flag regressions')
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='relative growth allowed (default 0.2)')
+    parser.add_argument('--min-seconds', type=float, default=0.05, help='ignore wall-time growth below this')
+    parser.add_argument('--min-mb', type=float, default=16.0, help='ignore peak-memory growth below this')
+    args = parser.parse_args(argv)
+
+    baseline, candidate = load_trace(args.baseline), load_trace(args.candidate)
+    rows = compare_traces(baseline, candidate, args.tolerance, args.min_seconds, args.min_mb)
+    print(f"{baseline['pipeline']}: {baseline['started']} -> {candidate['started']}")
+    print(format_report(rows))
+    total_old, total_new = baseline['total']['wall_s'], candidate['total']['wall_s']
+    print(f"Total wall time: {total_old:.2f} s -> {total_new:.2f} s ({total_new / total_old - 1:+.1%})")
+
+    regressions = [row for row in rows if {'wall', 'memory'} & set(row['flags'])]
+    if regressions:
+        print(f"{len(regressions)} stage(s) regressed: {', '.join(row['name'] for row in regressions)}")
+        return 1
+    print("No regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
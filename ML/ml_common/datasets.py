@@ -0,0 +1,360 @@
+# Local dataset registry with a typed columnar cache
+# Datasets are resolved by name to a CSV on disk (next to the script that uses it, or in
+# $ML_DATA_DIR). The first read parses the CSV once and stores the typed columns in a cache;
+# later reads map the cache instead of re-parsing. The cache is rebuilt when the CSV's
+# content hash changes.
+#
+# Two cache formats are supported:
+#   'numpy' (default) - one Fortran-ordered .npy block per dtype, opened as a copy-on-write
+#                       memory map, so every numeric column is a zero-copy view that pandas
+#                       can still modify in place. String columns are stored as integer codes
+#                       plus a table of distinct values.
+#   'arrow'           - an uncompressed Arrow IPC (Feather) file, for sharing the cache with
+#                       other tools. Requires pyarrow.
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow is optional, the 'numpy' format has no extra dependency
+    feather = None
+
+ML_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> where the CSV lives, where to download it and how to parse it
+DATASETS = {
+    'uber': {
+        'directory': 'ML_1_Uber_Price_Prediction',
+        'filename': 'uber.csv',
+        'source': 'https://www.kaggle.com/datasets/yasserh/uber-fares-dataset',
+    },
+    'emails': {
+        'directory': 'ML_2_Email_Spam_Classification',
+        'filename': 'emails.csv',
+        'source': 'https://www.kaggle.com/datasets/balaka18/email-spam-classification-dataset-csv',
+    },
+    'churn': {
+        'directory': 'ML_3_Bank_Customer_Analysis',
+        'filename': 'Churn_Modelling.csv',
+        'source': 'https://www.kaggle.com/datasets/shrutimechlearn/churn-modelling',
+    },
+    'diabetes': {
+        'directory': 'ML_5_KNN_Algorithm_Diabetes',
+        'filename': 'diabetes.csv',
+        'source': 'https://www.kaggle.com/datasets/abdallamahgoub/diabetes',
+    },
+    'sales': {
+        'directory': 'ML_6_KMeansClustering_Sales_Data',
+        'filename': 'sales_data_sample.csv',
+        'source': 'https://www.kaggle.com/datasets/kyanyoga/sample-sales-data',
+        'read_csv': {'encoding': 'latin1'},
+    },
+}
+
+
+def register_dataset(name, filename, directory=None, source=None, **read_csv):
+    """Add (or replace) a registry entry; read_csv holds default pd.read_csv options."""
+    DATASETS[name] = {'directory': directory or '', 'filename': filename, 'source': source,
+                      'read_csv': read_csv}
+
+
+def dataset_path(name):
+    """Local path of a registered dataset; $ML_DATA_DIR takes precedence over the script folder."""
+    try:
+        entry = DATASETS[name]
+    except KeyError:
+        raise KeyError(f"Unknown dataset {name!r}; registered: {', '.join(sorted(DATASETS))}") from None
+    candidates = [os.path.join(ML_ROOT, entry['directory'], entry['filename'])]
+    if os.environ.get('ML_DATA_DIR'):
+        candidates.insert(0, os.path.join(os.environ['ML_DATA_DIR'], entry['filename']))
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    hint = f" Download it from {entry['source']}" if entry.get('source') else ''
+    raise FileNotFoundError(f"Dataset {name!r} not found (looked for {' and '.join(candidates)}).{hint}")
+
+
+def content_hash(path, block_size=1 << 20):
+    """blake2b hash of a file's bytes, read in blocks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_root():
+    """Cache location: $ML_DATASET_CACHE, or ML/.dataset_cache."""
+    return os.environ.get('ML_DATASET_CACHE', os.path.join(ML_ROOT, '.dataset_cache'))
+
+
+def _cache_dir(path, read_csv, label, transform):
+    # One cache per (file, parse options, transform), so e.g. float32 and float64 reads coexist
+    transform_name = f'{transform.__module__}.{transform.__qualname__}' if transform else None
+    key = hashlib.blake2b(repr((os.path.abspath(path), sorted(read_csv.items()), transform_name)).encode(),
+                          digest_size=6).hexdigest()
+    return os.path.join(cache_root(), f"{label}-{key}")
+
+
+def _read_manifest(directory):
+    try:
+        with open(os.path.join(directory, 'manifest.json')) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(directory, manifest):
+    # Written last and swapped in atomically, so a half-written cache is never picked up
+    tmp_path = os.path.join(directory, f'manifest.json.{os.getpid()}')
+    with open(tmp_path, 'w') as file:
+        json.dump(manifest, file, indent=1)
+    os.replace(tmp_path, os.path.join(directory, 'manifest.json'))
+
+
+def _same_format(manifest, backend):
+    # A cache written by another pandas version may not restore the same dtypes
+    return manifest is not None and (manifest.get('backend'), manifest.get('pandas')) == (backend, pd.__version__)
+
+
+def _is_current(manifest, path, backend, verify):
+    if not _same_format(manifest, backend):
+        return False
+    stat = os.stat(path)
+    if not verify and (manifest['size'], manifest['mtime_ns']) == (stat.st_size, stat.st_mtime_ns):
+        return True
+    # The file was touched (or verify=True): only a content change invalidates the cache
+    return manifest['content_hash'] == content_hash(path)
+
+
+def _is_string_column(series):
+    values = series.cat.categories if isinstance(series.dtype, pd.CategoricalDtype) else series
+    return pd.api.types.infer_dtype(values, skipna=True) in ('string', 'empty')
+
+
+class _NumpyCacheWriter:
+    """Writes the 'numpy' cache layout from one frame or from a stream of chunks.
+
+    Each column is appended to its own temporary file as the chunks arrive;
+    finish() copies the columns into the per-dtype blocks through memory maps,
+    so no more than one chunk is held in memory. Non-native columns are
+    stored as int32 codes into a table of distinct values, kept across chunks.
+    """
+
+    def __init__(self, directory, prefix):
+        self.directory = directory
+        self.prefix = prefix
+        self.columns = None
+        self.n_rows = 0
+
+    def _temporary(self, position):
+        return os.path.join(self.directory, f'{self.prefix}.column-{position}.tmp')
+
+    def _start(self, chunk):
+        self.columns = []
+        for position, (name, series) in enumerate(chunk.items()):
+            if series.dtype.kind in 'biufcmM' and isinstance(series.dtype, np.dtype):
+                column = {'name': name, 'kind': 'array', 'array_dtype': series.dtype.str}
+            elif isinstance(series.dtype, pd.DatetimeTZDtype):
+                # Stored as naive UTC timestamps, the time zone is restored on read
+                column = {'name': name, 'kind': 'datetimetz', 'dtype': str(series.dtype), 'array_dtype': '<M8[ns]'}
+            else:
+                column = {'name': name, 'kind': 'category' if series.dtype == 'category' else 'object',
+                          'dtype': str(series.dtype), 'array_dtype': np.dtype(np.int32).str, 'values': 'str'}
+            self.columns.append(column)
+            open(self._temporary(position), 'wb').close()
+        self._tables = [{} for _ in self.columns]
+
+    def _column_array(self, position, column, series):
+        if column['kind'] == 'datetimetz':
+            return series.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy().astype('<M8[ns]')
+        if column['kind'] == 'array':
+            values = series.to_numpy()
+            if values.dtype.str != column['array_dtype']:
+                if not np.can_cast(values.dtype, column['array_dtype'], 'safe'):
+                    raise ValueError(f"Column {column['name']!r} changed from {column['array_dtype']} to "
+                                     f"{values.dtype} between chunks; pass dtype= for it")
+                values = values.astype(column['array_dtype'])
+            return values
+        # Codes into the table of distinct values seen so far (-1 marks a missing value)
+        if not _is_string_column(series):
+            column['values'] = 'object'
+        local_codes, uniques = pd.factorize(series)
+        table = self._tables[position]
+        if not len(uniques):
+            return np.full(len(series), -1, dtype=np.int32)
+        mapping = np.array([table.setdefault(value, len(table)) for value in uniques], dtype=np.int32)
+        return np.where(local_codes >= 0, mapping[local_codes], -1).astype(np.int32)
+
+    def append(self, chunk):
+        if self.columns is None:
+            self._start(chunk)
+        elif list(chunk.columns) != [column['name'] for column in self.columns]:
+            raise ValueError("Every chunk must have the same columns")
+        for position, (column, (_, series)) in enumerate(zip(self.columns, chunk.items())):
+            with open(self._temporary(position), 'ab') as file:
+                file.write(np.ascontiguousarray(self._column_array(position, column, series)).tobytes())
+        self.n_rows += len(chunk)
+
+    def finish(self):
+        """Assemble the blocks and value tables; returns the layout for the manifest."""
+        blocks = {}
+        for position, column in enumerate(self.columns):
+            blocks.setdefault(column['array_dtype'], []).append(position)
+        files = {}
+        for block_name, positions in blocks.items():
+            files[block_name] = f'{self.prefix}.{len(files)}.npy'
+            # Fortran order makes every column of the block contiguous on disk
+            block = np.lib.format.open_memmap(os.path.join(self.directory, files[block_name]), mode='w+',
+                                              dtype=block_name, shape=(self.n_rows, len(positions)),
+                                              fortran_order=True)
+            for offset, position in enumerate(positions):
+                if self.n_rows:
+                    block[:, offset] = np.memmap(self._temporary(position), dtype=block_name, mode='r',
+                                                 shape=(self.n_rows,))
+                self.columns[position].update(block=block_name, offset=offset)
+            block.flush()
+            del block
+        for position, column in enumerate(self.columns):
+            os.remove(self._temporary(position))
+            if column['kind'] in ('category', 'object'):
+                uniques = list(self._tables[position])
+                # Only real strings go into a string table; other values keep their type
+                values = np.asarray(uniques, dtype=str) if column['values'] == 'str' \
+                    else np.array(uniques + [None], dtype=object)[:-1]
+                np.save(os.path.join(self.directory, f'{self.prefix}.values-{position}.npy'), values)
+            del column['array_dtype']
+        return {'columns': self.columns, 'files': files}
+
+
+def _read_numpy(directory, manifest, prefix, columns):
+    layout = manifest['layout']
+    # Plain ndarray views of the maps, so pandas sees ordinary arrays
+    blocks = {name: np.load(os.path.join(directory, file), mmap_mode='c').view(np.ndarray)
+              for name, file in layout['files'].items()}
+    by_name = {column['name']: (position, column) for position, column in enumerate(layout['columns'])}
+    wanted = columns if columns is not None else [column['name'] for column in layout['columns']]
+
+    data = {}
+    for name in wanted:
+        position, column = by_name[name]
+        values = blocks[column['block']][:, column['offset']]
+        if column['kind'] == 'datetimetz':
+            values = pd.Series(values).dt.tz_localize('UTC').astype(column['dtype'])
+        elif column['kind'] != 'array':
+            uniques = np.load(os.path.join(directory, f'{prefix}.values-{position}.npy'),
+                              allow_pickle=column.get('values') == 'object').astype(object)
+            if column['kind'] == 'category':
+                values = pd.Categorical.from_codes(values, categories=uniques)
+            else:
+                # Code -1 (missing) picks the NaN appended at the end; the original
+                # string dtype (object or pandas' str) is restored explicitly
+                values = pd.Series(np.append(uniques, np.nan)[values], dtype=column['dtype'])
+        data[name] = values
+    # copy=False keeps each column a view into its memory-mapped block
+    return pd.DataFrame(data, columns=wanted, copy=False)
+
+
+def _build_cache(path, directory, backend, read_csv, transform, manifest_base, chunksize=None):
+    prefix = manifest_base['content_hash']
+    os.makedirs(directory, exist_ok=True)
+    if chunksize is not None:
+        # Parsed, transformed and written one chunk at a time; the result is read back from the cache
+        writer = _NumpyCacheWriter(directory, prefix)
+        for chunk in pd.read_csv(path, chunksize=chunksize, **read_csv):
+            writer.append(chunk if transform is None else transform(chunk))
+        if writer.columns is None:
+            writer.append(pd.read_csv(path, nrows=0, **read_csv))
+        manifest = dict(manifest_base, n_rows=writer.n_rows, layout=writer.finish())
+        df = None
+    else:
+        df = pd.read_csv(path, **read_csv)
+        if transform is not None:
+            df = transform(df)
+        manifest = dict(manifest_base, n_rows=len(df))
+        if backend == 'arrow':
+            manifest['file'] = f'{prefix}.feather'
+            feather.write_feather(df, os.path.join(directory, manifest['file']), compression='uncompressed')
+        else:
+            writer = _NumpyCacheWriter(directory, prefix)
+            writer.append(df)
+            manifest['layout'] = writer.finish()
+    _write_manifest(directory, manifest)
+    # Files of an older version of the CSV are no longer referenced
+    for name in os.listdir(directory):
+        if name != 'manifest.json' and not name.startswith(prefix):
+            os.remove(os.path.join(directory, name))
+    return _read_numpy(directory, manifest, prefix, None) if df is None else df
+
+
+def read_cached_csv(path, columns=None, backend='numpy', verify=False, label=None, transform=None, chunksize=None,
+                    **read_csv):
+    """pd.read_csv(path, **read_csv) through the columnar cache.
+
+    The first call (and the first call after the file's content changes)
+    parses the CSV and writes the cache; later calls load only the requested
+    `columns` from it. The file is re-hashed only when its size or mtime
+    changed, or on every call with verify=True.
+
+    transform, if given, is applied to the parsed frame before it is cached
+    (e.g. expensive datetime parsing). It is identified by its name only:
+    clear the cache after changing what it does.
+
+    chunksize, if given, builds the cache `chunksize` rows at a time (each
+    chunk transformed on its own), so the whole CSV is never in memory at
+    once; it has no effect on what is cached. numpy backend only.
+    """
+    if backend == 'arrow' and feather is None:
+        raise ImportError("backend='arrow' requires pyarrow; use backend='numpy' or install pyarrow")
+    if backend not in ('numpy', 'arrow'):
+        raise ValueError(f"Unknown cache backend {backend!r}")
+    if chunksize is not None and backend != 'numpy':
+        raise ValueError("chunksize is only supported by the 'numpy' cache backend")
+    label = label or os.path.splitext(os.path.basename(path))[0]
+    directory = _cache_dir(path, read_csv, label, transform)
+    manifest = _read_manifest(directory)
+
+    if not _is_current(manifest, path, backend, verify):
+        stat = os.stat(path)
+        manifest_base = {'source': os.path.abspath(path), 'content_hash': content_hash(path),
+                         'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'backend': backend,
+                         'pandas': pd.__version__}
+        if not (_same_format(manifest, backend) and manifest['content_hash'] == manifest_base['content_hash']):
+            df = _build_cache(path, directory, backend, read_csv, transform, manifest_base, chunksize)
+            return df if columns is None else df[list(columns)]
+        # Same bytes, new mtime: refresh the stat fields and keep the cache
+        manifest = dict(manifest, **manifest_base)
+        _write_manifest(directory, manifest)
+
+    if backend == 'arrow':
+        table = feather.read_table(os.path.join(directory, manifest['file']), columns=columns, memory_map=True)
+        return table.to_pandas()
+    return _read_numpy(directory, manifest, manifest['content_hash'], columns)
+
+
+def load_dataset(name, columns=None, backend='numpy', verify=False, **read_csv):
+    """Load a registered dataset by name through the columnar cache.
+
+    read_csv overrides the registry's parse options (each combination of
+    options gets its own cache).
+    """
+    options = dict(DATASETS.get(name, {}).get('read_csv') or {}, **read_csv)
+    return read_cached_csv(dataset_path(name), columns=columns, backend=backend, verify=verify,
+                           label=name, **options)
+
+
+def clear_cache(name=None):
+    """Delete the cache of one dataset (all parse options), or the whole cache."""
+    root = cache_root()
+    if name is None:
+        shutil.rmtree(root, ignore_errors=True)
+        return
+    if os.path.isdir(root):
+        for entry in os.listdir(root):
+            if entry.rsplit('-', 1)[0] == name:
+                shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
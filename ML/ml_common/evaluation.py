@@ -0,0 +1,130 @@
+# Compute-once evaluation harness shared by the classifier scripts
+# Predictions are cached per (model, input data), and every metric, report and
+# results frame is derived from that cache, so no evaluation step repeats inference.
+import hashlib
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from .lazy import lazy_import
+
+# scikit-learn and SciPy load on first use, not when a script imports the harness
+metrics = lazy_import('sklearn.metrics')
+sparse = lazy_import('scipy.sparse')
+
+
+def fingerprint(X):
+    """Content hash of a dense array, DataFrame/Series or sparse matrix."""
+    digest = hashlib.blake2b(digest_size=16)
+    if sparse.issparse(X):
+        X = X.tocsr()
+        parts = [X.data, X.indices, X.indptr]
+        digest.update(repr(X.shape).encode())
+    elif isinstance(X, (pd.DataFrame, pd.Series)):
+        parts = [pd.util.hash_pandas_object(X, index=True).to_numpy()]
+    else:
+        X = np.asarray(X)
+        parts = [pd.util.hash_array(X.ravel()) if X.dtype == object else X]
+        digest.update(repr((X.shape, X.dtype.str)).encode())
+    for part in parts:
+        digest.update(np.ascontiguousarray(part).ravel().view(np.uint8))
+    return digest.hexdigest()
+
+
+class EvaluationResult:
+    """Predictions of one model on one labelled dataset and the scores derived from them.
+
+    Every score is computed on first access and then reused.
+    """
+
+    def __init__(self, name, y_true, y_pred, y_score=None):
+        self.name = name
+        self.y_true = np.asarray(y_true)
+        self.y_pred = np.asarray(y_pred).ravel()
+        self.y_score = y_score
+
+    @cached_property
+    def accuracy(self):
+        return metrics.accuracy_score(self.y_true, self.y_pred)
+
+    @cached_property
+    def error_rate(self):
+        return 1 - self.accuracy
+
+    @cached_property
+    def precision(self):
+        return metrics.precision_score(self.y_true, self.y_pred)
+
+    @cached_property
+    def recall(self):
+        return metrics.recall_score(self.y_true, self.y_pred)
+
+    @cached_property
+    def confusion_matrix(self):
+        return metrics.confusion_matrix(self.y_true, self.y_pred)
+
+    @cached_property
+    def classification_report(self):
+        return metrics.classification_report(self.y_true, self.y_pred)
+
+    def results_frame(self, X=None, true_column='True Label', pred_column='Predicted Label'):
+        """Features (if given, unscaled) side by side with true and predicted labels."""
+        frame = pd.DataFrame(index=range(len(self.y_true))) if X is None else X.reset_index(drop=True).copy()
+        frame[true_column] = self.y_true
+        frame[pred_column] = self.y_pred
+        return frame
+
+
+class Evaluator:
+    """Cache of model predictions keyed by the model and the input data.
+
+    predict() runs inference at most once per (model, data, threshold); call
+    invalidate(model) after refitting a model in place.
+    """
+
+    def __init__(self):
+        self._predictions = {}
+        self._results = {}
+        self._models = {}
+
+    def _cached_predict(self, model, X, threshold, data_key=None):
+        # Keep a reference to the model so its id() cannot be reused while cached
+        self._models[id(model)] = model
+        key = (id(model), data_key or fingerprint(X), threshold)
+        if key not in self._predictions:
+            if threshold is None:
+                self._predictions[key] = (np.asarray(model.predict(X)), None)
+            else:
+                scores = np.asarray(model.predict(X))
+                self._predictions[key] = ((scores > threshold).astype("int32").ravel(), scores)
+        return self._predictions[key]
+
+    def predict(self, model, X, threshold=None):
+        """Predicted labels, cached.
+
+        With a threshold, model.predict is taken to return probabilities (as
+        Keras does) and labels are `probability > threshold`; the raw
+        probabilities are cached alongside and returned by predict_scores().
+        """
+        return self._cached_predict(model, X, threshold)[0]
+
+    def predict_scores(self, model, X, threshold=0.5):
+        """Raw probabilities behind a thresholded predict(), cached."""
+        return self._cached_predict(model, X, threshold)[1]
+
+    def evaluate(self, model, X, y_true, name=None, threshold=None):
+        """EvaluationResult of a model on (X, y_true), computed once."""
+        data_key = fingerprint(X)
+        key = (id(model), data_key, threshold, fingerprint(np.asarray(y_true)))
+        if key not in self._results:
+            y_pred, y_score = self._cached_predict(model, X, threshold, data_key)
+            self._results[key] = EvaluationResult(name or type(model).__name__, y_true, y_pred, y_score)
+        return self._results[key]
+
+    def invalidate(self, model):
+        """Drop every cached prediction and result of a model."""
+        model_id = id(model)
+        self._predictions = {k: v for k, v in self._predictions.items() if k[0] != model_id}
+        self._results = {k: v for k, v in self._results.items() if k[0] != model_id}
+        self._models.pop(model_id, None)
@@ -0,0 +1,173 @@
+# Figure rendering for interactive and unattended (batch) runs
+# The scripts draw each figure in a small plot function and hand it to a FigureRenderer.
+# $ML_FIGURES selects what happens to it:
+#   show - draw it and block on plt.show(), as the scripts always did (the default when a
+#          display is available)
+#   save - headless: switch to the non-interactive Agg backend and render the figure to
+#          $ML_FIGURE_DIR/<pipeline>/<name>.png in a background worker, so the script's
+#          computation continues while figures are drawn (the default without a display).
+#          Once TensorFlow (or another runtime with native thread pools) is loaded, forking is
+#          no longer safe and figures are rendered in the script's own process instead
+#   off  - skip figures entirely, e.g. when only the printed metrics are needed
+# Scatter and pair plots are fed through sample(), which keeps at most $ML_POINT_BUDGET
+# (default 5000) randomly chosen rows; set it to 0 to plot every point.
+# matplotlib itself is only imported once a figure is drawn (or to find the default mode).
+import atexit
+import multiprocessing
+import os
+import sys
+import threading
+import traceback
+
+import numpy as np
+
+from .lazy import lazy_import, resolve_globals
+
+matplotlib = lazy_import('matplotlib')
+
+ML_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ('show', 'save', 'off')
+# Backends that only write files; plt.show() does nothing with them
+FILE_BACKENDS = {'agg', 'cairo', 'pdf', 'pgf', 'ps', 'svg', 'template'}
+# Runtimes that start native thread pools: a forked child gets a copy of their locks but none
+# of their threads, and can deadlock on the first lock a vanished thread held
+THREADED_RUNTIMES = ('tensorflow', 'torch', 'jax')
+
+
+def fork_is_safe():
+    """Whether this process can still fork: no threaded runtime loaded, no other Python thread."""
+    return threading.active_count() == 1 and not any(name in sys.modules for name in THREADED_RUNTIMES)
+
+
+def _has_display():
+    if sys.platform.startswith('linux'):
+        return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+    return True
+
+
+def default_mode():
+    """$ML_FIGURES, or 'show' when figures can be shown and 'save' otherwise."""
+    mode = os.environ.get('ML_FIGURES')
+    if mode:
+        if mode not in MODES:
+            raise ValueError(f"ML_FIGURES must be one of {', '.join(MODES)}, got {mode!r}")
+        return mode
+    can_show = matplotlib.get_backend().lower() not in FILE_BACKENDS and _has_display()
+    return 'show' if can_show else 'save'
+
+
+def _save_figures(plot, path, args, kwargs):
+    import matplotlib.pyplot as plt
+    plot(*args, **kwargs)
+    numbers = plt.get_fignums()
+    stem, extension = os.path.splitext(path)
+    for i, number in enumerate(numbers):
+        figure = plt.figure(number)
+        figure.savefig(path if len(numbers) == 1 else f'{stem}-{i + 1}{extension}', bbox_inches='tight')
+    plt.close('all')
+
+
+def _render_in_child(plot, path, args, kwargs):
+    # Runs in a forked worker; os._exit skips the parent's atexit handlers
+    try:
+        _save_figures(plot, path, args, kwargs)
+    except BaseException:
+        traceback.print_exc()
+        os._exit(1)
+    os._exit(0)
+
+
+class FigureRenderer:
+    """Shows, saves (in background workers) or skips the figures of one pipeline.
+
+    In 'save' mode each figure is drawn in a forked worker process, which
+    inherits the plot function and its data without pickling; at most
+    max_workers figures render at once. Where fork is unavailable, or no
+    longer safe (see fork_is_safe), figures are saved in the calling process.
+    wait() (also run at exit) waits for the workers and reports figures that
+    failed.
+    """
+
+    def __init__(self, pipeline, mode=None, directory=None, max_workers=2, point_budget=None):
+        self.pipeline = pipeline
+        self.mode = mode or default_mode()
+        if self.mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}, got {self.mode!r}")
+        root = directory or os.environ.get('ML_FIGURE_DIR', os.path.join(ML_ROOT, '.figures'))
+        self.directory = os.path.join(root, pipeline)
+        self.max_workers = max_workers
+        self.point_budget = int(os.environ.get('ML_POINT_BUDGET', 5000) if point_budget is None else point_budget)
+        self.saved = []
+        self.failed = []
+        self._workers = []
+        self._reported = 0
+        self._pid = os.getpid()
+        self._fork = 'fork' in multiprocessing.get_all_start_methods()
+        if self.mode == 'save':
+            os.makedirs(self.directory, exist_ok=True)
+        atexit.register(self.wait)
+
+    def sample(self, *data, random_state=42):
+        """The same random rows of every array/frame, at most point_budget of them."""
+        n_rows = len(data[0])
+        if not self.point_budget or n_rows <= self.point_budget:
+            return data[0] if len(data) == 1 else data
+        rows = np.sort(np.random.default_rng(random_state).choice(n_rows, self.point_budget, replace=False))
+        sampled = tuple(part.iloc[rows] if hasattr(part, 'iloc') else np.asarray(part)[rows] for part in data)
+        return sampled[0] if len(data) == 1 else sampled
+
+    def render(self, name, plot, *args, **kwargs):
+        """Draw a figure with plot(*args, **kwargs) and show, save or skip it."""
+        if self.mode == 'off':
+            return
+        if self.mode == 'show':
+            import matplotlib.pyplot as plt
+            plot(*args, **kwargs)
+            plt.show()
+            return
+
+        # Agg renders without a display; switching before pyplot is imported costs nothing
+        matplotlib.use('Agg')
+        path = os.path.join(self.directory, f'{name}.png')
+        if not self._fork or not fork_is_safe():
+            try:
+                _save_figures(plot, path, args, kwargs)
+            except Exception:
+                # Reported like a failed worker, without ending the script
+                traceback.print_exc()
+                import matplotlib.pyplot as plt
+                plt.close('all')
+                self.failed.append(name)
+            else:
+                self.saved.append(path)
+            return
+        while len(self._workers) >= self.max_workers:
+            self._join(self._workers[0])
+        # The plotting libraries are imported here, once, and inherited by every worker
+        resolve_globals(plot)
+        worker = multiprocessing.get_context('fork').Process(target=_render_in_child,
+                                                             args=(plot, path, args, kwargs), daemon=False)
+        worker.start()
+        self._workers.append((worker, name, path))
+
+    def _join(self, entry):
+        worker, name, path = entry
+        worker.join()
+        self._workers.remove(entry)
+        if worker.exitcode == 0:
+            self.saved.append(path)
+        else:
+            self.failed.append(name)
+
+    def wait(self):
+        """Wait for the figures still rendering; returns the paths saved so far."""
+        if os.getpid() != self._pid:
+            return self.saved
+        while self._workers:
+            self._join(self._workers[0])
+        if self.mode == 'save' and len(self.saved) + len(self.failed) > self._reported:
+            self._reported = len(self.saved) + len(self.failed)
+            print(f"{len(self.saved)} figure(s) saved to {self.directory}")
+            if self.failed:
+                print(f"Figures that failed to render: {', '.join(self.failed)}")
+        return self.saved
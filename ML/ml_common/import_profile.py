@@ -0,0 +1,84 @@
+# Import-time profile of a pipeline script
+# Runs a script under `python -X importtime` and adds up the cumulative import time of each
+# top-level import by package, so the modules that dominate start-up stand out. A package
+# pulled in by another one is counted with the package that imported it first (numpy with
+# pandas, for example). With --stop-after N only the script's first N stages run (see
+# $ML_STOP_AFTER in ml_common/tracing.py), which profiles the imports made before then.
+# Figures are off and no trace is written while profiling.
+# Usage: python -m ml_common.import_profile SCRIPT [--stop-after N] [--top N]
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+
+def script_environment(stop_after=None):
+    env = dict(os.environ, ML_FIGURES='off', ML_TRACE='0')
+    env.pop('ML_STOP_AFTER', None)
+    if stop_after is not None:
+        env['ML_STOP_AFTER'] = str(stop_after)
+    return env
+
+
+def parse_importtime(stderr):
+    """(module, self seconds, cumulative seconds, nesting depth) of every -X importtime line."""
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # the header line
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        records.append((name.strip(), int(parts[0]) / 1e6, int(parts[1]) / 1e6, depth))
+    return records
+
+
+def package_times(records):
+    """Cumulative import seconds per top-level package, largest first."""
+    totals = defaultdict(float)
+    for name, _, cumulative, depth in records:
+        if depth == 0:
+            totals[name.split('.')[0]] += cumulative
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def profile_script(script, stop_after=None):
+    """Run a script once under -X importtime; returns its wall time, exit code and package times."""
+    script = os.path.abspath(script)
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-X', 'importtime', os.path.basename(script)],
+                               cwd=os.path.dirname(script), env=script_environment(stop_after),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - start
+    records = parse_importtime(completed.stderr)
+    return {'script': script, 'wall_s': wall, 'returncode': completed.returncode,
+            'import_s': sum(record[2] for record in records if record[3] == 0),
+            'packages': package_times(records)}
+
+
+def format_profile(profile, top=15):
+    lines = [f"{'package':28s} {'import s':>9s}"]
+    for package, seconds in list(profile['packages'].items())[:top]:
+        lines.append(f"{package[:28]:28s} {seconds:9.3f}")
+    lines.append(f"{os.path.basename(profile['script'])}: {profile['import_s']:.2f} s of imports "
+                 f"in {profile['wall_s']:.2f} s (exit code {profile['returncode']})")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Import-time profile of a pipeline script')
+    parser.add_argument('script', help='path of the script to profile')
+    parser.add_argument('--stop-after', type=int, default=None, help='end the script after this many stages')
+    parser.add_argument('--top', type=int, default=15, help='packages to list')
+    args = parser.parse_args(argv)
+    profile = profile_script(args.script, stop_after=args.stop_after)
+    print(format_profile(profile, top=args.top))
+    return profile['returncode']
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+# Deferred imports of heavy modules
+# lazy_import('seaborn') returns a stand-in module that imports the real one the first time
+# one of its attributes is used. A script then pays for matplotlib, seaborn, scikit-learn or
+# SciPy only when a stage that uses them runs, and not at all on paths that never do (no
+# plotting library is imported with $ML_FIGURES=off). Classes that a single stage needs are
+# imported in that stage instead (`from sklearn.svm import SVC` right before the SVM step).
+# Every deferred import is timed; with $ML_IMPORT_PROFILE=1 the times and the line that first
+# used each module are printed when the script exits. ml_common.import_profile reports the
+# imports of a whole run, eager ones included.
+import atexit
+import importlib
+import os
+import sys
+import time
+import types
+
+# One record per deferred module that has been imported: name, seconds, first use
+IMPORTS = []
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self, depth=2):
+        module = self.__dict__['_module']
+        if module is None:
+            already_loaded = self.__name__ in sys.modules
+            start = time.perf_counter()
+            module = importlib.import_module(self.__name__)
+            if not already_loaded:
+                caller = sys._getframe(depth)
+                IMPORTS.append({'module': self.__name__, 'seconds': time.perf_counter() - start,
+                                'first_use': f'{os.path.basename(caller.f_code.co_filename)}:{caller.f_lineno}'})
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name):
+    """The module `name` if it is already imported, otherwise a LazyModule for it."""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def resolve_globals(function):
+    """Import the lazy modules that `function` refers to by global name.
+
+    Used before handing a function to a forked worker, so the worker inherits
+    the imported module instead of importing it again in every process.
+    """
+    for name in function.__code__.co_names:
+        value = function.__globals__.get(name)
+        if isinstance(value, LazyModule):
+            value._load(depth=3)
+
+
+def report():
+    lines = [f"{'deferred import':32s} {'seconds':>8s}  first used at"]
+    for record in IMPORTS:
+        lines.append(f"{record['module'][:32]:32s} {record['seconds']:8.3f}  {record['first_use']}")
+    lines.append(f"{len(IMPORTS)} module(s) imported on demand, {sum(r['seconds'] for r in IMPORTS):.2f} s")
+    return '\n'.join(lines)
+
+
+def _print_report():
+    if IMPORTS and os.environ.get('ML_IMPORT_PROFILE') == '1':
+        print(f"\n{report()}")
+
+
+atexit.register(_print_report)
@@ -0,0 +1,239 @@
+# Content-addressed cache of trained models
+# An entry is keyed by the content hash of the training data plus the estimator
+# configuration, so a run with unchanged data and hyperparameters loads the fitted
+# artifacts (estimator, scaler, encoders, training history) instead of training again.
+# Entries are evicted least-recently-used first once the cache exceeds its size limit.
+import errno
+import functools
+import hashlib
+import importlib.metadata
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+from .evaluation import fingerprint
+from .lazy import lazy_import
+
+joblib = lazy_import('joblib')
+
+ML_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MAX_BYTES = 4 * 2 ** 30
+
+
+@functools.lru_cache(maxsize=None)
+def _distribution_version(package):
+    for distribution in importlib.metadata.packages_distributions().get(package, []):
+        try:
+            return importlib.metadata.version(distribution)
+        except importlib.metadata.PackageNotFoundError:
+            continue
+    return None
+
+
+def _repository_file(module_name):
+    path = getattr(sys.modules.get(module_name), '__file__', None)
+    if path is None or not os.path.abspath(path).startswith(ML_ROOT + os.sep) or not os.path.exists(path):
+        return None
+    return path
+
+
+def _repository_dependencies(module_name):
+    """module_name and the modules of this repository it uses, directly or through each other.
+
+    A module uses whatever its globals come from: imported modules, and the
+    modules defining imported functions, classes and objects.
+    """
+    found, pending = set(), [module_name]
+    while pending:
+        name = pending.pop()
+        if name in found or _repository_file(name) is None:
+            continue
+        found.add(name)
+        for value in vars(sys.modules[name]).values():
+            try:
+                dependency = value.__name__ if isinstance(value, types.ModuleType) else value.__module__
+            except Exception:
+                continue
+            if isinstance(dependency, str):
+                pending.append(dependency)
+    return sorted(found)
+
+
+def _source_version(module_name):
+    # Modules of this repository have no release: their source, and that of the repository
+    # modules they use (silhouette.py for kmeans_elbow, say), stands in for the version
+    digest = hashlib.blake2b(digest_size=8)
+    names = _repository_dependencies(module_name)
+    for name in names:
+        with open(_repository_file(name), 'rb') as file:
+            digest.update(name.encode() + b'\0' + file.read())
+    return 'source-' + digest.hexdigest() if names else None
+
+
+def _package_version(obj):
+    """'package==version' of the top-level package defining obj's class."""
+    module_name = type(obj).__module__
+    package = module_name.split('.')[0]
+    version = (getattr(sys.modules.get(package), '__version__', None) or _distribution_version(package)
+               or _source_version(module_name))
+    return f"{package}=={version or '?'}"
+
+
+def _is_keras_model(obj):
+    return type(obj).__module__.split('.')[0] in ('keras', 'tf_keras') and hasattr(obj, 'save')
+
+
+def estimator_config(estimator):
+    """Class, library version and hyperparameters of an (unfitted) estimator."""
+    params = estimator.get_params(deep=True) if hasattr(estimator, 'get_params') else vars(estimator)
+    return {'class': f'{type(estimator).__module__}.{type(estimator).__qualname__}',
+            'version': _package_version(estimator), 'params': params}
+
+
+def _without_names(config):
+    # Keras numbers auto-generated layer and optimizer names per process ('dense_1', 'adam_2')
+    if isinstance(config, dict):
+        return {k: _without_names(v) for k, v in config.items() if k != 'name'}
+    if isinstance(config, (list, tuple)):
+        return [_without_names(v) for v in config]
+    return config
+
+
+def keras_config(model):
+    """Layer configurations and compile settings of a Keras model, without auto-generated names."""
+    layers = [[type(layer).__name__, layer.get_config()] for layer in model.layers]
+    return _without_names({'class': type(model).__name__, 'version': _package_version(model),
+                           'layers': layers, 'compile': model.get_compile_config()})
+
+
+def _directory_size(path):
+    return sum(os.path.getsize(os.path.join(folder, name))
+               for folder, _, names in os.walk(path) for name in names)
+
+
+class ModelCache:
+    """Fitted-model artifacts on disk, keyed by training data and configuration.
+
+    Each entry is a directory holding the artifacts dict (joblib, with numpy
+    arrays stored uncompressed so they load as copy-on-write memory maps)
+    and any Keras models in their native .keras format. The cache lives in
+    $ML_MODEL_CACHE or ML/.model_cache; max_bytes defaults to
+    $ML_MODEL_CACHE_MAX_BYTES or 4 GiB.
+    """
+
+    def __init__(self, root=None, max_bytes=None):
+        self.root = root or os.environ.get('ML_MODEL_CACHE', os.path.join(ML_ROOT, '.model_cache'))
+        self.max_bytes = int(max_bytes or os.environ.get('ML_MODEL_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(*data, config):
+        """Hash of the training data (arrays, frames or sparse matrices) and a JSON-able config."""
+        digest = hashlib.blake2b(digest_size=16)
+        for part in data:
+            digest.update(fingerprint(part).encode())
+        digest.update(json.dumps(config, sort_keys=True, default=repr).encode())
+        return digest.hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.root, key)
+
+    def get(self, key):
+        """The artifacts stored under key, or None on a miss."""
+        entry = self._entry(key)
+        manifest_path = os.path.join(entry, 'manifest.json')
+        try:
+            with open(manifest_path) as file:
+                manifest = json.load(file)
+            artifacts = joblib.load(os.path.join(entry, 'artifacts.joblib'), mmap_mode='c')
+            if manifest['keras']:
+                from keras.models import load_model
+                for name in manifest['keras']:
+                    artifacts[name] = load_model(os.path.join(entry, f'{name}.keras'))
+        except (OSError, ValueError, KeyError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # Missing, partial or stale (pickled by code that has since changed or moved)
+            self.misses += 1
+            return None
+        # The manifest's mtime is the entry's last use
+        try:
+            os.utime(manifest_path)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return artifacts
+
+    def put(self, key, artifacts):
+        """Store a dict of fitted artifacts under key and return it unchanged."""
+        entry = self._entry(key)
+        os.makedirs(self.root, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix=f'{key}.tmp-', dir=self.root)
+        keras_names = [name for name, value in artifacts.items() if _is_keras_model(value)]
+        for name in keras_names:
+            artifacts[name].save(os.path.join(tmp, f'{name}.keras'))
+        joblib.dump({name: value for name, value in artifacts.items() if name not in keras_names},
+                    os.path.join(tmp, 'artifacts.joblib'))
+        with open(os.path.join(tmp, 'manifest.json'), 'w') as file:
+            json.dump({'keras': keras_names, 'created': time.time()}, file)
+
+        # Swap the finished entry in, so readers never see a partial one. A stale entry is
+        # renamed aside first, since deleting it in place could remove another writer's entry
+        try:
+            os.rename(entry, f'{tmp}.old')
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(f'{tmp}.old', ignore_errors=True)
+        try:
+            os.replace(tmp, entry)
+        except OSError as exc:
+            if exc.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                raise
+            # Another writer stored the same key in between; its entry is just as good
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict(keep=key)
+        return artifacts
+
+    def fit_or_load(self, estimator, X, y=None, **fit_params):
+        """A fitted copy of estimator from the cache, or estimator fitted (and stored) on a miss."""
+        key = self.key(X, *([] if y is None else [y]),
+                       config={'estimator': estimator_config(estimator), 'fit': fit_params})
+        artifacts = self.get(key)
+        if artifacts is None:
+            estimator = estimator.fit(X, **fit_params) if y is None else estimator.fit(X, y, **fit_params)
+            artifacts = self.put(key, {'estimator': estimator})
+        return artifacts['estimator']
+
+    def entries(self):
+        """(key, size in bytes, last use time) of every entry, least recently used first."""
+        if not os.path.isdir(self.root):
+            return []
+        found = []
+        for key in os.listdir(self.root):
+            manifest_path = os.path.join(self.root, key, 'manifest.json')
+            if '.tmp-' in key:
+                continue
+            try:
+                found.append((key, _directory_size(self._entry(key)), os.path.getmtime(manifest_path)))
+            except FileNotFoundError:
+                # Not an entry, or swapped out by another writer while being measured
+                continue
+        return sorted(found, key=lambda item: item[2])
+
+    def evict(self, keep=None):
+        """Drop least-recently-used entries until the cache fits in max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if key != keep:
+                shutil.rmtree(self._entry(key), ignore_errors=True)
+                total -= size
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
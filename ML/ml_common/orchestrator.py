@@ -0,0 +1,273 @@
+# Run the ML_* pipelines concurrently as a dependency-aware job graph
+# Every job runs its script in its own process with an explicit CPU budget. The budget is
+# passed through the environment controls that NumPy/BLAS (OpenMP, OpenBLAS, MKL), joblib
+# (scikit-learn's n_jobs=-1), TensorFlow and ml_common.parallel read at start-up, so
+# pipelines running side by side do not each spawn a thread per core.
+#
+# A run collects everything in one place, ML/.runs/<timestamp>/:
+#   <job>.log      stdout and stderr of the job
+#   traces/        the jobs' stage traces (ml_common.tracing)
+#   figures/       the jobs' figures (rendered headless, see ml_common.figures)
+#   report.json    status, timing, CPU budget, trace totals and artifacts of every job
+# The report compares the run's makespan with the sequential baseline: the last run made
+# with --workers 1. Without one, the speedup is only an estimate, from the CPU time the jobs
+# used (their wall times overlap, so their sum is no sequential time).
+# Usage: python -m ml_common.orchestrator [--workers N] [--cpus N] [--jobs NAME ...]
+#        [--with-benchmarks]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from .datasets import dataset_path
+
+ML_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+THREAD_VARIABLES = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS',
+                    'NUMEXPR_NUM_THREADS', 'LOKY_MAX_CPU_COUNT', 'TF_NUM_INTRAOP_THREADS', 'ML_MAX_WORKERS']
+
+# name -> script (relative to ML/), jobs it needs (after) or only runs after (wait_for),
+# dataset it reads, CPU weight.
+# 'after' jobs must succeed, or the job is skipped; 'wait_for' jobs only have to finish.
+# weight is the job's share of the CPUs relative to the others running with it: the
+# TensorFlow and random-forest pipelines get more, the small ones one core at most.
+JOBS = {
+    'ML_1_Uber_Price_Prediction': {'script': 'ML_1_Uber_Price_Prediction/ML_1_Uber_Price_Prediction.py',
+                                   'dataset': 'uber', 'weight': 2},
+    'ML_2_Email_Spam_Classification': {'script': 'ML_2_Email_Spam_Classification/ML_2_Email_Spam_Classification.py',
+                                       'dataset': 'emails', 'weight': 1},
+    'ML_3_Bank_Customer_Analysis': {'script': 'ML_3_Bank_Customer_Analysis/ML_3_Bank_Customer_Analysis.py',
+                                    'dataset': 'churn', 'weight': 2},
+    'ML_4_Gradient_Descent_Algorithm': {'script': 'ML_4_Gradient_Descent_Algorithm/ML_4_Gradient_Descent_Algorithm.py',
+                                        'max_cpus': 1},
+    'ML_5_KNN_Algorithm_Diabetes': {'script': 'ML_5_KNN_Algorithm_Diabetes/ML_5_KNN_Algorithm_Diabetes.py',
+                                    'dataset': 'diabetes', 'weight': 1},
+    'ML_6_KMeansClustering_Sales_Data': {'script': 'ML_6_KMeansClustering_Sales_Data/ML_6_KMeansClustering_Sales_Data.py',
+                                         'dataset': 'sales', 'weight': 1},
+}
+PIPELINES = list(JOBS)
+JOBS.update({
+    # Timed: it starts once the pipelines have finished, so they do not compete with it for the CPUs
+    'benchmark_scaling': {'module': 'ml_common.benchmark_scaling', 'wait_for': PIPELINES,
+                          'benchmark': True, 'weight': 1},
+})
+
+
+def cpu_budgets(names, cpus, running=None):
+    """CPUs for jobs starting next to `running` ({name: budget} of the jobs already running).
+
+    The cpus the running jobs leave free are shared by weight among the new
+    jobs, at least 1 each, so the budgets never add up to more than `cpus`
+    as long as no more jobs start than there are free cpus.
+    """
+    free = cpus - sum((running or {}).values())
+    weights = {name: JOBS[name].get('weight', 1) for name in names}
+    total = sum(weights.values())
+    budgets = {name: max(1, min(free * weight // total, JOBS[name].get('max_cpus', cpus)))
+               for name, weight in weights.items()}
+    # Raising small shares to 1 can overshoot: take the excess back from the largest budgets
+    while sum(budgets.values()) > max(free, len(budgets)):
+        budgets[max(budgets, key=budgets.get)] -= 1
+    return budgets
+
+
+def job_environment(cpus, run_dir):
+    env = dict(os.environ)
+    env.update({variable: str(cpus) for variable in THREAD_VARIABLES})
+    env['TF_NUM_INTEROP_THREADS'] = '1'
+    env.setdefault('ML_FIGURES', 'save')
+    env['ML_FIGURE_DIR'] = os.path.join(run_dir, 'figures')
+    env['ML_TRACE_DIR'] = os.path.join(run_dir, 'traces')
+    return env
+
+
+def run_job(name, cpus, run_dir):
+    """Run one job to completion; returns its record for the report."""
+    job = JOBS[name]
+    if 'module' in job:
+        command, cwd = [sys.executable, '-m', job['module']], ML_ROOT
+    else:
+        script = os.path.join(ML_ROOT, job['script'])
+        command, cwd = [sys.executable, os.path.basename(script)], os.path.dirname(script)
+    log_path = os.path.join(run_dir, f'{name}.log')
+    start = time.time()
+    cpu_s = None
+    with open(log_path, 'w') as log:
+        process = subprocess.Popen(command, cwd=cwd, env=job_environment(cpus, run_dir),
+                                   stdout=log, stderr=subprocess.STDOUT)
+        if hasattr(os, 'wait4'):
+            # The resource usage of the job and the worker processes it waited for
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            cpu_s = usage.ru_utime + usage.ru_stime
+        returncode = process.wait()
+    end = time.time()
+    return {'name': name, 'status': 'ok' if returncode == 0 else 'failed', 'returncode': returncode,
+            'cpus': cpus, 'start': start, 'end': end, 'wall_s': end - start, 'cpu_s': cpu_s, 'log': log_path}
+
+
+def _missing_dataset(name):
+    try:
+        if JOBS[name].get('dataset'):
+            dataset_path(JOBS[name]['dataset'])
+    except FileNotFoundError as exc:
+        return str(exc)
+    return None
+
+
+def run_graph(names, run_dir, workers, cpus):
+    """Run the jobs in dependency order, at most `workers` at a time; returns their records.
+
+    A job starts once everything it needs ('after') has succeeded, everything
+    it waits for ('wait_for') has finished and a cpu is free; jobs whose
+    dependency failed or whose dataset is missing are recorded as skipped.
+    Ready jobs are started longest-first, by their time in the previous run.
+    """
+    previous = {job['name']: job['wall_s'] for job in (_last_report() or {}).get('jobs', []) if 'wall_s' in job}
+    records, running, budgets_running = {}, {}, {}
+    for name in names:
+        reason = _missing_dataset(name)
+        if reason is not None:
+            records[name] = {'name': name, 'status': 'skipped', 'reason': reason}
+            print(f"[skip] {name}: {reason}", flush=True)
+    pending = [name for name in names if name not in records]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            for name in list(pending):
+                failed = [dep for dep in JOBS[name].get('after', [])
+                          if records.get(dep, {}).get('status') in ('failed', 'skipped')]
+                if failed:
+                    records[name] = {'name': name, 'status': 'skipped',
+                                     'reason': f"dependency did not succeed: {', '.join(failed)}"}
+                    pending.remove(name)
+                    print(f"[skip] {name}: {records[name]['reason']}", flush=True)
+
+            ready = [name for name in pending
+                     if all(records.get(dep, {}).get('status') == 'ok'
+                            for dep in JOBS[name].get('after', []) if dep in names)
+                     and all(dep in records for dep in JOBS[name].get('wait_for', []) if dep in names)]
+            ready.sort(key=lambda name: previous.get(name, 0.0), reverse=True)
+            # A job only starts when at least one cpu is not budgeted to a running job
+            free = max(0, cpus - sum(budgets_running.values()))
+            starting = ready[:min(workers - len(running), free)]
+            if starting:
+                budgets = cpu_budgets(starting, cpus, running=budgets_running)
+                for name in starting:
+                    pending.remove(name)
+                    budgets_running[name] = budgets[name]
+                    print(f"[start] {name} ({budgets[name]} cpu)", flush=True)
+                    running[pool.submit(run_job, name, budgets[name], run_dir)] = name
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                del budgets_running[name]
+                records[name] = future.result()
+                print(f"[{records[name]['status']}] {name} in {records[name]['wall_s']:.1f} s", flush=True)
+    return [records[name] for name in names]
+
+
+def _collect_artifacts(records, run_dir):
+    # Each job's trace totals and the figures it saved
+    trace_dir, figure_dir = os.path.join(run_dir, 'traces'), os.path.join(run_dir, 'figures')
+    for record in records:
+        traces = sorted(name for name in os.listdir(trace_dir) if name.startswith(record['name'] + '-')) \
+            if os.path.isdir(trace_dir) else []
+        if traces:
+            record['trace'] = os.path.join(trace_dir, traces[-1])
+            with open(record['trace']) as file:
+                record['trace_total'] = json.load(file)['total']
+        figures = os.path.join(figure_dir, record['name'])
+        if os.path.isdir(figures):
+            record['figures'] = sorted(os.path.join(figures, name) for name in os.listdir(figures))
+
+
+def runs_root():
+    return os.environ.get('ML_RUN_DIR', os.path.join(ML_ROOT, '.runs'))
+
+
+def _last_report(workers=None):
+    """The most recent run report (made with `workers` workers, if given), or None."""
+    root = runs_root()
+    if not os.path.isdir(root):
+        return None
+    for run in sorted(os.listdir(root), reverse=True):
+        path = os.path.join(root, run, 'report.json')
+        if os.path.exists(path):
+            with open(path) as file:
+                report = json.load(file)
+            if workers is None or report['workers'] == workers:
+                return report
+    return None
+
+
+def format_report(report):
+    lines = [f"{'job':34s} {'status':>8s} {'cpus':>5s} {'wall s':>9s} {'peak MiB':>9s}"]
+    for job in report['jobs']:
+        peak = (job.get('trace_total') or {}).get('peak_rss_mb')
+        wall = f"{job['wall_s']:.1f}" if 'wall_s' in job else '-'
+        lines.append(f"{job['name'][:34]:34s} {job['status']:>8s} {job.get('cpus', '-'):>5} {wall:>9s} "
+                     f"{'-' if peak is None else format(peak, '.0f'):>9s}")
+    baseline = report['sequential_baseline']
+    summary = f"\nMakespan {report['makespan_s']:.1f} s with {report['workers']} worker(s) on {report['cpus']} cpu(s)"
+    if baseline['wall_s'] is None:
+        summary += f"; no sequential baseline ({baseline['source']})"
+    elif baseline.get('estimate'):
+        summary += (f"; estimated sequential time {baseline['wall_s']:.1f} s ({baseline['source']}), "
+                    f"estimated speedup {baseline['wall_s'] / report['makespan_s']:.2f}x; "
+                    f"run with --workers 1 to measure it")
+    else:
+        summary += (f"; sequential baseline {baseline['wall_s']:.1f} s ({baseline['source']}), "
+                    f"speedup {baseline['wall_s'] / report['makespan_s']:.2f}x")
+    lines.append(summary)
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the ML pipelines concurrently with CPU budgets')
+    parser.add_argument('--workers', type=int, default=None, help='jobs running at once (default: one per 2 cpus)')
+    parser.add_argument('--cpus', type=int, default=os.cpu_count() or 1, help='cpus shared by the jobs')
+    parser.add_argument('--jobs', nargs='*', choices=sorted(JOBS), help='only these jobs (and nothing they need)')
+    parser.add_argument('--with-benchmarks', action='store_true', help='also run the benchmark jobs')
+    args = parser.parse_args(argv)
+
+    names = args.jobs or [name for name, job in JOBS.items() if args.with_benchmarks or not job.get('benchmark')]
+    workers = args.workers or max(1, args.cpus // 2)
+    baseline = _last_report(workers=1)
+    run_dir = os.path.join(runs_root(), datetime.now().strftime('%Y%m%d-%H%M%S'))
+    os.makedirs(run_dir, exist_ok=True)
+
+    start = time.time()
+    records = run_graph(names, run_dir, workers, args.cpus)
+    makespan = time.time() - start
+    _collect_artifacts(records, run_dir)
+
+    if workers == 1:
+        baseline_info = {'wall_s': makespan, 'source': 'this run'}
+    elif baseline is not None and {job['name'] for job in baseline['jobs']} >= set(names):
+        baseline_info = {'wall_s': sum(job.get('wall_s', 0.0) for job in baseline['jobs'] if job['name'] in names),
+                         'source': f"measured {baseline['started']}"}
+    elif all(record.get('cpu_s') is not None for record in records if 'wall_s' in record):
+        # About the sequential time of single-core jobs; a job that uses several cores when it
+        # runs alone finishes in less wall time than the CPU time it used
+        baseline_info = {'wall_s': sum(record.get('cpu_s', 0.0) for record in records), 'estimate': True,
+                         'source': 'sum of job cpu times'}
+    else:
+        baseline_info = {'wall_s': None, 'source': 'no --workers 1 run to compare with'}
+    report = {'started': datetime.fromtimestamp(start).isoformat(timespec='seconds'), 'workers': workers,
+              'cpus': args.cpus, 'makespan_s': makespan, 'sequential_baseline': baseline_info, 'jobs': records}
+    with open(os.path.join(run_dir, 'report.json'), 'w') as file:
+        json.dump(report, file, indent=1)
+
+    print(f"\n{format_report(report)}\nRun directory: {run_dir}")
+    return 1 if any(record['status'] == 'failed' for record in records) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,42 @@
+# Process pools that are safe to start from the pipeline scripts
+# The scripts run their steps at module level without an `if __name__ == '__main__'`
+# guard, so the 'spawn' start method would re-run the whole script in every worker.
+# process_pool() therefore forks where the platform allows it and otherwise runs the
+# jobs one after another in the calling process.
+# $ML_MAX_WORKERS caps the number of worker processes (the orchestrator sets it to the
+# pipeline's CPU budget, so concurrently running pipelines do not oversubscribe the cores).
+import multiprocessing
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+
+
+class SerialExecutor(Executor):
+    """Executor that runs each submitted job immediately in the calling process."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+        return future
+
+
+def max_workers_limit():
+    return int(os.environ.get('ML_MAX_WORKERS') or os.cpu_count() or 1)
+
+
+def default_workers():
+    return max(1, max_workers_limit())
+
+
+def process_pool(max_workers=None):
+    """A fork-based ProcessPoolExecutor, or a SerialExecutor where fork is unavailable.
+
+    max_workers=1 (or a single-core machine) also gives the serial executor,
+    which avoids the cost of starting worker processes for no parallelism.
+    """
+    max_workers = min(max_workers or default_workers(), max_workers_limit())
+    if max_workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('fork'))
+    return SerialExecutor()
@@ -0,0 +1,121 @@
+# Batched, bounded-memory scoring of a whole dataset
+# BlockScorer.score() walks the feature matrix in fixed-size row blocks and runs every model
+# on each block in the same pass, writing the predictions into output arrays allocated once
+# for the full dataset. Only the blocks being scored are ever materialized (prepared, cast,
+# scaled), so peak memory does not grow with the table; blocks are scored on up to
+# $ML_MAX_WORKERS threads (NumPy, BLAS and scikit-learn's tree and neighbour code release
+# the GIL), and the outputs are filled in place by row range.
+# With $ML_SCORE_DIR set the outputs are .npy memory maps under $ML_SCORE_DIR/<pipeline>/,
+# so predictions stream to disk instead of being held in memory. Rows already predicted
+# elsewhere (the test split, whose predictions the Evaluator has cached) can be passed in
+# and are copied into the outputs instead of being scored again.
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .parallel import max_workers_limit
+
+DEFAULT_BLOCK_ROWS = 65_536
+
+
+def _rows(X, start, stop):
+    return X.iloc[start:stop] if hasattr(X, 'iloc') else X[start:stop]
+
+
+def _take(X, positions):
+    return X.iloc[positions] if hasattr(X, 'iloc') else X[positions]
+
+
+class BlockScorer:
+    """Scores datasets block by block into preallocated (optionally on-disk) outputs.
+
+    models passed to score() map an output name to a predict function (or an
+    estimator, whose predict is used); transform, if given, prepares each
+    block once for all of them, e.g. selecting columns or scaling.
+    """
+
+    def __init__(self, pipeline, block_rows=None, max_workers=None, directory=None, verbose=True):
+        self.pipeline = pipeline
+        self.block_rows = int(block_rows or DEFAULT_BLOCK_ROWS)
+        self.max_workers = max(1, min(max_workers or max_workers_limit(), max_workers_limit()))
+        root = directory or os.environ.get('ML_SCORE_DIR')
+        self.directory = os.path.join(root, pipeline) if root else None
+        self.verbose = verbose
+
+    def _allocate(self, name, n_rows, first):
+        shape, dtype = (n_rows,) + first.shape[1:], first.dtype
+        if self.directory is None:
+            return np.empty(shape, dtype=dtype)
+        os.makedirs(self.directory, exist_ok=True)
+        return np.lib.format.open_memmap(os.path.join(self.directory, f'{name}.npy'),
+                                         mode='w+', dtype=dtype, shape=shape)
+
+    def score(self, X, models, transform=None, known=None):
+        """Predictions of every model for every row of X, as {name: array}.
+
+        known, if given, is (row_indices, {name: predictions of those rows}):
+        the rows are left out of the blocks and their predictions copied into
+        the outputs. Empty input gives empty outputs.
+        """
+        predictors = {name: getattr(model, 'predict', model) for name, model in models.items()}
+        n_rows = X.shape[0]
+        starts = range(0, n_rows, self.block_rows)
+        outputs = {}
+        known_rows, known_values = (None, {}) if known is None else known
+        to_score = np.ones(n_rows, dtype=bool)
+        if known_rows is not None:
+            to_score[known_rows] = False
+
+        def score_block(start):
+            stop = min(start + self.block_rows, n_rows)
+            positions = np.flatnonzero(to_score[start:stop])
+            if not len(positions):
+                return start, positions, {}
+            block = _rows(X, start, stop)
+            if len(positions) < stop - start:
+                block = _take(block, positions)
+            if transform is not None:
+                block = transform(block)
+            return start, positions, {name: np.asarray(predict(block)) for name, predict in predictors.items()}
+
+        def store(start, positions, predictions):
+            for name, values in predictions.items():
+                if name not in outputs:
+                    # The first block fixes each output's dtype and trailing shape
+                    outputs[name] = self._allocate(name, n_rows, values)
+                outputs[name][start + positions] = values
+
+        begin = time.perf_counter()
+        if self.max_workers == 1 or len(starts) <= 1:
+            for start in starts:
+                store(*score_block(start))
+        else:
+            # At most two blocks per worker are in flight, which bounds the memory they hold
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                pending = []
+                for start in starts:
+                    pending.append(pool.submit(score_block, start))
+                    if len(pending) >= 2 * self.max_workers:
+                        store(*pending.pop(0).result())
+                for future in pending:
+                    store(*future.result())
+        for name in predictors:
+            values = known_values.get(name)
+            if name not in outputs:
+                # Nothing was scored for this output (no rows, or all of them known)
+                outputs[name] = self._allocate(name, n_rows, np.asarray(values) if values is not None else np.empty(0))
+            if values is not None:
+                outputs[name][known_rows] = values
+        for values in outputs.values():
+            if isinstance(values, np.memmap):
+                values.flush()
+        if self.verbose:
+            seconds = time.perf_counter() - begin
+            target = f" -> {self.directory}" if self.directory else ""
+            n_scored = int(to_score.sum())
+            print(f"[scoring] {n_scored} rows x {len(predictors)} model(s) in {len(starts)} block(s) of "
+                  f"{self.block_rows} on {self.max_workers} thread(s): {seconds:.2f} s "
+                  f"({n_scored / max(seconds, 1e-9):,.0f} rows/s){target}")
+        return outputs
@@ -0,0 +1,270 @@
+# Synthetic, schema-faithful versions of the five datasets
+# Every generator returns a frame with the column names and dtypes of the original CSV,
+# value ranges and missing-value conventions close to it, and a target that depends on
+# the features the way the pipelines expect. Low-cardinality text columns are returned as
+# categoricals (they are plain strings once written to CSV), so millions of rows stay cheap.
+# Usage: python -m ml_common.synthetic {uber,emails,churn,diabetes,sales} N_ROWS PATH
+import argparse
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+NYC_LATITUDE, NYC_LONGITUDE = 40.75, -73.98
+
+
+def _categorical(rng, values, n_rows, p=None):
+    return pd.Categorical.from_codes(rng.choice(len(values), size=n_rows, p=p), categories=values)
+
+
+def _sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+def uber_trips(n_rows, seed=42, start=0, text=True, dirty=True):
+    """Rows of uber.csv: NYC trips whose fare grows with distance.
+
+    With dirty=True about 1% of fares are missing, 1% of dates unparseable,
+    2% of trips have (0, 0) coordinates and some passenger counts are out of
+    range, as in the real file. text=False skips the two string columns
+    ('key' and the pickup time as text) and returns pickup_datetime already
+    parsed, which is what the loader produces.
+    """
+    rng = np.random.default_rng(seed)
+    seconds = rng.integers(0, 6 * 365 * 86400, n_rows)
+    times = pd.Timestamp('2009-01-01', tz='UTC') + pd.to_timedelta(seconds, unit='s')
+
+    pickup_lat = rng.normal(NYC_LATITUDE, 0.03, n_rows)
+    pickup_lon = rng.normal(NYC_LONGITUDE, 0.03, n_rows)
+    trip_km = rng.gamma(1.5, 2.2, n_rows)
+    bearing = rng.uniform(0, 2 * np.pi, n_rows)
+    dropoff_lat = pickup_lat + trip_km * np.cos(bearing) / 111.0
+    dropoff_lon = pickup_lon + trip_km * np.sin(bearing) / (111.0 * np.cos(np.radians(NYC_LATITUDE)))
+    fare = np.round(2.5 + 1.56 * trip_km + rng.gamma(1.0, 1.5, n_rows), 2)
+    passengers = rng.choice([1, 1, 1, 1, 1, 2, 2, 3, 4, 5, 6], n_rows)
+
+    if dirty:
+        fare[rng.random(n_rows) < 0.005] *= -1
+        fare[rng.random(n_rows) < 0.01] = np.nan
+        nowhere = rng.random(n_rows) < 0.02
+        for column in (pickup_lat, pickup_lon, dropoff_lat, dropoff_lon):
+            column[nowhere] = 0.0
+        passengers[rng.random(n_rows) < 0.005] = rng.choice([0, 208], 1)[0]
+
+    df = pd.DataFrame({'Unnamed: 0': np.arange(start, start + n_rows)})
+    if text:
+        df['key'] = times.strftime('%Y-%m-%d %H:%M:%S.0000001')
+    df['fare_amount'] = fare
+    df['pickup_datetime'] = times.strftime('%Y-%m-%d %H:%M:%S UTC') if text else times
+    if text and dirty:
+        df.loc[rng.random(n_rows) < 0.01, 'pickup_datetime'] = 'not a date'
+    df['pickup_longitude'] = pickup_lon
+    df['pickup_latitude'] = pickup_lat
+    df['dropoff_longitude'] = dropoff_lon
+    df['dropoff_latitude'] = dropoff_lat
+    df['passenger_count'] = passengers
+    return df
+
+
+def email_counts(n_rows, n_words=3000, seed=42, spam_rate=0.29, mean_tokens=60):
+    """(email_ids, X, y) for emails.csv: word counts as a CSR matrix and the spam label.
+
+    Word frequencies follow a Zipf law; spam and ham each over-use their own
+    subset of the vocabulary, so the classes are separable but overlap.
+    """
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n_rows) < spam_rate).astype(np.int64)
+    base = 1 / np.arange(1, n_words + 1) ** 1.1
+    class_p = []
+    for _ in range(2):
+        boost = np.ones(n_words)
+        boost[rng.choice(n_words, n_words // 20, replace=False)] = 8.0
+        p = base * boost
+        class_p.append(p / p.sum())
+
+    lengths = np.maximum(rng.poisson(rng.lognormal(np.log(mean_tokens), 0.6, n_rows)), 1)
+    rows, words = [], []
+    for label in (0, 1):
+        docs = np.flatnonzero(y == label)
+        rows.append(np.repeat(docs, lengths[docs]))
+        words.append(rng.choice(n_words, size=lengths[docs].sum(), p=class_p[label]))
+    rows, words = np.concatenate(rows), np.concatenate(words)
+    # Duplicate (row, word) pairs are summed into counts
+    X = sparse.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, words)), shape=(n_rows, n_words))
+    X.sum_duplicates()
+    return np.array([f'Email {i + 1}' for i in range(n_rows)], dtype=object), X, y
+
+
+def email_frame(n_rows, n_words=3000, seed=42, start=0):
+    """Dense emails.csv frame: 'Email No.', one count column per word, 'Prediction'."""
+    _, X, y = email_counts(n_rows, n_words=n_words, seed=seed)
+    df = pd.DataFrame(X.toarray(), columns=[f'word{i}' for i in range(n_words)])
+    df.insert(0, 'Email No.', [f'Email {i + 1}' for i in range(start, start + n_rows)])
+    df['Prediction'] = y
+    return df
+
+
+SURNAMES = ['Smith', 'Scott', 'Martin', 'Walker', 'Brown', 'Yeh', 'Shih', 'Genovese', 'Maclean', 'Wright',
+            'Hargrave', 'Hill', 'Onio', 'Boni', 'Mitchell', 'Chu', 'Bartlett', 'Obinna', 'He', 'H?']
+
+
+def churn_customers(n_rows, seed=42, start=0):
+    """Rows of Churn_Modelling.csv; churn is likelier for older, inactive and German customers."""
+    rng = np.random.default_rng(seed)
+    geography = rng.choice(3, size=n_rows, p=[0.5, 0.25, 0.25])
+    age = np.clip(np.round(rng.gamma(14.0, 2.8, n_rows)), 18, 92).astype(np.int64)
+    active = (rng.random(n_rows) < 0.515).astype(np.int64)
+    products = rng.choice([1, 2, 3, 4], size=n_rows, p=[0.508, 0.459, 0.027, 0.006])
+    has_balance = rng.random(n_rows) > 0.36
+    balance = np.where(has_balance, np.round(rng.normal(119_800, 30_000, n_rows).clip(3_000, 251_000), 2), 0.0)
+    logit = (-4.0 + 0.07 * age - 1.0 * active + 0.75 * (geography == 1) + 0.000002 * balance
+             + 2.5 * (products >= 3) - 0.6 * (products == 2))
+
+    return pd.DataFrame({
+        'RowNumber': np.arange(start + 1, start + n_rows + 1),
+        'CustomerId': 15_565_701 + rng.integers(0, 250_000, n_rows),
+        'Surname': _categorical(rng, SURNAMES, n_rows),
+        'CreditScore': np.clip(np.round(rng.normal(650, 96, n_rows)), 350, 850).astype(np.int64),
+        'Geography': pd.Categorical.from_codes(geography, categories=['France', 'Germany', 'Spain']),
+        'Gender': _categorical(rng, ['Female', 'Male'], n_rows, p=[0.454, 0.546]),
+        'Age': age,
+        'Tenure': rng.integers(0, 11, n_rows),
+        'Balance': balance,
+        'NumOfProducts': products,
+        'HasCrCard': (rng.random(n_rows) < 0.7055).astype(np.int64),
+        'IsActiveMember': active,
+        'EstimatedSalary': np.round(rng.uniform(11.58, 199_992.48, n_rows), 2),
+        'Exited': (rng.random(n_rows) < _sigmoid(logit)).astype(np.int64),
+    })
+
+
+def diabetes_patients(n_rows, seed=42):
+    """Rows of diabetes.csv, with the dataset's zeros-for-missing convention in the clinical columns."""
+    rng = np.random.default_rng(seed)
+    age = np.clip(np.round(21 + rng.gamma(1.6, 7.5, n_rows)), 21, 81).astype(np.int64)
+    glucose = np.clip(np.round(rng.normal(121, 30, n_rows)), 44, 199)
+    bmi = np.round(np.clip(rng.normal(32.4, 6.9, n_rows), 18.2, 67.1), 1)
+    pedigree = np.round(np.clip(rng.lognormal(-0.9, 0.6, n_rows), 0.078, 2.42), 3)
+    outcome = rng.random(n_rows) < _sigmoid(-9.0 + 0.035 * glucose + 0.09 * bmi + 0.9 * pedigree + 0.015 * age)
+
+    df = pd.DataFrame({
+        'Pregnancies': np.minimum(rng.poisson(3.8, n_rows), 17),
+        'Glucose': glucose.astype(np.int64),
+        'BloodPressure': np.clip(np.round(rng.normal(72, 12, n_rows)), 24, 122).astype(np.int64),
+        'SkinThickness': np.clip(np.round(rng.normal(29, 10, n_rows)), 7, 99).astype(np.int64),
+        'Insulin': np.clip(np.round(rng.lognormal(4.8, 0.7, n_rows)), 14, 846).astype(np.int64),
+        'BMI': bmi,
+        'Pedigree': pedigree,
+        'Age': age,
+        'Outcome': outcome.astype(np.int64),
+    })
+    # Share of recorded zeros (missing measurements) per column in the real file
+    for column, share in [('Glucose', 0.007), ('BloodPressure', 0.046), ('SkinThickness', 0.296),
+                          ('Insulin', 0.487), ('BMI', 0.014)]:
+        df.loc[rng.random(n_rows) < share, column] = 0
+    return df
+
+
+PRODUCT_LINES = ['Classic Cars', 'Vintage Cars', 'Motorcycles', 'Planes', 'Trucks and Buses', 'Ships', 'Trains']
+STATUSES = ['Shipped', 'Cancelled', 'Resolved', 'On Hold', 'In Process', 'Disputed']
+# country -> (territory, city, state, postal code)
+LOCATIONS = {
+    'USA': (None, 'NYC', 'NY', '10022'), 'Spain': ('EMEA', 'Madrid', None, '28034'),
+    'France': ('EMEA', 'Paris', None, '75016'), 'Australia': ('APAC', 'Melbourne', 'Victoria', '3004'),
+    'UK': ('EMEA', 'London', None, 'WX1 6LT'), 'Italy': ('EMEA', 'Torino', None, '10100'),
+    'Finland': ('EMEA', 'Helsinki', None, '21240'), 'Norway': ('EMEA', 'Stavern', None, '4110'),
+    'Singapore': ('APAC', 'Singapore', None, '079903'), 'Japan': ('Japan', 'Tokyo', 'Tokyo', '106-0032'),
+}
+
+
+def sales_orders(n_rows, seed=42, start=0, n_customers=92):
+    """Rows of sales_data_sample.csv; customer, product and date columns are mutually consistent."""
+    rng = np.random.default_rng(seed)
+    countries = list(LOCATIONS)
+    customer_country = rng.choice(len(countries), size=n_customers,
+                                  p=np.array([36, 12, 11, 7, 6, 5, 5, 4, 4, 10]) / 100)
+    customer = rng.choice(n_customers, size=n_rows, p=rng.dirichlet(np.full(n_customers, 0.8)))
+    country = customer_country[customer]
+
+    n_products = 109
+    product_line = rng.choice(len(PRODUCT_LINES), size=n_products, p=[0.34, 0.21, 0.12, 0.11, 0.1, 0.08, 0.04])
+    msrp = rng.integers(33, 215, n_products)
+    product = rng.integers(0, n_products, n_rows)
+
+    # Dates, like every other text column, are formatted once per distinct value
+    calendar = pd.date_range('2003-01-06', periods=881, freq='D')
+    day = rng.integers(0, len(calendar), n_rows)
+    dates = calendar[day]
+    quantity = np.clip(np.round(rng.normal(35, 9.7, n_rows)), 6, 97).astype(np.int64)
+    # The listed unit price is capped at 100 as in the real data; SALES uses the uncapped price
+    unit_price = msrp[product] * rng.uniform(0.8, 1.15, n_rows)
+    sales = np.round(quantity * unit_price, 2)
+
+    def location_column(field):
+        values = [LOCATIONS[name][field] for name in countries]
+        categories = sorted({value for value in values if value is not None})
+        codes = np.array([-1 if value is None else categories.index(value) for value in values])
+        return pd.Categorical.from_codes(codes[country], categories=categories)
+
+    return pd.DataFrame({
+        'ORDERNUMBER': 10100 + (start + np.arange(n_rows)) // 9,
+        'QUANTITYORDERED': quantity,
+        'PRICEEACH': np.round(np.minimum(unit_price, 100.0), 2),
+        'ORDERLINENUMBER': rng.integers(1, 19, n_rows),
+        'SALES': sales,
+        'ORDERDATE': pd.Categorical.from_codes(day, categories=[f'{date.month}/{date.day}/{date.year} 0:00'
+                                                                for date in calendar]),
+        'STATUS': _categorical(rng, STATUSES, n_rows, p=[0.927, 0.021, 0.017, 0.016, 0.012, 0.007]),
+        'QTR_ID': dates.quarter.to_numpy().astype(np.int64),
+        'MONTH_ID': dates.month.to_numpy().astype(np.int64),
+        'YEAR_ID': dates.year.to_numpy().astype(np.int64),
+        'PRODUCTLINE': pd.Categorical.from_codes(product_line[product], categories=PRODUCT_LINES),
+        'MSRP': msrp[product],
+        'PRODUCTCODE': pd.Categorical.from_codes(product, categories=[f'S{10 + i % 63}_{1000 + 37 * i}'
+                                                                       for i in range(n_products)]),
+        'CUSTOMERNAME': pd.Categorical.from_codes(customer, categories=[f'Customer {i} Co.'
+                                                                         for i in range(n_customers)]),
+        'PHONE': pd.Categorical.from_codes(customer, categories=[f'555-{1000 + i}' for i in range(n_customers)]),
+        'ADDRESSLINE1': pd.Categorical.from_codes(customer, categories=[f'{10 + i} Market St.'
+                                                                         for i in range(n_customers)]),
+        'ADDRESSLINE2': pd.Categorical.from_codes(np.where(rng.random(n_rows) < 0.11, 0, -1), categories=['Level 3']),
+        'CITY': location_column(1),
+        'STATE': location_column(2),
+        'POSTALCODE': location_column(3),
+        'COUNTRY': pd.Categorical.from_codes(country, categories=countries),
+        'TERRITORY': location_column(0),
+        'CONTACTLASTNAME': pd.Categorical.from_codes(customer, categories=[f'Last{i}' for i in range(n_customers)]),
+        'CONTACTFIRSTNAME': pd.Categorical.from_codes(customer, categories=[f'First{i}' for i in range(n_customers)]),
+        'DEALSIZE': pd.Categorical.from_codes(np.select([sales < 3000, sales < 7000], [0, 1], 2),
+                                              categories=['Small', 'Medium', 'Large']),
+    })
+
+
+GENERATORS = {
+    'uber': uber_trips,
+    'emails': email_frame,
+    'churn': churn_customers,
+    'diabetes': lambda n_rows, seed=42, start=0: diabetes_patients(n_rows, seed=seed),
+    'sales': sales_orders,
+}
+
+
+def write_csv(name, path, n_rows, chunk_rows=500_000, seed=42):
+    """Write n_rows of a synthetic dataset to a CSV laid out like the original, chunk by chunk."""
+    chunk_rows = min(chunk_rows, 5_000) if name == 'emails' else chunk_rows
+    for i, start in enumerate(range(0, n_rows, chunk_rows)):
+        chunk = GENERATORS[name](min(chunk_rows, n_rows - start), seed=seed + i, start=start)
+        chunk.to_csv(path, index=False, mode='w' if i == 0 else 'a', header=i == 0,
+                     encoding='latin1' if name == 'sales' else None)
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a synthetic dataset CSV')
+    parser.add_argument('name', choices=sorted(GENERATORS))
+    parser.add_argument('n_rows', type=int)
+    parser.add_argument('path')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    write_csv(args.name, args.path, args.n_rows, seed=args.seed)
+    print(f"Wrote {args.n_rows} rows of synthetic {args.name} data to {args.path}")
@@ -0,0 +1,79 @@
+# Tests of the memory-compact frame representation
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_common.compaction import (MemoryReport, categorize_strings, compact_frame, downcast_numeric,
+                                  frame_nbytes, to_float32)
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'count': np.arange(1000, dtype=np.int64) % 7,
+        'signed': np.arange(1000, dtype=np.int64) - 500,
+        'big': (np.arange(1000, dtype=np.int64) - 500) * 10 ** 8,
+        'half': np.arange(1000) / 2.0,
+        'price': np.linspace(0.1, 99.9, 1000),
+        'flag': np.arange(1000) % 2 == 0,
+        'city': np.where(np.arange(1000) % 3 == 0, 'Paris', 'Lyon'),
+        'id': [f'row-{i}' for i in range(1000)],
+    })
+
+
+def test_downcast_numeric_narrows_without_changing_values(frame):
+    compact = downcast_numeric(frame)
+    assert compact['count'].dtype == np.uint8
+    assert compact['signed'].dtype == np.int16
+    assert compact['big'].dtype == np.int64
+    # Halves are exact in float32, the linspace prices are not
+    assert compact['half'].dtype == np.float32
+    assert compact['price'].dtype == np.float64
+    assert compact['flag'].dtype == bool
+    for name in frame.columns:
+        np.testing.assert_array_equal(compact[name].to_numpy(), frame[name].to_numpy())
+    assert downcast_numeric(frame, float32=True)['price'].dtype == np.float32
+    assert downcast_numeric(frame, exclude=['count'])['count'].dtype == np.int64
+
+
+def test_caller_frame_is_left_unchanged(frame):
+    dtypes, nbytes = frame.dtypes.copy(), frame_nbytes(frame)
+    compact = compact_frame(frame, float32=True)
+    assert frame_nbytes(compact) < nbytes
+    pd.testing.assert_series_equal(frame.dtypes, dtypes)
+    assert frame_nbytes(frame) == nbytes
+
+
+def test_inplace_replaces_the_columns(frame):
+    assert downcast_numeric(frame, inplace=True) is frame
+    assert frame['count'].dtype == np.uint8
+    assert categorize_strings(frame, inplace=True) is frame
+    assert isinstance(frame['city'].dtype, pd.CategoricalDtype)
+
+
+def test_categorize_strings_keeps_high_cardinality_columns(frame):
+    compact = categorize_strings(frame)
+    assert isinstance(compact['city'].dtype, pd.CategoricalDtype)
+    assert not isinstance(compact['id'].dtype, pd.CategoricalDtype)
+    assert list(compact['city']) == list(frame['city'])
+
+
+def test_empty_frame():
+    empty = pd.DataFrame({'a': np.array([], dtype=np.int64), 'b': np.array([], dtype=object)})
+    assert compact_frame(empty).shape == (0, 2)
+
+
+def test_to_float32():
+    from scipy import sparse
+    assert to_float32([[1, 2]]).dtype == np.float32
+    assert to_float32(sparse.csr_matrix(np.eye(2))).dtype == np.float32
+
+
+def test_memory_report(frame):
+    report = MemoryReport('test', verbose=False)
+    compact = report.compact(frame, 'frame')
+    assert report.steps[0]['before'] == frame_nbytes(frame)
+    assert report.steps[0]['after'] == frame_nbytes(compact)
+    assert report.saved() == frame_nbytes(frame) - frame_nbytes(compact)
+    assert 'saved in total' in report.summary()
+    report._printed = True
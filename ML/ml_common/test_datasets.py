@@ -0,0 +1,128 @@
+# Tests of the dataset registry and the columnar CSV cache
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_common import datasets
+from ml_common.datasets import clear_cache, dataset_path, load_dataset, read_cached_csv, register_dataset
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('ML_DATASET_CACHE', str(tmp_path / 'cache'))
+    return tmp_path / 'cache'
+
+
+@pytest.fixture
+def csv(tmp_path):
+    path = tmp_path / 'data.csv'
+    pd.DataFrame({
+        'id': np.arange(300),
+        'price': np.linspace(0.5, 99.5, 300),
+        'city': np.where(np.arange(300) % 3 == 0, 'Paris', 'Lyon'),
+        'note': [None if i % 7 == 0 else f'n{i % 11}' for i in range(300)],
+        'flag': np.arange(300) % 2 == 0,
+        'when': pd.date_range('2024-01-01', periods=300, freq='h').astype(str),
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+def parse_when(df):
+    df['when'] = pd.to_datetime(df['when'])
+    return df
+
+
+@pytest.mark.parametrize('chunksize', [None, 64])
+def test_round_trip_matches_read_csv(csv, chunksize):
+    expected = pd.read_csv(csv)
+    built = read_cached_csv(csv, chunksize=chunksize)
+    cached = read_cached_csv(csv, chunksize=chunksize)
+    pd.testing.assert_frame_equal(built, expected)
+    pd.testing.assert_frame_equal(cached, expected)
+    # Numeric columns come straight from the memory-mapped blocks, and can still be modified
+    cached.loc[0, 'price'] = -1.0
+    pd.testing.assert_frame_equal(read_cached_csv(csv), expected)
+    pd.testing.assert_frame_equal(read_cached_csv(csv, columns=['city', 'id']), expected[['city', 'id']])
+
+
+def test_transform_is_cached(csv):
+    calls = []
+
+    def transform(df):
+        calls.append(len(df))
+        return parse_when(df)
+
+    first = read_cached_csv(csv, transform=transform, chunksize=100)
+    second = read_cached_csv(csv, transform=transform, chunksize=100)
+    assert calls == [100, 100, 100]
+    assert second['when'].dtype.kind == 'M'
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_content_change_rebuilds_the_cache(csv, cache_dir):
+    read_cached_csv(csv)
+    pd.read_csv(csv).head(10).to_csv(csv, index=False)
+    assert len(read_cached_csv(csv)) == 10
+    # Only the files of the current version are kept
+    (directory,) = os.listdir(cache_dir)
+    prefix = datasets.content_hash(csv)
+    assert all(name.startswith(prefix) for name in os.listdir(cache_dir / directory) if name != 'manifest.json')
+
+
+def test_touched_file_keeps_the_cache(csv, monkeypatch):
+    read_cached_csv(csv)
+    os.utime(csv, ns=(0, 0))
+    built = []
+    monkeypatch.setattr(datasets, '_build_cache', lambda *args: built.append(args))
+    assert len(read_cached_csv(csv)) == 300
+    assert built == []
+
+
+def test_chunks_with_changing_dtype(tmp_path):
+    widened, narrowed = tmp_path / 'widened.csv', tmp_path / 'narrowed.csv'
+    widened.write_text('value\n' + '1.5\n' * 50 + '1\n' * 50)
+    narrowed.write_text('value\n' + '1\n' * 50 + '1.5\n' * 50)
+    # Integer chunks after float ones are stored as floats; the other way round would lose data
+    assert read_cached_csv(str(widened), chunksize=30)['value'].tolist() == [1.5] * 50 + [1.0] * 50
+    with pytest.raises(ValueError, match='pass dtype='):
+        read_cached_csv(str(narrowed), chunksize=30)
+    assert read_cached_csv(str(narrowed), chunksize=30, dtype={'value': 'float64'})['value'].sum() == 125.0
+
+
+def test_registry(tmp_path, monkeypatch, csv):
+    # Registered through monkeypatch, so the entry is removed again afterwards
+    monkeypatch.setitem(datasets.DATASETS, 'example', None)
+    register_dataset('example', 'data.csv', directory='nowhere', source='https://example.org', sep=',')
+    with pytest.raises(FileNotFoundError, match='https://example.org'):
+        dataset_path('example')
+    monkeypatch.setenv('ML_DATA_DIR', str(tmp_path))
+    assert dataset_path('example') == csv
+    pd.testing.assert_frame_equal(load_dataset('example', columns=['id']), pd.read_csv(csv)[['id']])
+    with pytest.raises(KeyError, match='Unknown dataset'):
+        dataset_path('missing')
+
+
+def test_clear_cache(csv, cache_dir):
+    read_cached_csv(csv, label='one')
+    read_cached_csv(csv, label='two')
+    clear_cache('one')
+    assert [name.rsplit('-', 1)[0] for name in os.listdir(cache_dir)] == ['two']
+    clear_cache()
+    assert not cache_dir.exists()
+
+
+def test_invalid_options(csv):
+    with pytest.raises(ValueError, match='Unknown cache backend'):
+        read_cached_csv(csv, backend='parquet')
+    if datasets.feather is not None:
+        with pytest.raises(ValueError, match='chunksize'):
+            read_cached_csv(csv, backend='arrow', chunksize=10)
+
+
+def test_arrow_backend(csv):
+    pytest.importorskip('pyarrow')
+    expected = pd.read_csv(csv)
+    for _ in range(2):
+        pd.testing.assert_frame_equal(read_cached_csv(csv, backend='arrow'), expected)
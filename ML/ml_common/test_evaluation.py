@@ -0,0 +1,73 @@
+# Tests of the compute-once evaluation harness
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+from sklearn import metrics
+
+from ml_common.evaluation import EvaluationResult, Evaluator, fingerprint
+
+
+class CountingModel:
+    """Returns fixed probabilities and counts its predict() calls."""
+
+    def __init__(self, scores):
+        self.scores = np.asarray(scores)
+        self.calls = 0
+
+    def predict(self, X):
+        self.calls += 1
+        return self.scores[:len(X)]
+
+
+def test_fingerprint_depends_on_content_only():
+    X = np.arange(12.0).reshape(3, 4)
+    assert fingerprint(X) == fingerprint(X.copy())
+    assert fingerprint(X) != fingerprint(X.reshape(4, 3))
+    assert fingerprint(X) != fingerprint(X.astype(np.float32))
+    changed = X.copy()
+    changed[1, 1] += 1
+    assert fingerprint(X) != fingerprint(changed)
+    assert fingerprint(sparse.csr_matrix(X)) == fingerprint(sparse.csc_matrix(X))
+    assert fingerprint(pd.DataFrame(X)) != fingerprint(pd.DataFrame(X, index=[3, 4, 5]))
+    assert fingerprint(np.array(['a', 'b'], dtype=object)) != fingerprint(np.array(['a', 'c'], dtype=object))
+
+
+def test_predictions_are_computed_once():
+    model = CountingModel([[0.9], [0.2], [0.6], [0.4]])
+    X, y = np.zeros((4, 2)), np.array([1, 0, 0, 1])
+    evaluator = Evaluator()
+    labels = evaluator.predict(model, X, threshold=0.5)
+    np.testing.assert_array_equal(labels, [1, 0, 1, 0])
+    np.testing.assert_array_equal(evaluator.predict_scores(model, X.copy()), model.scores)
+    result = evaluator.evaluate(model, X, y, name='net', threshold=0.5)
+    assert evaluator.evaluate(model, X, y, threshold=0.5) is result
+    assert model.calls == 1
+
+    # Other data or another threshold is a new prediction
+    evaluator.predict(model, X[:3], threshold=0.5)
+    evaluator.predict(model, X, threshold=0.3)
+    assert model.calls == 3
+    evaluator.invalidate(model)
+    evaluator.predict(model, X, threshold=0.5)
+    assert model.calls == 4
+
+
+def test_scores_match_sklearn():
+    rng = np.random.default_rng(0)
+    y_true, y_pred = rng.integers(0, 2, 200), rng.integers(0, 2, 200)
+    result = EvaluationResult('model', y_true, y_pred[:, None])
+    assert result.accuracy == metrics.accuracy_score(y_true, y_pred)
+    assert result.error_rate == pytest.approx(1 - result.accuracy)
+    assert result.precision == metrics.precision_score(y_true, y_pred)
+    assert result.recall == metrics.recall_score(y_true, y_pred)
+    np.testing.assert_array_equal(result.confusion_matrix, metrics.confusion_matrix(y_true, y_pred))
+    assert result.classification_report == metrics.classification_report(y_true, y_pred)
+
+
+def test_results_frame():
+    X = pd.DataFrame({'age': [30, 40, 50]}, index=[7, 3, 9])
+    frame = EvaluationResult('model', [1, 0, 1], [1, 1, 1]).results_frame(X)
+    assert list(frame.columns) == ['age', 'True Label', 'Predicted Label']
+    assert list(frame.index) == [0, 1, 2]
+    assert list(X.columns) == ['age']
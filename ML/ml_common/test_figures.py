@@ -0,0 +1,81 @@
+# Tests of the figure renderer's modes
+import os
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_common import figures
+from ml_common.figures import FigureRenderer
+
+
+def plot_line(values):
+    import matplotlib.pyplot as plt
+    plt.figure()
+    plt.plot(values)
+
+
+def plot_two(values):
+    plot_line(values)
+    plot_line(values[::-1])
+
+
+@pytest.fixture
+def renderer(tmp_path):
+    return FigureRenderer('pipeline', mode='save', directory=str(tmp_path))
+
+
+def test_save_mode_writes_every_figure(renderer):
+    renderer.render('line', plot_line, np.arange(10))
+    renderer.render('two', plot_two, np.arange(10))
+    saved = renderer.wait()
+    names = sorted(os.path.basename(path) for path in saved)
+    assert names == ['line.png', 'two.png']
+    assert sorted(os.listdir(renderer.directory)) == ['line.png', 'two-1.png', 'two-2.png']
+    assert renderer.failed == []
+
+
+@pytest.mark.parametrize('in_process', [False, True])
+def test_failing_figure_is_reported(renderer, monkeypatch, in_process):
+    if in_process:
+        monkeypatch.setattr(figures, 'fork_is_safe', lambda: False)
+    renderer.render('broken', plot_line, None)
+    renderer.render('line', plot_line, np.arange(10))
+    renderer.wait()
+    assert renderer.failed == ['broken']
+    assert [os.path.basename(path) for path in renderer.saved] == ['line.png']
+
+
+def test_threaded_runtime_renders_in_process(renderer, monkeypatch):
+    monkeypatch.setitem(sys.modules, 'tensorflow', types.ModuleType('tensorflow'))
+    assert not figures.fork_is_safe()
+    renderer.render('line', plot_line, np.arange(10))
+    # Saved before render() returns, without a worker process
+    assert renderer._workers == []
+    assert [os.path.basename(path) for path in renderer.saved] == ['line.png']
+
+
+def test_off_mode_draws_nothing(tmp_path):
+    renderer = FigureRenderer('pipeline', mode='off', directory=str(tmp_path))
+    renderer.render('line', plot_line, np.arange(10))
+    assert renderer.wait() == []
+    assert not os.path.exists(renderer.directory)
+
+
+def test_invalid_mode(monkeypatch):
+    with pytest.raises(ValueError):
+        FigureRenderer('pipeline', mode='print')
+    monkeypatch.setenv('ML_FIGURES', 'print')
+    with pytest.raises(ValueError):
+        figures.default_mode()
+
+
+def test_sample_keeps_the_same_rows_of_every_input(tmp_path):
+    renderer = FigureRenderer('pipeline', mode='off', directory=str(tmp_path), point_budget=50)
+    frame = pd.DataFrame({'a': np.arange(1000)})
+    sampled_frame, sampled_array = renderer.sample(frame, np.arange(1000) * 2)
+    assert len(sampled_frame) == 50
+    np.testing.assert_array_equal(sampled_frame['a'].to_numpy() * 2, sampled_array)
+    assert len(FigureRenderer('pipeline', mode='off', point_budget=0).sample(frame)) == 1000
@@ -0,0 +1,88 @@
+# Tests of the deferred imports and the import-time profile
+import os
+import subprocess
+import sys
+
+import pytest
+
+from ml_common import lazy
+from ml_common.import_profile import format_profile, package_times, parse_importtime, profile_script
+from ml_common.lazy import LazyModule, lazy_import, resolve_globals
+
+ML_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def fresh_module(tmp_path, monkeypatch):
+    """Name of a module that has not been imported yet."""
+    (tmp_path / 'lazy_probe.py').write_text('VALUE = 42\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, 'lazy_probe', raising=False)
+    monkeypatch.setattr(lazy, 'IMPORTS', [])
+    yield 'lazy_probe'
+    sys.modules.pop('lazy_probe', None)
+
+
+def test_imported_on_first_use(fresh_module):
+    module = lazy_import(fresh_module)
+    assert isinstance(module, LazyModule)
+    assert fresh_module not in sys.modules
+    assert 'not loaded' in repr(module)
+    assert module.VALUE == 42
+    assert fresh_module in sys.modules
+    (record,) = lazy.IMPORTS
+    assert record['module'] == fresh_module
+    assert record['first_use'].startswith('test_lazy.py:')
+    # An imported module is returned as it is
+    assert lazy_import(fresh_module) is sys.modules[fresh_module]
+
+
+def test_resolve_globals(fresh_module, monkeypatch):
+    monkeypatch.setitem(globals(), 'probe', lazy_import(fresh_module))
+
+    def uses_probe():
+        return probe.VALUE  # noqa: F821
+
+    resolve_globals(uses_probe)
+    assert fresh_module in sys.modules
+    assert [record['module'] for record in lazy.IMPORTS] == [fresh_module]
+
+
+@pytest.mark.parametrize('module, heavy', [
+    ('ml_common.evaluation', ['sklearn', 'scipy']),
+    ('ml_common.figures', ['matplotlib']),
+    ('ml_common.model_cache', ['joblib', 'sklearn']),
+])
+def test_heavy_packages_are_not_imported_eagerly(module, heavy):
+    code = f"import sys, {module}; print(','.join(name for name in {heavy!r} if name in sys.modules))"
+    loaded = subprocess.run([sys.executable, '-c', code], cwd=ML_ROOT, capture_output=True, text=True, check=True)
+    assert loaded.stdout.strip() == ''
+
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |   _io
+import time:      2000 |       5000 |     numpy.core
+import time:      1000 |       8000 |   numpy
+import time:       500 |      12000 | pandas
+import time:       300 |        300 | json
+import time:       200 |        200 |     pandas.io.common
+not an import line
+"""
+
+
+def test_parse_importtime():
+    records = parse_importtime(IMPORTTIME)
+    assert records[0] == ('_io', 1e-4, 1e-4, 1)
+    assert [depth for _, _, _, depth in records] == [1, 2, 1, 0, 0, 2]
+    # Only top-level imports count, so numpy is counted with pandas
+    assert package_times(records) == {'pandas': pytest.approx(0.012), 'json': pytest.approx(0.0003)}
+
+
+def test_profile_script(tmp_path):
+    script = tmp_path / 'script.py'
+    script.write_text("import os, sys, json\nsys.exit(0 if os.environ['ML_FIGURES'] == 'off' else 3)\n")
+    profile = profile_script(str(script), stop_after=1)
+    assert profile['returncode'] == 0
+    assert 'json' in profile['packages']
+    assert format_profile(profile).splitlines()[-1].startswith('script.py:')
@@ -0,0 +1,122 @@
+# Tests of the content-addressed model cache
+import importlib
+import os
+import sys
+import threading
+import types
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from ml_common import model_cache
+from ml_common.model_cache import ModelCache, estimator_config
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ModelCache(root=str(tmp_path / 'cache'))
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 4))
+    return X, (X[:, 0] + X[:, 1] > 0).astype(int)
+
+
+def test_fit_or_load_fits_once(cache, data):
+    X, y = data
+    first = cache.fit_or_load(LogisticRegression(C=0.5), X, y)
+    second = cache.fit_or_load(LogisticRegression(C=0.5), X, y)
+    assert (cache.misses, cache.hits) == (1, 1)
+    np.testing.assert_array_equal(first.coef_, second.coef_)
+    np.testing.assert_array_equal(first.predict(X), second.predict(X))
+
+
+def test_key_follows_data_and_configuration(data):
+    X, y = data
+    config = {'estimator': estimator_config(LogisticRegression(C=0.5))}
+    key = ModelCache.key(X, y, config=config)
+    assert key == ModelCache.key(X.copy(), y.copy(), config=config)
+    changed = X.copy()
+    changed[0, 0] += 1e-9
+    assert key != ModelCache.key(changed, y, config=config)
+    assert key != ModelCache.key(X, y, config={'estimator': estimator_config(LogisticRegression(C=1.0))})
+
+
+def test_put_get_and_misses(cache):
+    assert cache.get('nothing') is None
+    cache.put('k', {'weights': np.arange(5), 'note': 'x'})
+    artifacts = cache.get('k')
+    np.testing.assert_array_equal(artifacts['weights'], np.arange(5))
+    assert artifacts['note'] == 'x'
+    assert [key for key, _, _ in cache.entries()] == ['k']
+
+
+def test_stale_pickle_is_a_miss(cache, monkeypatch):
+    module = types.ModuleType('vanishing_module')
+    monkeypatch.setitem(sys.modules, 'vanishing_module', module)
+
+    class Thing:
+        pass
+
+    Thing.__module__ = 'vanishing_module'
+    Thing.__qualname__ = 'Thing'
+    module.Thing = Thing
+    cache.put('k', {'estimator': Thing()})
+    del module.Thing
+    assert cache.get('k') is None
+    monkeypatch.delitem(sys.modules, 'vanishing_module')
+    assert cache.get('k') is None
+    assert cache.misses == 2
+
+
+def test_concurrent_writers_of_one_key(cache):
+    errors = []
+
+    def write():
+        try:
+            ModelCache(root=cache.root).put('same', {'weights': np.arange(10_000)})
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=write) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert cache.get('same')['weights'][-1] == 9_999
+    assert os.listdir(cache.root) == ['same']
+
+
+def test_eviction_keeps_the_newest_entry(tmp_path):
+    cache = ModelCache(root=str(tmp_path), max_bytes=120_000)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, {'weights': np.zeros(10_000)})
+    assert [key for key, _, _ in cache.entries()] == ['c']
+
+
+def test_repository_estimators_are_versioned_by_their_sources(tmp_path, monkeypatch):
+    # estimator.py uses helper.py: editing either gives the estimator a new version
+    monkeypatch.setattr(model_cache, 'ML_ROOT', str(tmp_path))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    (tmp_path / 'cache_helper.py').write_text("def scale(x):\n    return 2 * x\n")
+    (tmp_path / 'cache_estimator.py').write_text(
+        "from cache_helper import scale\n\nclass Estimator:\n    def fit(self, X):\n        return self\n")
+    estimator = importlib.import_module('cache_estimator').Estimator()
+    try:
+        version = model_cache._package_version(estimator)
+        assert version.startswith('cache_estimator==source-')
+        assert model_cache._package_version(estimator) == version
+        (tmp_path / 'cache_helper.py').write_text("def scale(x):\n    return 3 * x\n")
+        assert model_cache._package_version(estimator) != version
+    finally:
+        sys.modules.pop('cache_estimator', None)
+        sys.modules.pop('cache_helper', None)
+
+
+def test_installed_packages_are_versioned_by_release():
+    import sklearn
+    assert model_cache._package_version(LogisticRegression()) == f'sklearn=={sklearn.__version__}'
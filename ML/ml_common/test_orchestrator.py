@@ -0,0 +1,77 @@
+# Tests of the orchestrator's job graph and CPU budgets, with the jobs' processes faked
+import threading
+import time
+
+import pytest
+
+from ml_common import orchestrator
+
+
+@pytest.fixture
+def fake_jobs(monkeypatch, tmp_path):
+    """Replace the job table and run_job; returns the (name, event) log of the fake runs."""
+    monkeypatch.setenv('ML_RUN_DIR', str(tmp_path / 'runs'))
+    log, lock = [], threading.Lock()
+    failing = set()
+
+    def run_job(name, cpus, run_dir):
+        with lock:
+            log.append((name, 'start'))
+        time.sleep(0.02)
+        with lock:
+            log.append((name, 'end'))
+        status = 'failed' if name in failing else 'ok'
+        return {'name': name, 'status': status, 'cpus': cpus, 'wall_s': 0.02, 'cpu_s': 0.02}
+
+    monkeypatch.setattr(orchestrator, 'run_job', run_job)
+    monkeypatch.setattr(orchestrator, 'JOBS', {
+        'a': {'script': 'a.py', 'weight': 2},
+        'b': {'script': 'b.py'},
+        'needs_b': {'script': 'c.py', 'after': ['b']},
+        'bench': {'module': 'bench', 'wait_for': ['a', 'b', 'needs_b'], 'benchmark': True},
+    })
+    return log, failing
+
+
+def position(log, name, event):
+    return log.index((name, event))
+
+
+def test_after_and_wait_for_order_the_jobs(fake_jobs, tmp_path):
+    log, _ = fake_jobs
+    records = orchestrator.run_graph(['a', 'b', 'needs_b', 'bench'], str(tmp_path), workers=4, cpus=4)
+    assert [record['status'] for record in records] == ['ok'] * 4
+    assert position(log, 'needs_b', 'start') > position(log, 'b', 'end')
+    for name in ('a', 'b', 'needs_b'):
+        assert position(log, 'bench', 'start') > position(log, name, 'end')
+
+
+def test_failed_dependency_skips_only_jobs_that_need_it(fake_jobs, tmp_path):
+    log, failing = fake_jobs
+    failing.add('b')
+    records = {record['name']: record
+               for record in orchestrator.run_graph(['a', 'b', 'needs_b', 'bench'], str(tmp_path), 2, 2)}
+    assert records['b']['status'] == 'failed'
+    assert records['needs_b']['status'] == 'skipped'
+    assert 'b' in records['needs_b']['reason']
+    # wait_for only orders: the benchmark still runs, after everything else has finished
+    assert records['bench']['status'] == 'ok'
+    assert log[-2:] == [('bench', 'start'), ('bench', 'end')]
+
+
+def test_dependencies_outside_the_run_are_ignored(fake_jobs, tmp_path):
+    records = orchestrator.run_graph(['needs_b', 'bench'], str(tmp_path), workers=2, cpus=2)
+    assert [record['status'] for record in records] == ['ok', 'ok']
+
+
+def test_cpu_budgets_share_the_free_cpus(fake_jobs):
+    assert orchestrator.cpu_budgets(['a', 'b'], 6) == {'a': 4, 'b': 2}
+    # Never more than the cpus left by the running jobs, but at least one each
+    budgets = orchestrator.cpu_budgets(['a', 'b'], 6, running={'needs_b': 5})
+    assert budgets == {'a': 1, 'b': 1}
+    assert sum(orchestrator.cpu_budgets(['a', 'b', 'needs_b'], 3).values()) <= 3
+
+
+def test_scaling_benchmark_waits_for_every_pipeline():
+    assert orchestrator.JOBS['benchmark_scaling']['wait_for'] == orchestrator.PIPELINES
+    assert all(name.startswith('ML_') for name in orchestrator.PIPELINES)
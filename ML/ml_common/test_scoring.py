@@ -0,0 +1,88 @@
+# Tests of block-by-block scoring against scoring the whole dataset at once
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from ml_common.scoring import BlockScorer
+
+
+class CountingModel:
+    """Sum of each row's features; counts the rows it was asked to predict."""
+
+    def __init__(self):
+        self.rows_scored = 0
+
+    def predict(self, X):
+        X = np.asarray(X.todense() if sparse.issparse(X) else X)
+        self.rows_scored += len(X)
+        return X.sum(axis=1)
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(1000, 4))
+    y = (X[:, 0] - X[:, 2] > 0).astype(int)
+    return X, y
+
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+@pytest.mark.parametrize('block_rows', [1, 64, 5000])
+def test_matches_whole_dataset_predictions(data, block_rows, max_workers, monkeypatch):
+    # Threads are used even on a single core
+    monkeypatch.setenv('ML_MAX_WORKERS', str(max_workers))
+    X, y = data
+    scaler = StandardScaler().fit(X)
+    model = LogisticRegression().fit(scaler.transform(X), y)
+    scorer = BlockScorer('demo', block_rows=block_rows, max_workers=max_workers, verbose=False)
+    outputs = scorer.score(X, {'label': model, 'proba': model.predict_proba}, transform=scaler.transform)
+    np.testing.assert_array_equal(outputs['label'], model.predict(scaler.transform(X)))
+    np.testing.assert_allclose(outputs['proba'], model.predict_proba(scaler.transform(X)))
+    assert outputs['proba'].shape == (1000, 2)
+
+
+def test_known_rows_are_copied_not_scored(data):
+    X, _ = data
+    model = CountingModel()
+    known_rows = np.arange(100, 1000, 3)
+    known_values = np.full(len(known_rows), -1.0)
+    outputs = BlockScorer('demo', block_rows=128, verbose=False).score(
+        X, {'total': model}, known=(known_rows, {'total': known_values}))
+    expected = X.sum(axis=1)
+    expected[known_rows] = -1.0
+    np.testing.assert_array_equal(outputs['total'], expected)
+    assert model.rows_scored == 1000 - len(known_rows)
+
+
+def test_every_row_known(data):
+    X, _ = data
+    model = CountingModel()
+    values = np.arange(1000, dtype=np.float32)
+    outputs = BlockScorer('demo', block_rows=128, verbose=False).score(X, {'total': model},
+                                                                        known=(np.arange(1000), {'total': values}))
+    np.testing.assert_array_equal(outputs['total'], values)
+    assert outputs['total'].dtype == np.float32
+    assert model.rows_scored == 0
+
+
+def test_frames_sparse_and_empty_input(data):
+    X, _ = data
+    frame = pd.DataFrame(X, index=np.arange(1000) * 7)
+    scorer = BlockScorer('demo', block_rows=100, verbose=False)
+    known = (np.array([5, 6]), {'total': np.zeros(2)})
+    np.testing.assert_allclose(scorer.score(frame, {'total': CountingModel()}, known=known)['total'][:5],
+                               X[:5].sum(axis=1))
+    np.testing.assert_allclose(scorer.score(sparse.csr_matrix(X), {'total': CountingModel()})['total'],
+                               X.sum(axis=1))
+    assert scorer.score(X[:0], {'total': CountingModel()})['total'].shape == (0,)
+
+
+def test_outputs_on_disk(data, tmp_path, capsys):
+    X, _ = data
+    outputs = BlockScorer('demo', block_rows=300, directory=str(tmp_path)).score(X, {'total': CountingModel()})
+    assert isinstance(outputs['total'], np.memmap)
+    np.testing.assert_allclose(np.load(tmp_path / 'demo' / 'total.npy'), X.sum(axis=1))
+    assert '1000 rows x 1 model(s) in 4 block(s)' in capsys.readouterr().out
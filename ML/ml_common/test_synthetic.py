@@ -0,0 +1,82 @@
+# Tests of the synthetic dataset generators and the scaling benchmark built on them
+import pandas as pd
+import pytest
+
+from ml_common import benchmark_scaling, synthetic
+from ml_common.datasets import DATASETS, dataset_path
+
+
+@pytest.mark.parametrize('name', sorted(synthetic.GENERATORS))
+def test_csv_matches_the_original_layout(name, tmp_path):
+    path = synthetic.write_csv(name, str(tmp_path / f'{name}.csv'), 250, chunk_rows=100)
+    options = DATASETS[name].get('read_csv') or {}
+    written = pd.read_csv(path, **options)
+    assert len(written) == 250
+    try:
+        original = pd.read_csv(dataset_path(name), nrows=200, **options)
+    except FileNotFoundError:
+        pytest.skip(f'{name} dataset not available')
+    assert list(written.columns) == list(original.columns)
+    for column in original.columns:
+        # Numeric columns stay numeric, text columns stay text
+        assert pd.api.types.is_numeric_dtype(written[column]) == pd.api.types.is_numeric_dtype(original[column]), column
+
+
+def test_generators_are_seeded():
+    pd.testing.assert_frame_equal(synthetic.churn_customers(100, seed=3), synthetic.churn_customers(100, seed=3))
+    assert not synthetic.churn_customers(100, seed=3).equals(synthetic.churn_customers(100, seed=4))
+
+
+def test_uber_dirty_rows():
+    clean = synthetic.uber_trips(20_000, dirty=False, text=False)
+    assert clean['fare_amount'].notna().all() and (clean['fare_amount'] > 0).all()
+    assert clean['pickup_datetime'].dtype.kind == 'M'
+    dirty = synthetic.uber_trips(20_000)
+    assert 0.005 < dirty['fare_amount'].isna().mean() < 0.02
+    assert 0.01 < (dirty['pickup_longitude'] == 0).mean() < 0.03
+    assert (dirty['pickup_datetime'] == 'not a date').any()
+
+
+def test_email_counts():
+    ids, X, y = synthetic.email_counts(2000, n_words=500)
+    assert X.shape == (2000, 500) and len(ids) == 2000
+    assert (X.sum(axis=1) > 0).all()
+    assert 0.24 < y.mean() < 0.34
+
+
+def test_scaling_report_flags_cliffs():
+    trace = benchmark_scaling.StageTrace('benchmark_scaling', verbose=False)
+    trace.peak_scope = 'process'
+    trace.stages = [{'name': f'demo/stage n={n}', 'rows': n, 'wall_s': wall, 'peak_rss_mb': None}
+                    for n, wall in [(1000, 0.01), (10_000, 0.1), (100_000, 5.0)]]
+    trace.path = ''
+    report, cliffs = benchmark_scaling.scaling_report(trace, cliff_factor=2.0)
+    assert cliffs == [('demo/stage', 100_000, pytest.approx(5.0))]
+    assert 'cliff: 5.0x' in report
+
+
+def test_failing_stage_skips_only_its_larger_sizes(monkeypatch):
+    monkeypatch.setenv('ML_TRACE', '0')
+
+    def failing(n, workdir):
+        if n > 1000:
+            raise MemoryError('too big')
+        return lambda: None
+
+    monkeypatch.setattr(benchmark_scaling, 'STAGES', [
+        ('demo', 'failing', 10 ** 5, failing),
+        ('diabetes', 'knn_sweep_k1_30', 10 ** 5, benchmark_scaling.diabetes_knn_sweep),
+    ])
+    trace, failures = benchmark_scaling.run_benchmark(sizes=[1000, 2000, 4000])
+    trace.finish()
+    assert failures == [('demo/failing', 2000, 'MemoryError: too big')]
+    assert [stage['name'] for stage in trace.stages] == [
+        'demo/failing n=1000', 'diabetes/knn_sweep_k1_30 n=1000', 'diabetes/knn_sweep_k1_30 n=2000',
+        'diabetes/knn_sweep_k1_30 n=4000']
+    assert all(stage['rows'] == int(stage['name'].rsplit('=', 1)[1]) for stage in trace.stages)
+
+
+@pytest.mark.parametrize('pipeline, stage, cap, setup', benchmark_scaling.STAGES,
+                         ids=[f'{pipeline}/{stage}' for pipeline, stage, _, _ in benchmark_scaling.STAGES])
+def test_every_stage_runs_at_the_smallest_size(pipeline, stage, cap, setup, tmp_path):
+    setup(1000, str(tmp_path))()
@@ -0,0 +1,90 @@
+# Tests of the per-stage tracing and the trace comparison
+import json
+import time
+
+import numpy as np
+import pytest
+
+from ml_common.compare_traces import compare_traces, main
+from ml_common.tracing import StageTrace
+
+
+@pytest.fixture(autouse=True)
+def trace_env(monkeypatch):
+    monkeypatch.delenv('ML_TRACE', raising=False)
+    monkeypatch.delenv('ML_STOP_AFTER', raising=False)
+
+
+def test_stages_are_recorded_and_written(tmp_path, capsys):
+    trace = StageTrace('demo', directory=str(tmp_path))
+    trace.stage('Step 1: Load')
+    trace.rows(120)
+    time.sleep(0.02)
+    trace.stage('Step 2: Allocate')
+    block = np.ones(8 * 2 ** 20)
+    with trace.stage('Step 3: Context'):
+        pass
+    path = trace.finish()
+    assert trace.finish() == path
+
+    with open(path) as file:
+        written = json.load(file)
+    assert [stage['name'] for stage in written['stages']] == ['Step 1: Load', 'Step 2: Allocate', 'Step 3: Context']
+    load, allocate, _ = written['stages']
+    assert load['rows'] == 120 and allocate['rows'] is None
+    assert load['wall_s'] >= 0.02
+    assert written['total']['wall_s'] >= load['wall_s'] + allocate['wall_s']
+    if written['peak_scope'] == 'stage':
+        assert allocate['peak_rss_mb'] - allocate['rss_start_mb'] >= 0.9 * block.nbytes / 2 ** 20
+    assert 'Stage trace' in capsys.readouterr().out
+
+
+def test_trace_disabled(tmp_path, monkeypatch):
+    monkeypatch.setenv('ML_TRACE', '0')
+    trace = StageTrace('demo', directory=str(tmp_path / 'traces'))
+    trace.stage('Step 1')
+    assert trace.finish() == ''
+    assert not (tmp_path / 'traces').exists()
+    assert 'Step 1' in trace.summary()
+
+
+def test_stop_after(tmp_path, monkeypatch):
+    monkeypatch.setenv('ML_STOP_AFTER', '2')
+    trace = StageTrace('demo', directory=str(tmp_path), verbose=False)
+    trace.stage('Step 1')
+    trace.stage('Step 2')
+    with pytest.raises(SystemExit) as stopped:
+        trace.stage('Step 3')
+    assert stopped.value.code == 0
+    assert [stage['name'] for stage in trace.stages] == ['Step 1', 'Step 2']
+    assert trace.path
+
+
+def make_trace(wall, peak, rows=100, peak_scope='stage'):
+    stages = [{'name': name, 'wall_s': w, 'peak_rss_mb': p, 'rows': rows}
+              for name, w, p in zip(['load', 'train'], wall, peak)]
+    return {'pipeline': 'demo', 'started': '2026-01-01T00:00:00', 'peak_scope': peak_scope,
+            'total': {'wall_s': sum(wall)}, 'stages': stages}
+
+
+def test_compare_traces_flags_only_real_regressions():
+    baseline = make_trace([1.0, 0.01], [100, 100])
+    candidate = make_trace([1.5, 0.04], [200, 110], rows=90)
+    rows = {row['name']: row['flags'] for row in compare_traces(baseline, candidate)}
+    # train quadrupled, but by less than the absolute floor
+    assert rows == {'load': ['wall', 'memory', 'rows changed'], 'train': ['rows changed']}
+    # Peaks measured over the whole process are not compared
+    rows = compare_traces(make_trace([1.0, 0.01], [100, 100], peak_scope='process'),
+                          make_trace([1.0, 0.01], [200, 110], peak_scope='process'))
+    assert [row['flags'] for row in rows] == [[], []]
+
+
+def test_compare_traces_exit_status(tmp_path, capsys):
+    paths = []
+    for name, trace in [('old', make_trace([1.0, 1.0], [100, 100])), ('same', make_trace([1.01, 1.0], [100, 100])),
+                        ('slow', make_trace([1.0, 2.0], [100, 100]))]:
+        paths.append(tmp_path / f'{name}.json')
+        paths[-1].write_text(json.dumps(trace))
+    assert main([str(paths[0]), str(paths[1])]) == 0
+    assert main([str(paths[0]), str(paths[2])]) == 1
+    assert '1 stage(s) regressed: train' in capsys.readouterr().out
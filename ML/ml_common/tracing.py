@@ -0,0 +1,169 @@
+# Per-stage timing and memory instrumentation for the pipeline scripts
+# A script marks its steps with trace.stage("Step 1: Load") - each call closes the previous
+# stage - and may note the number of rows a stage produced with trace.rows(n). Wall time,
+# CPU time, resident memory and peak memory are recorded per stage, and a JSON trace is
+# written when the script finishes (compare two traces with ml_common.compare_traces).
+# With $ML_STOP_AFTER=N the script ends once its first N stages have run, e.g. to time how
+# long it takes to start and print its dataset diagnostics (ml_common.benchmark_startup).
+#
+# Peak memory is per stage on Linux, where the kernel's high-water mark can be reset;
+# elsewhere it is the process peak so far. CPU time covers the script's own process,
+# not worker processes of a pool.
+import atexit
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+try:
+    import psutil
+except ImportError:  # only needed where /proc is not available
+    psutil = None
+
+ML_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _memory_mb():
+    """(resident set size, peak resident set size) of this process in MiB, or (None, None)."""
+    try:
+        with open('/proc/self/status') as file:
+            fields = dict(line.split(':', 1) for line in file)
+        return int(fields['VmRSS'].split()[0]) / 1024, int(fields['VmHWM'].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        pass
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return info.rss / 2 ** 20, getattr(info, 'peak_wset', info.rss) / 2 ** 20
+    return None, None
+
+
+def _reset_peak():
+    # Writing 5 to clear_refs resets the kernel's peak RSS (VmHWM) for this process
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+        return True
+    except OSError:
+        return False
+
+
+class Stage:
+    """One measured stage; also usable as a context manager (`with trace.stage(...)`)."""
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+        self.rows = None
+        trace.peak_scope = 'stage' if _reset_peak() else 'process'
+        self.rss_start_mb, _ = _memory_mb()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self.record = None
+
+    def end(self):
+        if self.record is None:
+            rss_mb, peak_mb = _memory_mb()
+            self.record = {
+                'name': self.name,
+                'wall_s': time.perf_counter() - self._wall,
+                'cpu_s': time.process_time() - self._cpu,
+                'rss_start_mb': self.rss_start_mb,
+                'rss_end_mb': rss_mb,
+                'peak_rss_mb': peak_mb,
+                'rows': self.rows,
+            }
+            self.trace.stages.append(self.record)
+        return self.record
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.end()
+        if self.trace.current is self:
+            self.trace.current = None
+
+
+class StageTrace:
+    """Collects the stages of one pipeline run and writes them as a JSON trace.
+
+    The trace goes to $ML_TRACE_DIR (default ML/.traces) as
+    <pipeline>-<timestamp>.json when finish() is called or, failing that,
+    when the interpreter exits. Set ML_TRACE=0 to measure without writing.
+    """
+
+    def __init__(self, pipeline, directory=None, verbose=True):
+        self.pipeline = pipeline
+        self.directory = directory or os.environ.get('ML_TRACE_DIR', os.path.join(ML_ROOT, '.traces'))
+        self.verbose = verbose
+        self.stages = []
+        self.current = None
+        self.peak_scope = None
+        self.path = None
+        self.started = datetime.now()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._pid = os.getpid()
+        self.stop_after = int(os.environ['ML_STOP_AFTER']) if os.environ.get('ML_STOP_AFTER') else None
+        atexit.register(self.finish)
+
+    def stage(self, name):
+        """Close the running stage (if any) and start measuring `name`."""
+        if self.current is not None:
+            self.current.end()
+        if self.stop_after is not None and len(self.stages) >= self.stop_after:
+            self.finish()
+            sys.exit(0)
+        self.current = Stage(self, name)
+        return self.current
+
+    def rows(self, n_rows):
+        """Record the number of rows the running stage produced."""
+        if self.current is not None:
+            self.current.rows = int(n_rows)
+
+    def to_dict(self):
+        # Stage peaks are reset on Linux, so the run's peak is the largest of them
+        peaks = [stage['peak_rss_mb'] for stage in self.stages if stage['peak_rss_mb'] is not None]
+        return {
+            'pipeline': self.pipeline,
+            'started': self.started.isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'argv': sys.argv,
+            'peak_scope': self.peak_scope,
+            'total': {'wall_s': time.perf_counter() - self._wall, 'cpu_s': time.process_time() - self._cpu,
+                      'peak_rss_mb': max(peaks, default=None)},
+            'stages': self.stages,
+        }
+
+    def summary(self):
+        lines = [f"{'stage':40s} {'wall s':>9s} {'cpu s':>9s} {'peak MiB':>9s} {'rows':>10s}"]
+        for stage in self.stages:
+            peak = '-' if stage['peak_rss_mb'] is None else f"{stage['peak_rss_mb']:.0f}"
+            rows = '-' if stage['rows'] is None else str(stage['rows'])
+            lines.append(f"{stage['name'][:40]:40s} {stage['wall_s']:9.3f} {stage['cpu_s']:9.3f} {peak:>9s} {rows:>10s}")
+        return '\n'.join(lines)
+
+    def finish(self):
+        """Close the running stage and write the trace (once); returns the trace path."""
+        if self.path is not None or os.getpid() != self._pid:
+            return self.path
+        if self.current is not None:
+            self.current.end()
+            self.current = None
+        if not self.stages:
+            return None
+        trace = self.to_dict()
+        if os.environ.get('ML_TRACE', '1') == '0':
+            self.path = ''
+            return self.path
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f"{self.pipeline}-{self.started:%Y%m%d-%H%M%S}.json")
+        with open(self.path, 'w') as file:
+            json.dump(trace, file, indent=1)
+        if self.verbose:
+            print(f"\nStage trace ({trace['total']['wall_s']:.2f} s total) written to {self.path}\n{self.summary()}")
+        return self.path